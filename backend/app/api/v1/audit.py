@@ -5,6 +5,8 @@ from datetime import datetime
 from app.models import all_models as models
 from app.core import security as auth
 from app.db.session import get_db
+from app.services.export_service import ExportService
+from sqlalchemy import func
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/audit", tags=["Audit Logs"])
@@ -77,6 +79,50 @@ def get_audit_logs(
     
     return results
 
+AUDIT_EXPORT_COLUMNS = [
+    ("id", "ID", models.AuditLog.id),
+    ("user_id", "User ID", models.AuditLog.user_id),
+    ("username", "Username", func.coalesce(models.User.username, "System")),
+    ("action", "Action", models.AuditLog.action),
+    ("entity_type", "Entity Type", models.AuditLog.entity_type),
+    ("entity_id", "Entity ID", models.AuditLog.entity_id),
+    ("description", "Description", models.AuditLog.description),
+    ("created_at", "Created At", models.AuditLog.created_at),
+]
+
+@router.get("/logs/export")
+def export_audit_logs(
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    compress: bool = Query(False, alias="gzip"),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """Export audit logs as CSV or NDJSON, same filters as /logs (Admin only)"""
+    
+    statement = ExportService.select(AUDIT_EXPORT_COLUMNS).select_from(models.AuditLog).outerjoin(
+        models.User, models.AuditLog.user_id == models.User.id
+    )
+    
+    # Apply filters
+    if user_id:
+        statement = statement.where(models.AuditLog.user_id == user_id)
+    if action:
+        statement = statement.where(models.AuditLog.action == action)
+    if entity_type:
+        statement = statement.where(models.AuditLog.entity_type == entity_type)
+    if start_date:
+        statement = statement.where(models.AuditLog.created_at >= start_date)
+    if end_date:
+        statement = statement.where(models.AuditLog.created_at <= end_date)
+    
+    return ExportService.response(
+        statement.order_by(models.AuditLog.created_at.desc()), AUDIT_EXPORT_COLUMNS, "audit_logs", format, compress
+    )
+
 @router.get("/user/{user_id}")
 def get_user_activity(
     user_id: int,
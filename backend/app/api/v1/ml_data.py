@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from app.models import all_models as models
 from app.core import security as auth
 from app.db.session import get_db
-from services.ml_data_service import MLDataService
+from app.services.ml_data_service import FEATURE_COLUMNS, MLDataService
 import os
 
 router = APIRouter(prefix="/ml-data", tags=["ML Data"])
@@ -20,12 +20,13 @@ def export_training_data(
     Export training data for ML model (Admin only)
     """
     try:
-        # Collect real data
-        real_df = MLDataService.collect_retention_features(db)
+        # One labelled example per tenant booking
+        columns = ['user_id'] + FEATURE_COLUMNS + ['retained']
+        real_df = MLDataService.collect_labelled_outcomes(db)[columns]
         
-        # Add synthetic data if requested
+        # Add synthetic data if requested (synthetic_count users' histories)
         if include_synthetic:
-            synthetic_df = MLDataService.generate_synthetic_data(db, synthetic_count)
+            synthetic_df = MLDataService.generate_synthetic_data(synthetic_count)[columns]
             import pandas as pd
             df = pd.concat([real_df, synthetic_df], ignore_index=True)
         else:
@@ -199,7 +200,7 @@ def get_data_statistics(
     Get statistics about the training data
     """
     try:
-        df = MLDataService.collect_retention_features(db)
+        df = MLDataService.collect_labelled_outcomes(db)
         
         if len(df) == 0:
             return {
@@ -216,11 +217,10 @@ def get_data_statistics(
             'churned_users': int(churned_count),
             'retention_rate': round(retained_count / len(df) * 100, 2),
             'feature_statistics': {
-                'avg_total_bookings': round(df['total_bookings'].mean(), 2),
-                'avg_cancellation_rate': round(df['cancellation_rate'].mean(), 3),
-                'avg_late_payment_rate': round(df['late_payment_rate'].mean(), 3),
-                'avg_days_since_last_booking': round(df['days_since_last_booking'].mean(), 1),
-                'avg_rating': round(df['avg_rating'].mean(), 2)
+                'avg_lead_time': round(float(df['lead_time'].mean()), 1),
+                'avg_stay_nights': round(float(df['total_stay_nights'].mean()), 1),
+                'avg_previous_cancellations': round(float(df['previous_cancellations'].mean()), 3),
+                'repeat_guest_rate': round(float(df['is_repeated_guest'].mean()), 3)
             },
             'class_balance': {
                 'retained': f"{retained_count / len(df) * 100:.1f}%",
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from app.models import all_models as models
@@ -6,13 +8,28 @@ from app.core import security as auth
 from app.db.session import get_db
 from app.services.ml_prediction_service import MLPredictionService
 from app.services.ml_data_service import MLDataService
+from app.services.risk_score_service import RiskScoreService
+from app.services.audit_service import AuditService
+from app.services.inference_service import (
+    INFERENCE_SOCKET, InferenceClient, InferenceUnavailable, drift_report, score_rows
+)
+from app.services.micro_batcher import MicroBatcher
+from functools import partial
 from pydantic import BaseModel
+import os
 
 router = APIRouter(prefix="/ml-predictions", tags=["ML Predictions"])
 
-# Initialize ML service
+# Initialize ML service (loads the active model on first use)
 ml_service = MLPredictionService()
 
+# With ML_INFERENCE_SOCKET set, live predictions go to inference_worker.py
+# and this process never loads the model for them
+inference_client = InferenceClient(INFERENCE_SOCKET) if INFERENCE_SOCKET else None
+
+# Without it, concurrent predictions in this process are scored together
+batcher = MicroBatcher(partial(score_rows, ml_service))
+
 class PredictionRequest(BaseModel):
     user_id: int
 
@@ -28,79 +45,209 @@ class PredictionResponse(BaseModel):
     features_used: Dict[str, Any]
 
 @router.get("/model-info")
-def get_model_info(
+async def get_model_info(
     current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
 ):
-    """Get information about the deployed model"""
+    """
+    Get information about the deployed model. Asks the inference worker
+    when predictions are offloaded, so this process never loads a copy.
+    """
     try:
-        return ml_service.get_model_info() if hasattr(ml_service, 'get_model_info') else {"status": "active"}
+        if inference_client is not None:
+            return await inference_client.model_info()
+        return await run_in_threadpool(ml_service.get_model_info)
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get model info: {str(e)}"
         )
 
-@router.post("/predict", response_model=PredictionResponse)
-def predict_retention(self, raw_data: dict) -> dict:
+@router.get("/models")
+def list_model_versions(
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """Registered model versions, newest first, and the active one (Admin only)"""
+    return {
+        "active": ml_service.registry.get_active(),
+        "versions": ml_service.registry.list_versions()
+    }
+
+@router.post("/models/{version}/promote")
+def promote_model_version(
+    version: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
     """
-    Preprocesses raw DB data and generates a prediction.
+    Make a registered version the active model (Admin only).
+    Other workers (and the inference worker) pick it up within
+    ML_RELOAD_CHECK_SECONDS.
     """
-    # ✅ ADD THIS DEBUG LOGGING
-    print(f"🔍 DEBUG: Starting prediction with data: {list(raw_data.keys())}")
+    try:
+        pointer = ml_service.registry.promote(version)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # With the offload on, loading it here would only duplicate the worker's copy
+    if inference_client is None:
+        ml_service.reload()
     
-    if not self.model or not self.label_encoders:
-        error_msg = "Model not loaded"
-        print(f"❌ ERROR: {error_msg}")
-        return {"error": error_msg, "risk_score": 0, "will_retain": True}
     try:
-        # Get user
-        user = db.query(models.User).filter(models.User.id == request.user_id).first()
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        if user.role != models.UserRole.TENANT:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Can only predict retention for tenant users"
-            )
-        
-        # ✅ UPDATED: Call the new Data Service method
-        # This maps the DB data to the features required by your Random Forest model
-        features = MLDataService.prepare_features_for_user(db, user)
-        
-        if not features:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient data: Tenant needs at least one booking history to generate a prediction."
-            )
-        
-        # Make prediction
-        prediction = ml_service.predict_retention(features)
-        
-        return {
-            'user_id': user.id,
-            'username': user.username,
-            'will_retain': prediction['will_retain'],
-            'retention_probability': prediction['retention_probability'],
-            'churn_probability': prediction['churn_probability'],
-            'risk_score': prediction['risk_score'],
-            'risk_level': prediction['risk_level'],
-            'recommendation': prediction['recommendation'],
-            'features_used': features
-        }
-        
-    except HTTPException:
-        raise
+        AuditService.log(
+            db=db,
+            action=models.AuditAction.UPDATE,
+            user_id=current_user.id,
+            entity_type="ml_model",
+            description=f"Promoted model version {version}",
+            metadata=pointer,
+            request=request
+        )
+    except:
+        pass
+    
+    return {"message": f"Model version {version} is now active", **pointer}
+
+def _tenant_features(db: Session, user_id: int) -> tuple:
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    if user.role != models.UserRole.TENANT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Can only predict retention for tenant users"
+        )
+    
+    features = MLDataService.prepare_features_for_user(db, user)
+    if not features:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient data: Tenant needs at least one booking history to generate a prediction."
+        )
+    
+    return user, features
+
+async def _score(features: dict) -> dict:
+    """One prediction, from the inference worker when ML_INFERENCE_SOCKET is set"""
+    if inference_client is not None:
+        return (await inference_client.predict([features]))[0]
+    return await batcher.submit(features)
+
+@router.get("/batching-metrics")
+async def get_batching_metrics(
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """
+    Micro-batching metrics: batch-size, queueing-delay and scoring-time
+    histograms (Admin only). Comes from the inference worker when
+    predictions are offloaded, else from this API process only.
+    """
+    if inference_client is None:
+        return {"source": "api_process", "pid": os.getpid(), **batcher.metrics()}
+    
+    try:
+        return {"source": "inference_worker", **(await inference_client.metrics())}
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+@router.get("/drift")
+async def get_feature_drift(
+    run: bool = False,
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """
+    Live feature drift against the training reference: PSI and binned KS
+    per feature, flagged over PSI_DRIFT_THRESHOLD / KS_DRIFT_THRESHOLD
+    (Admin only). Reports on the rows scored since the last scheduled
+    check; run=true checks now. Covers the inference worker when
+    predictions are offloaded, else this API process only.
+    """
+    if inference_client is None:
+        report = await run_in_threadpool(drift_report, ml_service, run)
+        return {"source": "api_process", "pid": os.getpid(), **report}
+    
+    try:
+        return {"source": "inference_worker", **(await inference_client.drift(run=run))}
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+@router.post("/predict", response_model=PredictionResponse)
+async def predict_retention(
+    request: PredictionRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN, models.UserRole.OWNER]))
+):
+    """Live retention prediction for one tenant"""
+    # Queries stay on the threadpool; scoring is awaited, so the loop never blocks
+    user, features = await run_in_threadpool(_tenant_features, db, request.user_id)
+    
+    try:
+        prediction = await _score(features)
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         print(f"❌ ERROR in predict_retention: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return {"error": str(e), "risk_score": 0, "will_retain": True}
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction failed: {str(e)}"
+        )
+    
+    return {
+        'user_id': user.id,
+        'username': user.username,
+        'will_retain': prediction['will_retain'],
+        'retention_probability': prediction['retention_probability'],
+        'churn_probability': prediction['churn_probability'],
+        'risk_score': prediction['risk_score'],
+        'risk_level': prediction['risk_level'],
+        'recommendation': prediction['recommendation'],
+        'features_used': features
+    }
+
+def _scored_tenants(db: Session):
+    """Persisted scores joined to their tenants (stale-marked rows never scored are left out)"""
+    return db.query(models.TenantRiskScore, models.User).join(
+        models.User, models.User.id == models.TenantRiskScore.user_id
+    ).filter(models.TenantRiskScore.risk_score.isnot(None))
 
-# Replace your predict_all_tenants function in ml_predictions.py with this fixed version:
+def _prediction_result(score: models.TenantRiskScore, tenant: models.User) -> dict:
+    return {
+        'user_id': tenant.id,
+        'username': tenant.username,
+        'email': tenant.email,
+        'full_name': tenant.full_name,
+        'will_retain': score.will_retain,
+        'retention_probability': score.retention_probability,
+        'churn_probability': score.churn_probability,
+        'risk_score': score.risk_score,
+        'risk_level': score.risk_level,
+        'recommendation': score.recommendation,
+        'key_factors': score.key_factors or [],
+        'model_version': score.model_version,
+        'computed_at': score.computed_at,
+        'is_stale': score.is_stale
+    }
+
+@router.post("/scores/refresh", status_code=202)
+def refresh_risk_scores(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """
+    Queue a rescore of every tenant into tenant_risk_scores (Admin only).
+    risk_score_worker.py runs it on its next poll; this process never
+    loads the model for it.
+    """
+    requested_at = RiskScoreService.request_full_refresh(db, requested_by=current_user.id)
+    return {"message": "Risk score refresh queued", "requested_at": requested_at}
 
 @router.get("/predict-all")
 def predict_all_tenants(
@@ -109,81 +256,24 @@ def predict_all_tenants(
     current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN, models.UserRole.OWNER]))
 ):
     """
-    Predict retention for all tenants
+    Retention predictions for all tenants, from the persisted scores
     Filter by risk level: 'high', 'medium', 'low'
     """
-    try:
-        # Get all tenant users
-        tenants = db.query(models.User).filter(
-            models.User.role == models.UserRole.TENANT
-        ).all()
-        
-        predictions = []
-        
-        for tenant in tenants:
-            try:
-                # ✅ Calculate features using new method
-                features = MLDataService.prepare_features_for_user(db, tenant)
-                
-                # Skip users with insufficient data (no bookings)
-                if not features:
-                    continue
-                
-                # Make prediction
-                prediction = ml_service.predict_retention(features)
-                
-                # ✅ FIX: Check if prediction was successful
-                if not prediction or 'error' in prediction:
-                    error_msg = prediction.get('error', 'Unknown error') if prediction else 'No prediction returned'
-                    print(f"⚠️ Skipping tenant {tenant.id} ({tenant.username}): {error_msg}")
-                    continue
-                
-                # ✅ FIX: Ensure all required keys exist
-                if 'risk_level' not in prediction:
-                    print(f"⚠️ Skipping tenant {tenant.id}: Missing risk_level in prediction")
-                    continue
-                
-                # Add user info
-                prediction_result = {
-                    'user_id': tenant.id,
-                    'username': tenant.username,
-                    'email': tenant.email,
-                    'full_name': tenant.full_name,
-                    'will_retain': prediction.get('will_retain', True),
-                    'retention_probability': prediction.get('retention_probability', 0),
-                    'churn_probability': prediction.get('churn_probability', 0),
-                    'risk_score': prediction.get('risk_score', 0),
-                    'risk_level': prediction.get('risk_level', 'Low'),
-                    'recommendation': prediction.get('recommendation', 'No recommendation available')
-                }
-                
-                # Filter by risk level if specified (case-insensitive)
-                if risk_level is None or prediction_result['risk_level'].lower() == risk_level.lower():
-                    predictions.append(prediction_result)
-                    
-            except Exception as e:
-                # ✅ FIX: Catch individual tenant errors, don't fail entire request
-                print(f"⚠️ Error predicting for tenant {tenant.id}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                continue
-        
-        # Sort by risk score (highest first)
-        predictions.sort(key=lambda x: x['risk_score'], reverse=True)
-        
-        return {
-            'total_tenants': len(predictions),
-            'filter': risk_level,
-            'predictions': predictions
-        }
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Batch prediction failed: {str(e)}"
-        )
+    query = _scored_tenants(db)
+    
+    # Levels are stored as 'High' / 'Medium' / 'Low'
+    if risk_level is not None:
+        query = query.filter(models.TenantRiskScore.risk_level == risk_level.capitalize())
+    
+    # Highest risk first (ix_tenant_risk_scores_level_score / _score)
+    rows = query.order_by(models.TenantRiskScore.risk_score.desc(), models.TenantRiskScore.user_id).all()
+    predictions = [_prediction_result(score, tenant) for score, tenant in rows]
+    
+    return {
+        'total_tenants': len(predictions),
+        'filter': risk_level,
+        'predictions': predictions
+    }
 
 @router.get("/at-risk-tenants")
 def get_at_risk_tenants(
@@ -195,29 +285,25 @@ def get_at_risk_tenants(
     Get list of tenants at risk of churning
     threshold: Risk score threshold (default 70)
     """
-    try:
-        # Get all predictions
-        result = predict_all_tenants(db=db, current_user=current_user)
-        
-        # Filter by threshold
-        at_risk = [p for p in result['predictions'] if p['risk_score'] >= threshold]
-        
-        return {
-            'threshold': threshold,
-            'at_risk_count': len(at_risk),
-            'total_tenants': result['total_tenants'],
-            'at_risk_tenants': at_risk,
-            'summary': {
-                'high_risk': len([p for p in at_risk if p['risk_level'].lower() == 'high']),
-                'medium_risk': len([p for p in at_risk if p['risk_level'].lower() == 'medium']),
-            }
+    scores = models.TenantRiskScore
+    
+    rows = _scored_tenants(db).filter(
+        scores.risk_score >= threshold
+    ).order_by(scores.risk_score.desc(), scores.user_id).all()
+    at_risk = [_prediction_result(score, tenant) for score, tenant in rows]
+    
+    total_tenants = db.query(func.count(scores.user_id)).filter(scores.risk_score.isnot(None)).scalar()
+    
+    return {
+        'threshold': threshold,
+        'at_risk_count': len(at_risk),
+        'total_tenants': total_tenants,
+        'at_risk_tenants': at_risk,
+        'summary': {
+            'high_risk': len([p for p in at_risk if p['risk_level'] == 'High']),
+            'medium_risk': len([p for p in at_risk if p['risk_level'] == 'Medium']),
         }
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get at-risk tenants: {str(e)}"
-        )
+    }
 
 @router.get("/retention-stats")
 def get_retention_statistics(
@@ -227,78 +313,56 @@ def get_retention_statistics(
     """
     Get overall retention statistics
     """
-    try:
-        result = predict_all_tenants(db=db, current_user=current_user)
-        predictions = result['predictions']
-        
-        if not predictions:
-            return {
-                'message': 'No tenant data available for statistics',
-                'total_tenants': 0,
-                'risk_distribution': {
-                    'high_risk': {'count': 0, 'percentage': 0}, 
-                    'medium_risk': {'count': 0, 'percentage': 0}, 
-                    'low_risk': {'count': 0, 'percentage': 0}
-                },
-                'averages': {'risk_score': 0, 'retention_probability': 0},
-                'predicted_to_churn': 0,
-                'predicted_to_retain': 0
-            }
-        
-        total = len(predictions)
-        high_risk = len([p for p in predictions if p.get('risk_level', '').lower() == 'high'])
-        medium_risk = len([p for p in predictions if p.get('risk_level', '').lower() == 'medium'])
-        low_risk = len([p for p in predictions if p.get('risk_level', '').lower() == 'low'])
-        
-        # ✅ FIX: Safely handle risk_score and retention_probability
-        total_risk_score = 0
-        total_retention_prob = 0
-        valid_predictions = 0
-        
-        for p in predictions:
-            # Safely get risk_score with default
-            risk_score = p.get('risk_score', 0)
-            if risk_score is not None:
-                total_risk_score += risk_score
-                valid_predictions += 1
-            
-            # Safely get retention_probability with default
-            retention_prob = p.get('retention_probability', 0)
-            if retention_prob is not None:
-                total_retention_prob += retention_prob
-        
-        # Avoid division by zero
-        avg_risk_score = total_risk_score / valid_predictions if valid_predictions > 0 else 0
-        avg_retention_prob = total_retention_prob / total if total > 0 else 0
-        
+    scores = models.TenantRiskScore
+    
+    # One aggregate over the persisted scores
+    stats = db.query(
+        func.count(scores.user_id).label("total"),
+        func.count(scores.user_id).filter(scores.risk_level == 'High').label("high_risk"),
+        func.count(scores.user_id).filter(scores.risk_level == 'Medium').label("medium_risk"),
+        func.count(scores.user_id).filter(scores.risk_level == 'Low').label("low_risk"),
+        func.avg(scores.risk_score).label("avg_risk_score"),
+        func.avg(scores.retention_probability).label("avg_retention_prob"),
+        func.count(scores.user_id).filter(scores.will_retain.is_(False)).label("churn"),
+        func.max(scores.computed_at).label("computed_at"),
+    ).filter(scores.risk_score.isnot(None)).one()
+    
+    total = stats.total
+    if not total:
         return {
-            'total_tenants': total,
+            'message': 'No tenant data available for statistics',
+            'total_tenants': 0,
             'risk_distribution': {
-                'high_risk': {
-                    'count': high_risk,
-                    'percentage': round(high_risk / total * 100, 1) if total > 0 else 0
-                },
-                'medium_risk': {
-                    'count': medium_risk,
-                    'percentage': round(medium_risk / total * 100, 1) if total > 0 else 0
-                },
-                'low_risk': {
-                    'count': low_risk,
-                    'percentage': round(low_risk / total * 100, 1) if total > 0 else 0
-                }
+                'high_risk': {'count': 0, 'percentage': 0}, 
+                'medium_risk': {'count': 0, 'percentage': 0}, 
+                'low_risk': {'count': 0, 'percentage': 0}
             },
-            'averages': {
-                'risk_score': round(avg_risk_score, 2),
-                'retention_probability': round(avg_retention_prob, 4)
-            },
-            'predicted_to_churn': len([p for p in predictions if not p.get('will_retain', True)]),
-            'predicted_to_retain': len([p for p in predictions if p.get('will_retain', True)])
+            'averages': {'risk_score': 0, 'retention_probability': 0},
+            'predicted_to_churn': 0,
+            'predicted_to_retain': 0
         }
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()  # This will print the full error to your backend logs
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get retention statistics: {str(e)}"
-        )
\ No newline at end of file
+    
+    return {
+        'total_tenants': total,
+        'risk_distribution': {
+            'high_risk': {
+                'count': stats.high_risk,
+                'percentage': round(stats.high_risk / total * 100, 1)
+            },
+            'medium_risk': {
+                'count': stats.medium_risk,
+                'percentage': round(stats.medium_risk / total * 100, 1)
+            },
+            'low_risk': {
+                'count': stats.low_risk,
+                'percentage': round(stats.low_risk / total * 100, 1)
+            }
+        },
+        'averages': {
+            'risk_score': round(float(stats.avg_risk_score or 0), 2),
+            'retention_probability': round(float(stats.avg_retention_prob or 0), 4)
+        },
+        'predicted_to_churn': stats.churn,
+        'predicted_to_retain': total - stats.churn,
+        'computed_at': stats.computed_at
+    }
@@ -41,7 +41,7 @@ async def send_retention_alerts(
             features_for_prediction = {k: v for k, v in features.items() 
                                       if k not in ['user_id', 'retained']}
             
-            prediction = ml_service.predict_retention(features_for_prediction)
+            prediction = ml_service.predict_retention(features_for_prediction, observe=False)
             
             if prediction['risk_score'] >= risk_threshold:
                 # Send email in background
@@ -104,7 +104,7 @@ async def send_admin_summary(
             features_for_prediction = {k: v for k, v in features.items() 
                                       if k not in ['user_id', 'retained']}
             
-            prediction = ml_service.predict_retention(features_for_prediction)
+            prediction = ml_service.predict_retention(features_for_prediction, observe=False)
             
             if prediction['risk_level'] == 'high':
                 at_risk_tenants.append({
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.models import all_models as models
 from app.schemas import schemas_payment
 from app.core import security as auth
 from app.db.session import get_db
 from app.services.payment_service import PaymentService
+from app.services.payment_sync_service import PaymentSyncService
 from datetime import datetime
 import secrets
 import shutil
@@ -38,6 +39,61 @@ def get_all_payments(
         
     return payments
 
+# --- Owner Review Queue: pending receipts for the caller's properties ---
+@router.get("/review-queue", response_model=schemas_payment.ReviewQueuePage)
+def get_review_queue(
+    request: Request,
+    before_id: Optional[int] = Query(None, description="Cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN, models.UserRole.OWNER]))
+):
+    """Pending payments with receipts, newest first (keyset paginated by payment id)"""
+    query = db.query(
+        models.Payment.id.label("payment_id"),
+        models.Payment.booking_id,
+        models.Payment.amount,
+        models.Payment.payment_method,
+        models.Payment.receipt_url,
+        models.Payment.receipt_number,
+        models.Payment.created_at,
+        models.Booking.property_id,
+        models.Booking.start_date,
+        models.Booking.end_date,
+        models.Booking.user_id.label("tenant_id"),
+        models.Property.name.label("property_name"),
+        models.User.full_name.label("tenant_name"),
+    ).join(
+        models.Booking, models.Booking.id == models.Payment.booking_id
+    ).join(
+        models.Property, models.Property.id == models.Booking.property_id
+    ).join(
+        models.User, models.User.id == models.Booking.user_id
+    ).filter(
+        models.Payment.status == models.PaymentStatus.PENDING,
+        models.Payment.receipt_url.isnot(None),
+    )
+    
+    if current_user.role != models.UserRole.ADMIN:
+        query = query.filter(models.Property.owner_id == current_user.id)
+    if before_id is not None:
+        query = query.filter(models.Payment.id < before_id)
+    
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(models.Payment.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    base_url = str(request.base_url).rstrip("/")
+    items = []
+    for row in rows:
+        item = dict(row._mapping)
+        if item["receipt_url"] and not item["receipt_url"].startswith("http"):
+            item["receipt_url"] = f"{base_url}/{item['receipt_url']}"
+        items.append(item)
+    
+    return {"items": items, "next_cursor": rows[-1].payment_id if has_more else None}
+
 @router.get("/methods")
 def get_payment_methods():
     return PaymentService.get_payment_methods()
@@ -164,6 +220,18 @@ def confirm_payment(
     if not payment: 
         raise HTTPException(status_code=404, detail="Payment not found")
     
+    # Gateway-backed intents: ask Stripe instead of trusting the client
+    if payment.payment_intent_id and payment.payment_intent_id.startswith("pi_"):
+        result = PaymentService.confirm_payment(payment.payment_intent_id)
+        if not result['success']:
+            raise HTTPException(status_code=502, detail=f"Could not verify payment: {result.get('error')}")
+        if not result['is_paid']:
+            raise HTTPException(status_code=400, detail=f"Payment not completed (status: {result['status']})")
+        
+        PaymentSyncService.apply_payment_outcome(db, payment, models.PaymentStatus.COMPLETED)
+        db.commit()
+        return {'success': True, 'message': 'Payment confirmed', 'receipt_number': payment.receipt_number}
+    
     booking = db.query(models.Booking).filter(models.Booking.id == payment.booking_id).first()
     
     payment.status = models.PaymentStatus.COMPLETED
@@ -176,6 +244,20 @@ def confirm_payment(
     
     return {'success': True, 'message': 'Payment confirmed', 'receipt_number': payment.receipt_number}
 
+# --- Stripe Webhook (verify, store, ack; webhook_worker.py applies it) ---
+@router.post("/webhook")
+async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+    payload = await request.body()
+    
+    try:
+        event = PaymentService.construct_webhook_event(payload, request.headers.get("stripe-signature"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid webhook: {str(e)}")
+    
+    inserted = PaymentSyncService.ingest_event(db, event["id"], event["type"], payload.decode("utf-8"))
+    
+    return {"received": True, "duplicate": not inserted}
+
 # --- ✅ UPDATED: Review Endpoint ---
 @router.put("/{payment_id}/review")
 def review_payment(
@@ -1,74 +1,182 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func, extract, select, cast, literal, literal_column, and_, or_, false, DateTime
 from datetime import datetime, timedelta
 from typing import Optional
+import os
 from app.models import all_models as models
 from app.schemas import schemas_reports
 from app.core import security as auth
-from app.db.session import get_db
+from app.core.cache import TTLCache
+from app.services.export_service import ExportService
+from app.services.snapshot_service import SnapshotService
+from app.db.session import SessionLocal, get_db
 
 # This line was missing, causing the error:
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "10"))
+dashboard_cache = TTLCache(DASHBOARD_CACHE_TTL)
+
+# Revenue and booking counts come from the daily rollups
+# (app/services/rollup_service.py), so they cost one row per property-day
+# instead of one per booking/payment.
+DailyStats = models.DailyPropertyStats
+
+class _Window:
+    """
+    A [start_date, end_date] report window split into the whole days
+    between them, read from the rollups, and the partial days at either
+    end, read from the raw tables. Sums over both match the raw datetime
+    filters exactly, whatever time of day the window starts and ends.
+    """
+
+    def __init__(self, start_date: datetime, end_date: datetime):
+        self.start_date, self.end_date = start_date, end_date
+        first_midnight = datetime.combine(start_date.date(), datetime.min.time())
+        if first_midnight < start_date:
+            first_midnight += timedelta(days=1)
+        last_midnight = datetime.combine(end_date.date(), datetime.min.time())
+        # No whole day inside: the raw tables cover everything
+        self.whole_days = (first_midnight, last_midnight) if first_midnight < last_midnight else None
+
+    def rollup_filter(self):
+        """DailyStats rows of the whole days"""
+        if self.whole_days is None:
+            return false()
+        first_midnight, last_midnight = self.whole_days
+        return and_(DailyStats.day >= first_midnight.date(), DailyStats.day < last_midnight.date())
+
+    def edge_filter(self, column):
+        """Raw rows whose timestamp falls in the partial days"""
+        if self.whole_days is None:
+            return and_(column >= self.start_date, column <= self.end_date)
+        first_midnight, last_midnight = self.whole_days
+        return or_(
+            and_(column >= self.start_date, column < first_midnight),
+            and_(column >= last_midnight, column <= self.end_date),
+        )
+
+def _owned_property_ids(owner_id: int):
+    return select(models.Property.id).where(models.Property.owner_id == owner_id)
+
+def _owner_scope(current_user: models.User):
+    """Owners only see their own units; admins see everything"""
+    if current_user.role == models.UserRole.OWNER:
+        return [models.Property.owner_id == current_user.id]
+    return []
+
+def _property_scope(current_user: models.User, property_id_column):
+    """_owner_scope for tables keyed by property_id (bookings, rollups)"""
+    if current_user.role == models.UserRole.OWNER:
+        return [property_id_column.in_(_owned_property_ids(current_user.id))]
+    return []
+
+# date_trunc field -> bucket length
+GRANULARITY_STEPS = {
+    "day": "1 day",
+    "week": "1 week",
+    "month": "1 month",
+    "quarter": "3 months",
+}
+
+def _bucketed_rollups(db: Session, granularity: str, periods: int, end_date: datetime, sums: dict, filters: list = ()):
+    """
+    Sum rollup columns per date_trunc bucket for the `periods` buckets
+    ending with the one end_date falls in, oldest first. Every bucket is
+    returned; ones without rollup rows come back as 0.
+    
+    sums maps output name -> DailyStats column.
+    """
+    field = literal_column(f"'{granularity}'")
+    step = literal_column(f"interval '{GRANULARITY_STEPS[granularity]}'")
+    
+    last_bucket = func.date_trunc(field, literal(end_date, DateTime))
+    first_bucket = last_bucket - periods * step + step
+    
+    buckets = select(
+        func.generate_series(first_bucket, last_bucket, step).label("bucket")
+    ).subquery("buckets")
+    
+    bucket = func.date_trunc(field, cast(DailyStats.day, DateTime))
+    totals = select(
+        bucket.label("bucket"),
+        *[func.sum(column).label(name) for name, column in sums.items()],
+    ).where(
+        DailyStats.day >= first_bucket,
+        DailyStats.day <= end_date.date(),
+        *filters,
+    ).group_by(bucket).subquery("totals")
+    
+    return db.execute(
+        select(
+            buckets.c.bucket,
+            *[func.coalesce(totals.c[name], 0).label(name) for name in sums],
+        )
+        .outerjoin(totals, totals.c.bucket == buckets.c.bucket)
+        .order_by(buckets.c.bucket)
+    ).all()
+
+def _query_dashboard_stats(db: Session, owner_id: Optional[int] = None) -> dict:
+    """
+    All dashboard figures in a single round trip (conditional aggregates).
+    With owner_id every figure covers only that owner's units, and
+    total_users counts the tenants who booked them.
+    """
+    
+    # Get current month start
+    now = datetime.utcnow()
+    month_start = datetime(now.year, now.month, 1)
+    
+    property_filters, rollup_filters = [], []
+    if owner_id is not None:
+        property_filters = [models.Property.owner_id == owner_id]
+        rollup_filters = [DailyStats.property_id.in_(_owned_property_ids(owner_id))]
+    
+    property_stats = select(
+        func.count().label("total_properties"),
+        func.count().filter(models.Property.is_available == True).label("available_properties"),
+    ).select_from(models.Property).where(*property_filters).subquery()
+    
+    if owner_id is None:
+        user_stats = select(
+            func.count().label("total_users"),
+        ).select_from(models.User).subquery()
+    else:
+        user_stats = select(
+            func.count(func.distinct(models.Booking.user_id)).label("total_users"),
+        ).where(
+            models.Booking.property_id.in_(_owned_property_ids(owner_id))
+        ).subquery()
+    
+    rollup_stats = select(
+        func.coalesce(func.sum(DailyStats.bookings_created), 0).label("total_bookings"),
+        func.coalesce(func.sum(DailyStats.bookings_confirmed), 0).label("confirmed_bookings"),
+        func.coalesce(func.sum(DailyStats.bookings_pending), 0).label("pending_bookings"),
+        func.coalesce(
+            func.sum(DailyStats.bookings_created).filter(DailyStats.day >= month_start.date()), 0
+        ).label("bookings_this_month"),
+        func.coalesce(func.sum(DailyStats.revenue), 0.0).label("total_revenue"),
+        func.coalesce(
+            func.sum(DailyStats.revenue).filter(DailyStats.day >= month_start.date()), 0.0
+        ).label("revenue_this_month"),
+    ).where(*rollup_filters).subquery()
+    
+    row = db.execute(select(property_stats, user_stats, rollup_stats)).one()
+    return dict(row._mapping)
+
 @router.get("/dashboard", response_model=schemas_reports.DashboardStats)
 def get_dashboard_stats(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN, models.UserRole.OWNER]))
 ):
     """Get dashboard statistics (Admin/Owner only)"""
-    
-    # Get current month start
-    now = datetime.utcnow()
-    month_start = datetime(now.year, now.month, 1)
-    
-    # Total properties
-    total_properties = db.query(models.Property).count()
-    available_properties = db.query(models.Property).filter(
-        models.Property.is_available == True
-    ).count()
-    
-    # Total users
-    total_users = db.query(models.User).count()
-    
-    # Bookings
-    total_bookings = db.query(models.Booking).count()
-    confirmed_bookings = db.query(models.Booking).filter(
-        models.Booking.status == models.BookingStatus.CONFIRMED
-    ).count()
-    pending_bookings = db.query(models.Booking).filter(
-        models.Booking.status == models.BookingStatus.PENDING
-    ).count()
-    
-    # Revenue
-    total_revenue = db.query(
-        func.sum(models.Payment.amount)
-    ).filter(
-        models.Payment.status == models.PaymentStatus.COMPLETED
-    ).scalar() or 0.0
-    
-    revenue_this_month = db.query(
-        func.sum(models.Payment.amount)
-    ).filter(
-        models.Payment.status == models.PaymentStatus.COMPLETED,
-        models.Payment.paid_at >= month_start
-    ).scalar() or 0.0
-    
-    bookings_this_month = db.query(models.Booking).filter(
-        models.Booking.created_at >= month_start
-    ).count()
-    
-    return {
-        "total_properties": total_properties,
-        "available_properties": available_properties,
-        "total_users": total_users,
-        "total_bookings": total_bookings,
-        "confirmed_bookings": confirmed_bookings,
-        "pending_bookings": pending_bookings,
-        "total_revenue": total_revenue,
-        "revenue_this_month": revenue_this_month,
-        "bookings_this_month": bookings_this_month,
-    }
+    # Cached for a few seconds per scope; concurrent refreshes share one query
+    if current_user.role == models.UserRole.OWNER:
+        return dashboard_cache.get_or_compute(
+            ("dashboard", current_user.id), lambda: _query_dashboard_stats(db, owner_id=current_user.id)
+        )
+    return dashboard_cache.get_or_compute("dashboard", lambda: _query_dashboard_stats(db))
 
 @router.get("/revenue", response_model=schemas_reports.RevenueReport)
 def get_revenue_report(
@@ -85,31 +193,45 @@ def get_revenue_report(
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    # Query payments in period
-    total_revenue = db.query(
-        func.sum(models.Payment.amount)
+    # Whole days from the rollups (payments by paid_at day, bookings by
+    # created_at day), the partial first / last day from the raw tables
+    window = _Window(start_date, end_date)
+    totals = db.query(
+        func.coalesce(func.sum(DailyStats.revenue), 0.0).label("total_revenue"),
+        func.coalesce(func.sum(DailyStats.bookings_created), 0).label("total_bookings"),
+        func.coalesce(func.sum(DailyStats.bookings_confirmed), 0).label("confirmed_bookings"),
+        func.coalesce(func.sum(DailyStats.bookings_pending), 0).label("pending_bookings"),
+        func.coalesce(func.sum(DailyStats.bookings_cancelled), 0).label("cancelled_bookings"),
+    ).filter(
+        window.rollup_filter(),
+        *_property_scope(current_user, DailyStats.property_id)
+    ).one()
+    
+    edge_revenue = db.query(
+        func.coalesce(func.sum(models.Payment.amount), 0.0)
+    ).join(
+        models.Booking, models.Booking.id == models.Payment.booking_id
     ).filter(
         models.Payment.status == models.PaymentStatus.COMPLETED,
-        models.Payment.paid_at >= start_date,
-        models.Payment.paid_at <= end_date
-    ).scalar() or 0.0
-    
-    # Query bookings in period
-    bookings_query = db.query(models.Booking).filter(
-        models.Booking.created_at >= start_date,
-        models.Booking.created_at <= end_date
-    )
+        window.edge_filter(models.Payment.paid_at),
+        *_property_scope(current_user, models.Booking.property_id)
+    ).scalar()
+    
+    edge_bookings = db.query(
+        func.count(models.Booking.id).label("total_bookings"),
+        func.count(models.Booking.id).filter(models.Booking.status == models.BookingStatus.CONFIRMED).label("confirmed_bookings"),
+        func.count(models.Booking.id).filter(models.Booking.status == models.BookingStatus.PENDING).label("pending_bookings"),
+        func.count(models.Booking.id).filter(models.Booking.status == models.BookingStatus.CANCELLED).label("cancelled_bookings"),
+    ).filter(
+        window.edge_filter(models.Booking.created_at),
+        *_property_scope(current_user, models.Booking.property_id)
+    ).one()
     
-    total_bookings = bookings_query.count()
-    confirmed_bookings = bookings_query.filter(
-        models.Booking.status == models.BookingStatus.CONFIRMED
-    ).count()
-    pending_bookings = bookings_query.filter(
-        models.Booking.status == models.BookingStatus.PENDING
-    ).count()
-    cancelled_bookings = bookings_query.filter(
-        models.Booking.status == models.BookingStatus.CANCELLED
-    ).count()
+    total_revenue = float(totals.total_revenue) + float(edge_revenue)
+    total_bookings = int(totals.total_bookings) + edge_bookings.total_bookings
+    confirmed_bookings = int(totals.confirmed_bookings) + edge_bookings.confirmed_bookings
+    pending_bookings = int(totals.pending_bookings) + edge_bookings.pending_bookings
+    cancelled_bookings = int(totals.cancelled_bookings) + edge_bookings.cancelled_bookings
     
     average_booking_value = total_revenue / total_bookings if total_bookings > 0 else 0.0
     
@@ -124,10 +246,20 @@ def get_revenue_report(
         "period_end": end_date,
     }
 
+def _booked_days(start_date: datetime, end_date: datetime):
+    """
+    Whole days each occupying booking overlaps [start_date, end_date],
+    i.e. timedelta.days of (min(end) - max(start)), computed in SQL.
+    """
+    overlap = func.least(models.Booking.end_date, end_date) - func.greatest(models.Booking.start_date, start_date)
+    return func.floor(extract('epoch', overlap) / 86400)
+
 @router.get("/occupancy")
 def get_occupancy_report(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN, models.UserRole.OWNER]))
 ):
@@ -141,44 +273,69 @@ def get_occupancy_report(
     
     total_days = (end_date - start_date).days
     
-    properties = db.query(models.Property).all()
-    report = []
+    # Page of properties first, so the aggregates only touch that page
+    page = select(models.Property.id, models.Property.name).where(
+        *_owner_scope(current_user)
+    ).order_by(models.Property.id).offset(skip).limit(limit).subquery("page")
+    
+    # Revenue: whole days from the rollups, the partial first / last day raw
+    window = _Window(start_date, end_date)
+    rollup_revenue = select(
+        DailyStats.property_id,
+        func.sum(DailyStats.revenue).label("revenue"),
+    ).where(
+        DailyStats.property_id.in_(select(page.c.id)),
+        window.rollup_filter(),
+    ).group_by(DailyStats.property_id).subquery("rollup_revenue")
+    
+    edge_revenue = select(
+        models.Booking.property_id,
+        func.sum(models.Payment.amount).label("revenue"),
+    ).join(
+        models.Booking, models.Booking.id == models.Payment.booking_id
+    ).where(
+        models.Booking.property_id.in_(select(page.c.id)),
+        models.Payment.status == models.PaymentStatus.COMPLETED,
+        window.edge_filter(models.Payment.paid_at),
+    ).group_by(models.Booking.property_id).subquery("edge_revenue")
+    
+    # Booked days floor each booking's overlap separately, which whole-night
+    # rollups can't reproduce: summed per booking in SQL instead
+    booked = select(
+        models.Booking.property_id,
+        func.sum(_booked_days(start_date, end_date)).label("booked_days"),
+    ).where(
+        models.Booking.property_id.in_(select(page.c.id)),
+        models.Booking.status.in_([models.BookingStatus.CONFIRMED, models.BookingStatus.COMPLETED]),
+        models.Booking.start_date <= end_date,
+        models.Booking.end_date >= start_date,
+    ).group_by(models.Booking.property_id).subquery("booked")
+    
+    rows = db.execute(
+        select(
+            page.c.id,
+            page.c.name,
+            func.coalesce(booked.c.booked_days, 0).label("booked_days"),
+            (func.coalesce(rollup_revenue.c.revenue, 0.0) + func.coalesce(edge_revenue.c.revenue, 0.0)).label("revenue"),
+        )
+        .outerjoin(booked, booked.c.property_id == page.c.id)
+        .outerjoin(rollup_revenue, rollup_revenue.c.property_id == page.c.id)
+        .outerjoin(edge_revenue, edge_revenue.c.property_id == page.c.id)
+        .order_by(page.c.id)
+    ).all()
     
-    for property in properties:
-        # Get bookings for this property in the period
-        bookings = db.query(models.Booking).filter(
-            models.Booking.property_id == property.id,
-            models.Booking.status.in_([models.BookingStatus.CONFIRMED, models.BookingStatus.COMPLETED]),
-            models.Booking.start_date <= end_date,
-            models.Booking.end_date >= start_date
-        ).all()
-        
-        # Calculate booked days
-        booked_days = 0
-        for booking in bookings:
-            overlap_start = max(booking.start_date, start_date)
-            overlap_end = min(booking.end_date, end_date)
-            booked_days += (overlap_end - overlap_start).days
-        
-        # Calculate revenue
-        revenue = db.query(
-            func.sum(models.Payment.amount)
-        ).join(models.Booking).filter(
-            models.Booking.property_id == property.id,
-            models.Payment.status == models.PaymentStatus.COMPLETED,
-            models.Payment.paid_at >= start_date,
-            models.Payment.paid_at <= end_date
-        ).scalar() or 0.0
-        
+    report = []
+    for row in rows:
+        booked_days = int(row.booked_days)
         occupancy_rate = (booked_days / total_days * 100) if total_days > 0 else 0.0
         
         report.append({
-            "property_id": property.id,
-            "property_name": property.name,
+            "property_id": row.id,
+            "property_name": row.name,
             "total_days_in_period": total_days,
             "booked_days": booked_days,
             "occupancy_rate": round(occupancy_rate, 2),
-            "revenue": revenue,
+            "revenue": float(row.revenue),
         })
     
     return report
@@ -191,15 +348,11 @@ def get_monthly_revenue(
 ):
     """Get monthly revenue for the last N months"""
     
-    results = db.query(
-        extract('year', models.Payment.paid_at).label('year'),
-        extract('month', models.Payment.paid_at).label('month'),
-        func.sum(models.Payment.amount).label('revenue'),
-        func.count(models.Payment.id).label('bookings')
-    ).filter(
-        models.Payment.status == models.PaymentStatus.COMPLETED,
-        models.Payment.paid_at.isnot(None)
-    ).group_by('year', 'month').order_by('year', 'month').all()
+    # Last N calendar months including this one; empty months are 0
+    results = _bucketed_rollups(db, "month", months, datetime.utcnow(), {
+        "revenue": DailyStats.revenue,
+        "bookings": DailyStats.payments_completed,
+    }, _property_scope(current_user, DailyStats.property_id))
     
     # Format results
     month_names = [
@@ -208,83 +361,193 @@ def get_monthly_revenue(
     ]
     
     formatted_results = []
-    for result in results[-months:]:  # Get last N months
+    for result in results:
         formatted_results.append({
-            "month": month_names[int(result.month) - 1],
-            "year": int(result.year),
+            "month": month_names[result.bucket.month - 1],
+            "year": result.bucket.year,
             "revenue": float(result.revenue),
-            "bookings": result.bookings,
+            "bookings": int(result.bookings),
         })
     
     return formatted_results
 
+# metric -> rollup column. Booking metrics are bucketed by booking creation
+# day; a booking counts as cancelled if its current status is CANCELLED, not
+# on the day it was cancelled (bookings keep no cancellation timestamp).
+TIMESERIES_METRICS = {
+    "revenue": DailyStats.revenue,
+    "bookings": DailyStats.bookings_created,
+    "cancelled_bookings_by_created": DailyStats.bookings_cancelled,
+}
+
+@router.get("/timeseries", response_model=schemas_reports.TimeSeriesReport)
+def get_timeseries(
+    metric: str = Query(
+        "revenue",
+        regex="^(revenue|bookings|cancelled_bookings_by_created)$",
+        description=(
+            "revenue: completed payments by payment day. bookings: bookings by creation day. "
+            "cancelled_bookings_by_created: bookings created in the bucket that are now cancelled"
+        ),
+    ),
+    granularity: str = Query("month", regex="^(day|week|month|quarter)$"),
+    periods: int = Query(12, ge=1, le=366, description="Number of buckets ending with the current one"),
+    end_date: Optional[datetime] = Query(None),
+    property_id: Optional[int] = Query(None),
+    owner_id: Optional[int] = Query(None, description="Admin only; owners always see their own units"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN, models.UserRole.OWNER]))
+):
+    """
+    Get a gap-filled time series of one metric (Admin/Owner only).
+
+    cancelled_bookings_by_created counts bookings created in each bucket whose
+    status is now CANCELLED, so recent buckets can still grow as bookings are
+    cancelled. It is not a count of cancellations made in the bucket.
+    """
+    
+    if not end_date:
+        end_date = datetime.utcnow()
+    if current_user.role == models.UserRole.OWNER:
+        owner_id = current_user.id
+    
+    filters = []
+    if property_id is not None:
+        filters.append(DailyStats.property_id == property_id)
+    if owner_id is not None:
+        filters.append(DailyStats.property_id.in_(_owned_property_ids(owner_id)))
+    
+    rows = _bucketed_rollups(db, granularity, periods, end_date, {"value": TIMESERIES_METRICS[metric]}, filters)
+    
+    return {
+        "metric": metric,
+        "granularity": granularity,
+        "points": [{"period_start": row.bucket, "value": float(row.value)} for row in rows],
+    }
+
 @router.get("/property-performance")
 def get_property_performance(
+    days: int = Query(90, ge=1, le=3650, description="Occupancy window ending now"),
+    sort_by: str = Query("total_revenue", regex="^(total_revenue|total_bookings|occupancy_rate)$"),
+    order: str = Query("desc", regex="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Top-N properties"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN, models.UserRole.OWNER]))
 ):
     """Get performance metrics for all properties"""
     
-    properties = db.query(models.Property).all()
-    performance = []
-    
-    for property in properties:
-        # Total bookings
-        total_bookings = db.query(models.Booking).filter(
-            models.Booking.property_id == property.id
-        ).count()
-        
-        # Total revenue
-        total_revenue = db.query(
-            func.sum(models.Payment.amount)
-        ).join(models.Booking).filter(
-            models.Booking.property_id == property.id,
-            models.Payment.status == models.PaymentStatus.COMPLETED
-        ).scalar() or 0.0
-        
-        # Occupancy rate (last 90 days)
-        ninety_days_ago = datetime.utcnow() - timedelta(days=90)
-        booked_days = 0
-        
-        bookings = db.query(models.Booking).filter(
-            models.Booking.property_id == property.id,
-            models.Booking.status.in_([models.BookingStatus.CONFIRMED, models.BookingStatus.COMPLETED]),
-            models.Booking.start_date <= datetime.utcnow(),
-            models.Booking.end_date >= ninety_days_ago
-        ).all()
-        
-        for booking in bookings:
-            overlap_start = max(booking.start_date, ninety_days_ago)
-            overlap_end = min(booking.end_date, datetime.utcnow())
-            booked_days += (overlap_end - overlap_start).days
-        
-        occupancy_rate = (booked_days / 90 * 100)
-        
-        performance.append({
-            "property_id": property.id,
-            "property_name": property.name,
-            "total_bookings": total_bookings,
-            "total_revenue": total_revenue,
-            # Feedback references removed here
-            "occupancy_rate": round(occupancy_rate, 2),
-        })
-    
-    # Sort by revenue
-    performance.sort(key=lambda x: x['total_revenue'], reverse=True)
+    now = datetime.utcnow()
+    window_start = now - timedelta(days=days)
+    
+    # Owners: every aggregate only walks their units' bookings
+    scope = _property_scope(current_user, models.Booking.property_id)
+    
+    booking_counts = select(
+        models.Booking.property_id,
+        func.count().label("total_bookings"),
+    ).where(*scope).group_by(models.Booking.property_id).subquery("booking_counts")
+    
+    revenue = select(
+        models.Booking.property_id,
+        func.sum(models.Payment.amount).label("total_revenue"),
+    ).join(
+        models.Booking, models.Booking.id == models.Payment.booking_id
+    ).where(
+        models.Payment.status == models.PaymentStatus.COMPLETED,
+        *scope,
+    ).group_by(models.Booking.property_id).subquery("revenue")
+    
+    booked = select(
+        models.Booking.property_id,
+        func.sum(_booked_days(window_start, now)).label("booked_days"),
+    ).where(
+        models.Booking.status.in_([models.BookingStatus.CONFIRMED, models.BookingStatus.COMPLETED]),
+        models.Booking.start_date <= now,
+        models.Booking.end_date >= window_start,
+        *scope,
+    ).group_by(models.Booking.property_id).subquery("booked")
+    
+    columns = {
+        "total_bookings": func.coalesce(booking_counts.c.total_bookings, 0),
+        "total_revenue": func.coalesce(revenue.c.total_revenue, 0.0),
+        # Same ordering as occupancy_rate: the window length is constant
+        "occupancy_rate": func.coalesce(booked.c.booked_days, 0),
+    }
+    sort_column = columns[sort_by].desc() if order == "desc" else columns[sort_by].asc()
+    
+    rows = db.execute(
+        select(
+            models.Property.id,
+            models.Property.name,
+            columns["total_bookings"].label("total_bookings"),
+            columns["total_revenue"].label("total_revenue"),
+            columns["occupancy_rate"].label("booked_days"),
+        )
+        .outerjoin(booking_counts, booking_counts.c.property_id == models.Property.id)
+        .outerjoin(revenue, revenue.c.property_id == models.Property.id)
+        .outerjoin(booked, booked.c.property_id == models.Property.id)
+        .where(*_owner_scope(current_user))
+        .order_by(sort_column, models.Property.id)
+        .limit(limit)
+    ).all()
     
-    return performance
+    return [
+        {
+            "property_id": row.id,
+            "property_name": row.name,
+            "total_bookings": row.total_bookings,
+            "total_revenue": float(row.total_revenue),
+            "occupancy_rate": round(int(row.booked_days) / days * 100, 2),
+        }
+        for row in rows
+    ]
+
+# (key, CSV header, column) for each export
+REVENUE_EXPORT_COLUMNS = [
+    ("payment_id", "Payment ID", models.Payment.id),
+    ("booking_id", "Booking ID", models.Payment.booking_id),
+    ("amount", "Amount", models.Payment.amount),
+    ("payment_method", "Payment Method", models.Payment.payment_method),
+    ("transaction_id", "Transaction ID", func.coalesce(models.Payment.transaction_id, 'N/A')),
+    ("paid_at", "Paid At", models.Payment.paid_at),
+    ("receipt_number", "Receipt Number", func.coalesce(models.Payment.receipt_number, 'N/A')),
+]
+
+BOOKING_EXPORT_COLUMNS = [
+    ("booking_id", "Booking ID", models.Booking.id),
+    ("tenant_id", "Tenant ID", models.Booking.user_id),
+    ("tenant_username", "Tenant", models.User.username),
+    ("property_id", "Property ID", models.Booking.property_id),
+    ("property_name", "Property", models.Property.name),
+    ("start_date", "Start Date", models.Booking.start_date),
+    ("end_date", "End Date", models.Booking.end_date),
+    ("total_amount", "Total Amount", models.Booking.total_amount),
+    ("status", "Status", models.Booking.status),
+    ("created_at", "Created At", models.Booking.created_at),
+]
+
+PAYMENT_EXPORT_COLUMNS = [
+    ("payment_id", "Payment ID", models.Payment.id),
+    ("booking_id", "Booking ID", models.Payment.booking_id),
+    ("amount", "Amount", models.Payment.amount),
+    ("payment_method", "Payment Method", models.Payment.payment_method),
+    ("status", "Status", models.Payment.status),
+    ("transaction_id", "Transaction ID", models.Payment.transaction_id),
+    ("payment_intent_id", "Payment Intent ID", models.Payment.payment_intent_id),
+    ("receipt_number", "Receipt Number", models.Payment.receipt_number),
+    ("paid_at", "Paid At", models.Payment.paid_at),
+    ("created_at", "Created At", models.Payment.created_at),
+]
 
 @router.get("/export/revenue")
 def export_revenue_report(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db),
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    compress: bool = Query(False, alias="gzip"),
     current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
 ):
-    """Export revenue report as CSV"""
-    from fastapi.responses import StreamingResponse
-    import io
-    import csv
+    """Export completed payments in a period as CSV or NDJSON (streamed)"""
     
     # Default to last 30 days
     if not end_date:
@@ -292,38 +555,105 @@ def export_revenue_report(
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    # Query payments
-    payments = db.query(models.Payment).join(models.Booking).filter(
+    statement = ExportService.select(REVENUE_EXPORT_COLUMNS).join(
+        models.Booking, models.Booking.id == models.Payment.booking_id
+    ).where(
         models.Payment.status == models.PaymentStatus.COMPLETED,
         models.Payment.paid_at >= start_date,
         models.Payment.paid_at <= end_date
-    ).all()
+    ).order_by(models.Payment.paid_at, models.Payment.id)
     
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        'Payment ID', 'Booking ID', 'Amount', 'Payment Method',
-        'Transaction ID', 'Paid At', 'Receipt Number'
-    ])
-    
-    for payment in payments:
-        writer.writerow([
-            payment.id,
-            payment.booking_id,
-            payment.amount,
-            payment.payment_method,
-            payment.transaction_id or 'N/A',
-            payment.paid_at.strftime('%Y-%m-%d %H:%M:%S'),
-            payment.receipt_number or 'N/A',
-        ])
-    
-    output.seek(0)
-    
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=revenue_report_{start_date.date()}_to_{end_date.date()}.csv"
-        }
-    )
\ No newline at end of file
+    return ExportService.response(
+        statement, REVENUE_EXPORT_COLUMNS,
+        f"revenue_report_{start_date.date()}_to_{end_date.date()}", format, compress
+    )
+
+@router.get("/export/bookings")
+def export_bookings(
+    start_date: Optional[datetime] = Query(None, description="Created on or after"),
+    end_date: Optional[datetime] = Query(None, description="Created on or before"),
+    status: Optional[models.BookingStatus] = Query(None),
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    compress: bool = Query(False, alias="gzip"),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """Export bookings as CSV or NDJSON (streamed)"""
+    
+    statement = ExportService.select(BOOKING_EXPORT_COLUMNS).select_from(models.Booking).outerjoin(
+        models.User, models.User.id == models.Booking.user_id
+    ).outerjoin(
+        models.Property, models.Property.id == models.Booking.property_id
+    )
+    
+    if start_date:
+        statement = statement.where(models.Booking.created_at >= start_date)
+    if end_date:
+        statement = statement.where(models.Booking.created_at <= end_date)
+    if status:
+        statement = statement.where(models.Booking.status == status)
+    
+    return ExportService.response(
+        statement.order_by(models.Booking.id), BOOKING_EXPORT_COLUMNS, "bookings", format, compress
+    )
+
+@router.get("/export/payments")
+def export_payments(
+    start_date: Optional[datetime] = Query(None, description="Created on or after"),
+    end_date: Optional[datetime] = Query(None, description="Created on or before"),
+    status: Optional[models.PaymentStatus] = Query(None),
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    compress: bool = Query(False, alias="gzip"),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """Export payments of any status as CSV or NDJSON (streamed)"""
+    
+    statement = ExportService.select(PAYMENT_EXPORT_COLUMNS)
+    
+    if start_date:
+        statement = statement.where(models.Payment.created_at >= start_date)
+    if end_date:
+        statement = statement.where(models.Payment.created_at <= end_date)
+    if status:
+        statement = statement.where(models.Payment.status == status)
+    
+    return ExportService.response(
+        statement.order_by(models.Payment.id), PAYMENT_EXPORT_COLUMNS, "payments", format, compress
+    )
+
+def _run_snapshot(mode: str):
+    db = SessionLocal()
+    try:
+        SnapshotService.run(db, mode)
+    except Exception as e:
+        print(f"❌ Analytics snapshot failed: {str(e)}")
+    finally:
+        db.close()
+
+@router.post("/snapshots", status_code=202)
+def start_snapshot(
+    background_tasks: BackgroundTasks,
+    mode: str = Query("incremental", regex="^(full|incremental)$"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """Start a Parquet analytics snapshot in the background (Admin only)"""
+    if SnapshotService.is_running(db):
+        raise HTTPException(status_code=409, detail="A snapshot is already running")
+    
+    background_tasks.add_task(_run_snapshot, mode)
+    return {"message": "Snapshot started", "mode": mode}
+
+@router.get("/snapshots/status")
+def get_snapshot_status(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """Status of the latest analytics snapshot run (Admin only)"""
+    return SnapshotService.get_status(db)
+
+@router.get("/snapshots/manifest")
+def get_snapshot_manifest(
+    current_user: models.User = Depends(auth.require_role([models.UserRole.ADMIN]))
+):
+    """Parquet files written by every completed snapshot run (Admin only)"""
+    return SnapshotService.get_manifest()
@@ -0,0 +1,63 @@
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class TTLCache:
+    """
+    Small per-process result cache with request coalescing.
+
+    When an entry is missing or expired, the first caller computes it and
+    every concurrent caller for the same key waits for that result instead
+    of running the same query again. Sync route handlers run in a thread
+    pool, so a threading.Event is enough here.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+
+        if not leader:
+            in_flight.event.wait()
+            if in_flight.error:
+                raise in_flight.error
+            return in_flight.value
+
+        try:
+            in_flight.value = compute()
+            with self._lock:
+                self._entries[key] = (in_flight.value, time.monotonic() + self.ttl_seconds)
+            return in_flight.value
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.event.set()
+
+    def invalidate(self, key: Hashable = None):
+        """Drop one key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import JSON, Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Enum, Index, event, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -43,6 +43,7 @@ class User(Base):
     role = Column(Enum(UserRole), default=UserRole.TENANT)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     bookings = relationship("Booking", back_populates="user")
     feedbacks = relationship("Feedback", back_populates="user")
@@ -79,9 +80,17 @@ class Property(Base):
     gcash_qr_image_url = Column(String, nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     bookings = relationship("Booking", back_populates="property")
     owner = relationship("User")
+    
+    # Hot-path indexes - keep in sync with migrations/versions (0002, 0006)
+    __table_args__ = (
+        # owner-scoped reports: the owner's unit ids (and availability) from the index alone
+        Index("ix_properties_owner_portfolio", "owner_id", "id", "is_available"),
+        Index("ix_properties_status", "status"),
+    )
 
 # --- BOOKINGS TABLE ---
 class Booking(Base):
@@ -95,10 +104,29 @@ class Booking(Base):
     total_amount = Column(Float, nullable=False)
     status = Column(Enum(BookingStatus), default=BookingStatus.PENDING)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     user = relationship("User", back_populates="bookings")
     property = relationship("Property", back_populates="bookings")
     payments = relationship("Payment", back_populates="booking")
+    
+    __table_args__ = (
+        # check_availability / occupied dates: only blocking bookings
+        Index("ix_bookings_property_active", "property_id", "start_date", "end_date",
+              postgresql_where=text("status IN ('PENDING', 'CONFIRMED')")),
+        # occupancy / performance reports: only occupying bookings
+        Index("ix_bookings_property_occupied", "property_id", "start_date", "end_date",
+              postgresql_where=text("status IN ('CONFIRMED', 'COMPLETED')")),
+        # owner-bookings (join on property, newest first)
+        Index("ix_bookings_property_created", "property_id", "created_at"),
+        # my-bookings and the ML "last booking per tenant" lookup
+        Index("ix_bookings_user_created", "user_id", "created_at"),
+        # dashboard / revenue report status counts over a created_at window
+        Index("ix_bookings_status_created", "status", "created_at"),
+        Index("ix_bookings_created_at", "created_at"),
+        # incremental analytics snapshots
+        Index("ix_bookings_updated_at", "updated_at"),
+    )
 
 # --- PAYMENTS TABLE ---
 class Payment(Base):
@@ -113,11 +141,28 @@ class Payment(Base):
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
     paid_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     receipt_url = Column(String)
     receipt_number = Column(String)
     payment_metadata = Column(Text)
     
     booking = relationship("Booking", back_populates="payments")
+    
+    __table_args__ = (
+        Index("ix_payments_booking_id", "booking_id"),
+        # per-property revenue: completed amounts by booking, index-only
+        Index("ix_payments_booking_completed", "booking_id", postgresql_include=["amount"],
+              postgresql_where=text("status = 'COMPLETED'")),
+        # Revenue reports only ever sum completed payments by paid_at
+        Index("ix_payments_completed_paid_at", "paid_at",
+              postgresql_where=text("status = 'COMPLETED'")),
+        Index("ix_payments_created_at", "created_at"),
+        # Owner review queue and reconciliation walk pending payments by id
+        Index("ix_payments_pending", "id", "booking_id",
+              postgresql_where=text("status = 'PENDING'")),
+        # incremental analytics snapshots
+        Index("ix_payments_updated_at", "updated_at"),
+    )
 
 # --- FEEDBACKS TABLE ---
 class Feedback(Base):
@@ -156,4 +201,105 @@ class AuditLog(Base):
     log_metadata = Column("metadata", JSON)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+# --- STRIPE WEBHOOK INBOX ---
+class WebhookEventStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+    IGNORED = "ignored"
+    FAILED = "failed"
+
+class StripeWebhookEvent(Base):
+    __tablename__ = "stripe_webhook_events"
+    
+    # Stripe event id (evt_...) - redelivered events collide here and are dropped
+    id = Column(String, primary_key=True)
+    type = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(Enum(WebhookEventStatus), default=WebhookEventStatus.PENDING, index=True)
+    attempts = Column(Integer, default=0)
+    last_error = Column(String)
+    # Backoff after a failed attempt; NULL = due now
+    next_attempt_at = Column(DateTime)
+    received_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime)
+
+# --- BACKGROUND JOB STATE (watermarks for resumable jobs) ---
+class JobState(Base):
+    __tablename__ = "job_states"
+    
+    name = Column(String, primary_key=True)
+    watermark = Column(String)
+    details = Column(JSON)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# --- DAILY REPORT ROLLUPS (maintained by app/services/rollup_service.py) ---
+class DailyPropertyStats(Base):
+    __tablename__ = "daily_property_stats"
+    
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    # Completed payments, by paid_at day
+    revenue = Column(Float, nullable=False, default=0.0, server_default="0")
+    payments_completed = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bookings by created_at day, split by their current status
+    bookings_created = Column(Integer, nullable=False, default=0, server_default="0")
+    bookings_pending = Column(Integer, nullable=False, default=0, server_default="0")
+    bookings_confirmed = Column(Integer, nullable=False, default=0, server_default="0")
+    bookings_cancelled = Column(Integer, nullable=False, default=0, server_default="0")
+    bookings_completed = Column(Integer, nullable=False, default=0, server_default="0")
+    bookings_rejected = Column(Integer, nullable=False, default=0, server_default="0")
+    bookings_declined = Column(Integer, nullable=False, default=0, server_default="0")
+    # Confirmed/completed bookings occupying the night starting on this day
+    occupied_nights = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    __table_args__ = (
+        # Cross-property windows (dashboard, revenue report)
+        Index("ix_daily_property_stats_day", "day"),
+    )
+
+# --- TENANT RISK SCORES (maintained by app/services/risk_score_service.py) ---
+class TenantRiskScore(Base):
+    __tablename__ = "tenant_risk_scores"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # NULL until the tenant is first scored (rows can start out as stale markers)
+    risk_score = Column(Integer)
+    risk_level = Column(String)
+    will_retain = Column(Boolean)
+    churn_probability = Column(Float)
+    retention_probability = Column(Float)
+    recommendation = Column(String)
+    # Top per-feature contributions to the score (ExplanationService.key_factors)
+    key_factors = Column(JSON)
+    model_version = Column(String)
+    computed_at = Column(DateTime)
+    # Set when the tenant's bookings change; cleared by the next refresh
+    is_stale = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    # Bumped by every stale mark, so a refresh only clears marks it has seen
+    stale_version = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    __table_args__ = (
+        # at-risk-tenants threshold scans, highest risk first
+        Index("ix_tenant_risk_scores_score", "risk_score"),
+        # predict-all risk level filter
+        Index("ix_tenant_risk_scores_level_score", "risk_level", "risk_score"),
+        # the refresher's stale queue
+        Index("ix_tenant_risk_scores_stale", "user_id", postgresql_where=text("is_stale")),
+    )
+
+# --- ORM FLUSH LISTENERS ---
+def _load_previous(target, value, oldvalue, initiator):
+    pass
+
+def track_previous(attribute):
+    """
+    Load an attribute's old value on assignment even if it was expired, so
+    flush listeners can always tell what a change replaced.
+    """
+    event.listen(attribute, "set", _load_previous, active_history=True)
+
+# Registered here, with the models, so no ORM write to bookings or payments
+# can skip them: report rollups and stale risk-score marks stay in step.
+from app.services import rollup_service, risk_score_service  # noqa: E402,F401
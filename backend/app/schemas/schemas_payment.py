@@ -1,6 +1,6 @@
 from pydantic import BaseModel, validator
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 from app.models.all_models import PaymentStatus
 
 class PaymentCreate(BaseModel):
@@ -41,4 +41,24 @@ class PaymentResponse(BaseModel):
 class RefundRequest(BaseModel):
     payment_id: int
     amount: Optional[float] = None
-    reason: Optional[str] = None
\ No newline at end of file
+    reason: Optional[str] = None
+
+class ReviewQueueItem(BaseModel):
+    payment_id: int
+    booking_id: int
+    property_id: int
+    property_name: str
+    tenant_id: int
+    tenant_name: Optional[str]
+    amount: float
+    payment_method: Optional[str]
+    receipt_url: Optional[str]
+    receipt_number: Optional[str]
+    start_date: datetime
+    end_date: datetime
+    created_at: datetime
+
+class ReviewQueuePage(BaseModel):
+    items: List[ReviewQueueItem]
+    # Pass as before_id to get the next page; None when there are no more
+    next_cursor: Optional[int]
@@ -26,6 +26,15 @@ class MonthlyRevenueData(BaseModel):
     revenue: float
     bookings: int
 
+class TimeSeriesPoint(BaseModel):
+    period_start: datetime
+    value: float
+
+class TimeSeriesReport(BaseModel):
+    metric: str
+    granularity: str
+    points: List[TimeSeriesPoint]
+
 class PropertyPerformance(BaseModel):
     property_id: int
     property_name: str
@@ -0,0 +1,133 @@
+"""
+Compiled retention models for low-latency single-row scoring.
+
+A fitted RandomForestClassifier or binary LogisticRegression (optionally
+behind a StandardScaler) is flattened into plain NumPy arrays and saved
+as compiled.npz; CompiledModel scores feature vectors from those arrays
+with no pandas, sklearn or pickle involved.
+
+Forest layout: the nodes of every tree are concatenated into one set of
+arrays (feature, threshold, left, right, value), roots holds each tree's
+first node, and leaves point to themselves so every tree can be walked
+max_depth steps in lockstep. value rows are class probabilities.
+
+Parity with sklearn: trees compare the input cast to float32 against
+float64 thresholds, exactly as sklearn's tree code does.
+"""
+
+import numpy as np
+
+COMPILED_FILE = "compiled.npz"
+
+class CompiledModel:
+    """Array-only evaluator for an exported forest or logistic regression"""
+
+    def __init__(self, arrays: dict):
+        self.arrays = arrays
+        self.kind = str(arrays["kind"])
+        self.classes = arrays["classes"]
+        self.scale_mean = arrays.get("scale_mean")
+        self.scale_scale = arrays.get("scale_scale")
+
+        if self.kind == "forest":
+            self.feature = arrays["feature"]
+            self.threshold = arrays["threshold"]
+            self.left = arrays["left"]
+            self.right = arrays["right"]
+            self.value = arrays["value"]
+            self.roots = arrays["roots"]
+            self.depth = int(arrays["depth"])
+        elif self.kind == "logistic":
+            self.coef = arrays["coef"]
+            self.intercept = float(arrays["intercept"])
+        else:
+            raise ValueError(f"Unknown compiled model kind: {self.kind}")
+
+    @staticmethod
+    def export(model, scaler=None) -> "CompiledModel":
+        """Flatten a fitted RandomForestClassifier or binary LogisticRegression"""
+        arrays = {"classes": np.asarray(model.classes_)}
+        if scaler is not None:
+            arrays["scale_mean"] = np.asarray(scaler.mean_, dtype=np.float64)
+            arrays["scale_scale"] = np.asarray(scaler.scale_, dtype=np.float64)
+
+        if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+            features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+            offset, depth = 0, 0
+            for estimator in model.estimators_:
+                tree = estimator.tree_
+                nodes = np.arange(tree.node_count)
+                leaf = tree.children_left == -1
+
+                features.append(np.where(leaf, 0, tree.feature))
+                thresholds.append(np.where(leaf, 0.0, tree.threshold))
+                lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+                rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+
+                # Same normalization as DecisionTreeClassifier.predict_proba
+                value = tree.value[:, 0, :len(model.classes_)].astype(np.float64)
+                totals = value.sum(axis=1, keepdims=True)
+                totals[totals == 0.0] = 1.0
+                values.append(value / totals)
+
+                roots.append(offset)
+                offset += tree.node_count
+                depth = max(depth, tree.max_depth)
+
+            arrays.update(
+                kind=np.array("forest"),
+                feature=np.concatenate(features).astype(np.intp),
+                threshold=np.concatenate(thresholds).astype(np.float64),
+                left=np.concatenate(lefts).astype(np.intp),
+                right=np.concatenate(rights).astype(np.intp),
+                value=np.concatenate(values),
+                roots=np.asarray(roots, dtype=np.intp),
+                depth=np.array(depth),
+            )
+        elif hasattr(model, "coef_") and model.coef_.shape[0] == 1:
+            arrays.update(
+                kind=np.array("logistic"),
+                coef=np.asarray(model.coef_[0], dtype=np.float64),
+                intercept=np.array(float(model.intercept_[0])),
+            )
+        else:
+            raise ValueError(f"Cannot compile {type(model).__name__}: only random forests and binary logistic regression")
+
+        return CompiledModel(arrays)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            np.savez(f, **self.arrays)
+
+    @staticmethod
+    def load(path: str) -> "CompiledModel":
+        with np.load(path, allow_pickle=False) as data:
+            return CompiledModel({name: data[name] for name in data.files})
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities for one feature vector (returns shape
+        (n_classes,)) or a 2-D array of them (returns (n_rows, n_classes)),
+        in model input order.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        single = X.ndim == 1
+        if single:
+            X = X[np.newaxis, :]
+
+        if self.scale_mean is not None:
+            X = (X - self.scale_mean) / self.scale_scale
+
+        if self.kind == "forest":
+            X32 = X.astype(np.float32)
+            rows = np.arange(X.shape[0])[:, np.newaxis]
+            nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+            for _ in range(self.depth):
+                go_left = X32[rows, self.feature[nodes]] <= self.threshold[nodes]
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            proba = self.value[nodes].sum(axis=1) / len(self.roots)
+        else:
+            churn = 1.0 / (1.0 + np.exp(-(X @ self.coef + self.intercept)))
+            proba = np.column_stack([1.0 - churn, churn])
+
+        return proba[0] if single else proba
@@ -0,0 +1,341 @@
+"""
+Feature distribution drift between a model's training data and live data.
+
+A profile records, per feature, quantile bin edges over the reference
+data and the share of rows in each bin. It is plain JSON so it can live in
+a registry manifest. The population stability index compares the share of
+live rows in the same bins:
+
+    PSI = sum((live - reference) * ln(live / reference))
+
+Rule of thumb: < 0.1 stable, 0.1 - 0.2 moderate shift, > 0.2 significant.
+The binned KS statistic is the largest gap between the two cumulative
+shares at the bin edges (a lower bound of the exact two-sample KS).
+
+DriftMonitor does this continuously for the rows a process scores: one
+FeatureStream per feature holds bin counts over the reference edges plus
+running mean / variance / min / max, so memory stays fixed however many
+predictions go through. A background thread scores the rows seen since
+the last check every DRIFT_CHECK_SECONDS and flags features over the
+thresholds.
+
+The reference comes from the active version's manifest
+(metadata.reference_profile, stored by the trainers and register_model.py),
+else from the legacy model's reference_profile.json, else from the
+training CSV. Only the CSV costs anything to build; that happens on the
+monitor thread, never on a prediction.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+PROFILE_BINS = 10
+PSI_DRIFT_THRESHOLD = float(os.getenv("PSI_DRIFT_THRESHOLD", "0.2"))
+KS_DRIFT_THRESHOLD = float(os.getenv("KS_DRIFT_THRESHOLD", "0.1"))
+
+DRIFT_MONITOR_ENABLED = os.getenv("ML_DRIFT_MONITOR", "1") == "1"
+DRIFT_CHECK_SECONDS = float(os.getenv("ML_DRIFT_CHECK_SECONDS", "300"))
+# Fewer rows than this in a window are carried over to the next check
+DRIFT_MIN_SAMPLES = int(os.getenv("ML_DRIFT_MIN_SAMPLES", "200"))
+# Reference when the active version's manifest has no reference_profile
+TRAINING_DATA_PATH = os.getenv("ML_TRAINING_DATA", os.path.join("data", "retention_training_data.csv"))
+# Single-row predictions are buffered and folded in this many at a time
+ROW_BUFFER_SIZE = 64
+
+# Empty bins would make the log blow up
+_MIN_SHARE = 1e-4
+
+# DriftMonitor's version before anything was observed
+_UNSET = object()
+
+def _bin_shares(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+    return counts / max(len(values), 1)
+
+class DriftService:
+    @staticmethod
+    def profile(X: pd.DataFrame, bins: int = PROFILE_BINS) -> dict:
+        """{feature: {"edges": [...], "shares": [...]}} of numeric features"""
+        profile = {}
+        for column in X.columns:
+            values = X[column].to_numpy(dtype=np.float64)
+            # Low-cardinality features (flags, encoded categories) collapse to fewer bins
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])) if len(values) else np.array([])
+            profile[column] = {"edges": edges.tolist(), "shares": _bin_shares(values, edges).tolist()}
+        return profile
+
+    @staticmethod
+    def psi(reference_shares, live_shares) -> float:
+        reference = np.clip(np.asarray(reference_shares, dtype=np.float64), _MIN_SHARE, None)
+        live = np.clip(np.asarray(live_shares, dtype=np.float64), _MIN_SHARE, None)
+        return float(np.sum((live - reference) * np.log(live / reference)))
+
+    @staticmethod
+    def binned_ks(reference_shares, live_shares) -> float:
+        reference = np.cumsum(np.asarray(reference_shares, dtype=np.float64))
+        live = np.cumsum(np.asarray(live_shares, dtype=np.float64))
+        return float(np.abs(reference - live).max()) if len(reference) else 0.0
+
+    @staticmethod
+    def compare(profile: dict, X: pd.DataFrame) -> dict:
+        """PSI of every profiled feature present in X"""
+        scores = {}
+        for column, reference in profile.items():
+            if column not in X.columns:
+                continue
+            edges = np.asarray(reference["edges"], dtype=np.float64)
+            live = _bin_shares(X[column].to_numpy(dtype=np.float64), edges)
+            scores[column] = DriftService.psi(reference["shares"], live)
+        return scores
+
+class FeatureStream:
+    """Bin counts over fixed edges plus running count / mean / variance / min / max of one feature"""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray):
+        if not len(values):
+            return
+        self.counts += np.bincount(np.searchsorted(self.edges, values, side="right"), minlength=len(self.counts))
+
+        # Welford's update, merged a batch at a time (Chan et al.)
+        batch_n = len(values)
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        n = self.n + batch_n
+        delta = batch_mean - self.mean
+        self.mean += delta * batch_n / n
+        self.m2 += batch_m2 + delta * delta * self.n * batch_n / n
+        self.n = n
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: "FeatureStream"):
+        if not other.n:
+            return
+        self.counts += other.counts
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def summary(self) -> dict:
+        return {
+            "samples": self.n,
+            "mean": round(self.mean, 4) if self.n else None,
+            "std": round(float(np.sqrt(self.m2 / (self.n - 1))), 4) if self.n > 1 else None,
+            "min": self.min if self.n else None,
+            "max": self.max if self.n else None,
+        }
+
+class DriftMonitor:
+    """
+    Live feature drift of one MLPredictionService. predict_batch /
+    predict_one call observe / observe_row with the encoded model input
+    of request-path predictions (offline sweeps pass observe=False);
+    check() (run on a schedule once the first rows arrive) scores the
+    current window against the reference and starts a new window.
+    The reference, and with it all counts, is reset when the active model
+    version changes.
+    """
+
+    def __init__(self, ml_service, columns: list, training_data_path: str = TRAINING_DATA_PATH,
+                 check_seconds: float = DRIFT_CHECK_SECONDS):
+        self.ml_service = ml_service
+        self.columns = list(columns)
+        self.training_data_path = training_data_path
+        self.check_seconds = check_seconds
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._version = _UNSET
+        # State whose reference still has to be built from the training CSV
+        self._pending: Optional[dict] = None
+        self._reference: Optional[dict] = None
+        self._reference_source: Optional[str] = None
+        self._window: dict = {}
+        self._lifetime: dict = {}
+        self._buffer: list = []
+        self._thread: Optional[threading.Thread] = None
+        self.report: Optional[dict] = None
+
+    def _training_reference(self, state: dict) -> tuple:
+        # Slow (reads and encodes the CSV): monitor thread or check() only
+        try:
+            frame = pd.read_csv(self.training_data_path)
+            if set(self.columns) <= set(frame.columns) and all(
+                pd.api.types.is_numeric_dtype(frame[column]) for column in self.columns
+            ):
+                X = frame[self.columns]
+            else:
+                X = self.ml_service._engineer_features(frame, state["label_encoders"])
+        except Exception as e:
+            print(f"⚠️  Drift monitor: no reference profile ({str(e)})")
+            return None, None
+        if X.empty:
+            return None, None
+        return DriftService.profile(X), self.training_data_path
+
+    def _install(self, reference: Optional[dict], source: Optional[str]):
+        # Caller holds the lock
+        self._reference, self._reference_source = reference, source
+        reference = reference or {}
+        columns = [column for column in self.columns if column in reference]
+        self._window = {column: FeatureStream(reference[column]["edges"]) for column in columns}
+        self._lifetime = {column: FeatureStream(reference[column]["edges"]) for column in columns}
+        self._buffer = []
+        self.report = None
+
+    def _sync_version(self, state: dict):
+        # Caller holds the lock. Only cheap lookups here: this runs on predictions
+        if state.get("version") == self._version:
+            return
+        self._version = state.get("version")
+
+        manifest_profile = ((state.get("manifest") or {}).get("metadata") or {}).get("reference_profile")
+        if manifest_profile:
+            self._pending = None
+            self._install(manifest_profile, f"model {state['version']} manifest")
+        elif state.get("reference_profile"):
+            self._pending = None
+            self._install(state["reference_profile"], f"model {state['version']} reference_profile.json")
+        else:
+            # Rows seen before the CSV reference is ready are not counted
+            self._pending = state
+            self._install(None, None)
+            self._wake.set()
+
+    def _build_pending_reference(self):
+        with self._lock:
+            state = self._pending
+        if state is None:
+            return
+
+        reference, source = self._training_reference(state)
+        with self._lock:
+            # The version may have moved on while we were reading
+            if self._pending is state:
+                self._pending = None
+                self._install(reference, source)
+
+    def prepare(self, state: dict):
+        """Set up the reference for a loaded state now, before any rows arrive"""
+        with self._lock:
+            self._sync_version(state)
+        self._build_pending_reference()
+
+    def _update(self, X: np.ndarray):
+        for index, column in enumerate(self.columns):
+            stream = self._window.get(column)
+            if stream is not None:
+                stream.update(X[:, index])
+
+    def observe(self, state: dict, X: np.ndarray):
+        """Fold in a batch of encoded rows (columns in self.columns order)"""
+        with self._lock:
+            self._sync_version(state)
+            if self._window:
+                self._update(np.asarray(X, dtype=np.float64))
+            self._ensure_thread()
+
+    def observe_row(self, state: dict, row: list):
+        with self._lock:
+            self._sync_version(state)
+            self._ensure_thread()
+            if not self._window:
+                return
+            self._buffer.append(row)
+            if len(self._buffer) >= ROW_BUFFER_SIZE:
+                self._update(np.asarray(self._buffer, dtype=np.float64))
+                self._buffer = []
+
+    def _ensure_thread(self):
+        # Caller holds the lock
+        if self._thread is None and self.check_seconds > 0:
+            self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        # Woken early to build a reference after a version change
+        next_check = time.monotonic() + self.check_seconds
+        while True:
+            self._wake.wait(max(0.0, next_check - time.monotonic()))
+            self._wake.clear()
+            try:
+                self._build_pending_reference()
+                if time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.check_seconds
+                    self.check()
+            except Exception as e:
+                print(f"❌ Drift check failed: {str(e)}")
+
+    def check(self) -> dict:
+        """Score the current window against the reference and start a new one"""
+        self._build_pending_reference()
+        with self._lock:
+            if self._buffer:
+                self._update(np.asarray(self._buffer, dtype=np.float64))
+                self._buffer = []
+
+            if not self._window:
+                observed = self._version is not _UNSET
+                self.report = {
+                    "checked_at": datetime.utcnow().isoformat(),
+                    "status": "no_reference" if observed else "no_data",
+                    "model_version": self._version if observed else None,
+                    "flagged": [],
+                }
+                return self.report
+
+            window_samples = min(stream.n for stream in self._window.values())
+            scored = window_samples >= DRIFT_MIN_SAMPLES
+            features, flagged = {}, []
+            for column, stream in self._window.items():
+                entry = {"window": stream.summary(), "lifetime": None}
+                if scored:
+                    reference = self._reference[column]["shares"]
+                    live = stream.counts / stream.n
+                    entry["psi"] = round(DriftService.psi(reference, live), 4)
+                    entry["ks"] = round(DriftService.binned_ks(reference, live), 4)
+                    entry["flagged"] = entry["psi"] > PSI_DRIFT_THRESHOLD or entry["ks"] > KS_DRIFT_THRESHOLD
+                    if entry["flagged"]:
+                        flagged.append(column)
+                    self._lifetime[column].merge(stream)
+                    stream.reset()
+                entry["lifetime"] = self._lifetime[column].summary()
+                features[column] = entry
+
+            self.report = {
+                "checked_at": datetime.utcnow().isoformat(),
+                "status": "ok" if scored else "collecting",
+                "model_version": self._version,
+                "reference": self._reference_source,
+                "window_samples": window_samples,
+                "min_samples": DRIFT_MIN_SAMPLES,
+                "thresholds": {"psi": PSI_DRIFT_THRESHOLD, "ks": KS_DRIFT_THRESHOLD},
+                "flagged": flagged,
+                "features": features,
+            }
+
+        if flagged:
+            print(f"⚠️  Feature drift ({self.report['model_version']}): {', '.join(flagged)}")
+        return self.report
@@ -0,0 +1,140 @@
+"""
+Per-feature contributions to retention scores (the key_factors field).
+
+Forests: every split moves a row's churn probability from the parent
+node's value to the child's. The change is credited to the split feature.
+Summed over the path, plus the root value (the bias), this gives exactly
+the tree's prediction (Saabas). The explainer precomputes each node's
+delta to its left and right child. It then walks all trees for a whole
+batch in lockstep, the way CompiledModel does, and adds the deltas into a
+rows x features matrix. Contributions and bias are in probability units.
+bias + sum(contributions) is the churn probability.
+
+Logistic regression: coef * model input, in log-odds units. Behind a
+StandardScaler the input is the scaled feature, so a contribution is
+relative to the training mean; a bare model sees raw features, so it is
+relative to a zero value of the feature. Either way intercept +
+sum(contributions) is the churn log-odds.
+
+Other models have no explainer and get empty key_factors.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.compiled_model import CompiledModel
+from app.services.ml_prediction_service import CATEGORICAL_FEATURES
+
+KEY_FACTORS_TOP_N = int(os.getenv("ML_KEY_FACTORS_TOP_N", "3"))
+
+class ContributionExplainer:
+    def __init__(self, compiled: CompiledModel):
+        self.compiled = compiled
+        churn = int(np.flatnonzero(compiled.classes == 1)[0]) if (compiled.classes == 1).any() else -1
+
+        if compiled.kind == "forest":
+            self.units = "probability"
+            value = compiled.value[:, churn]
+            # Leaves point to themselves, so their deltas are 0
+            self.delta_left = value[compiled.left] - value
+            self.delta_right = value[compiled.right] - value
+            self.bias = float(value[compiled.roots].mean())
+        else:
+            self.units = "log_odds"
+            self.bias = compiled.intercept
+
+    @staticmethod
+    def for_model(model) -> Optional["ContributionExplainer"]:
+        """An explainer for a forest / logistic regression, bare or behind a scaler in a Pipeline"""
+        scaler = None
+        if hasattr(model, "named_steps"):
+            steps = [step for _, step in model.steps]
+            model = steps[-1]
+            if len(steps) == 2 and hasattr(steps[0], "mean_") and hasattr(steps[0], "scale_"):
+                scaler = steps[0]
+            elif len(steps) != 1:
+                return None
+        try:
+            return ContributionExplainer(CompiledModel.export(model, scaler))
+        except (ValueError, AttributeError, IndexError):
+            return None
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """rows x features matrix of contributions to the churn score"""
+        compiled = self.compiled
+        X = np.asarray(X, dtype=np.float64)
+        if compiled.scale_mean is not None:
+            X = (X - compiled.scale_mean) / compiled.scale_scale
+
+        if compiled.kind != "forest":
+            return X * compiled.coef
+
+        n_rows, n_features = X.shape
+        X32 = X.astype(np.float32)
+        rows = np.arange(n_rows)[:, np.newaxis]
+        nodes = np.broadcast_to(compiled.roots, (n_rows, len(compiled.roots)))
+        totals = np.zeros(n_rows * n_features)
+
+        for _ in range(compiled.depth):
+            feature = compiled.feature[nodes]
+            go_left = X32[rows, feature] <= compiled.threshold[nodes]
+            delta = np.where(go_left, self.delta_left[nodes], self.delta_right[nodes])
+            # Scatter-add each row's deltas into its feature columns
+            totals += np.bincount((rows * n_features + feature).ravel(), weights=delta.ravel(),
+                                  minlength=n_rows * n_features)
+            nodes = np.where(go_left, compiled.left[nodes], compiled.right[nodes])
+
+        return totals.reshape(n_rows, n_features) / len(compiled.roots)
+
+class ExplanationService:
+    @staticmethod
+    def explainer(ml_service) -> Optional[ContributionExplainer]:
+        """The active version's explainer, built once per loaded version"""
+        return ml_service.explained_state()["explainer"]
+
+    @staticmethod
+    def key_factors(ml_service, features: pd.DataFrame, top_n: int = KEY_FACTORS_TOP_N) -> list:
+        """
+        The top_n features by absolute contribution for every row of a
+        feature frame (as predict_batch takes it), each as
+        {feature, value, contribution, units, effect}.
+        """
+        # Explainer and encoders from the same loaded version
+        state = ml_service.explained_state()
+        explainer = state["explainer"]
+        if explainer is None or features.empty:
+            return [[] for _ in range(len(features))]
+
+        label_encoders = state["label_encoders"]
+        X = ml_service._engineer_features(features, label_encoders)
+        contributions = explainer.contributions(X.to_numpy(dtype=np.float64))
+        top = np.argsort(-np.abs(contributions), axis=1)[:, :top_n]
+
+        columns = list(X.columns)
+        values = X.to_numpy()
+        factors = []
+        for row, indices in enumerate(top):
+            row_factors = []
+            for index in indices:
+                contribution = float(contributions[row, index])
+                if contribution == 0.0:
+                    continue
+                column = columns[index]
+                value = values[row, index]
+                if column in CATEGORICAL_FEATURES and column in label_encoders:
+                    classes = label_encoders[column].classes_
+                    value = str(classes[int(value)]) if 0 <= int(value) < len(classes) else None
+                elif isinstance(value, np.generic):
+                    value = value.item()
+                row_factors.append({
+                    "feature": column,
+                    "value": value,
+                    "contribution": round(contribution, 4),
+                    "units": explainer.units,
+                    "effect": "increases_risk" if contribution > 0 else "decreases_risk",
+                })
+            factors.append(row_factors)
+        return factors
@@ -0,0 +1,110 @@
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from app.db.session import SessionLocal
+from datetime import date, datetime
+import csv
+import enum
+import io
+import json
+import os
+import zlib
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+class ExportService:
+    """
+    Streams query results as CSV or NDJSON without holding them in memory.
+
+    Rows come off a server-side cursor one batch at a time and each batch
+    is encoded (and optionally gzipped) and sent before the next is
+    fetched, so memory stays at one batch whatever the row count.
+
+    Exports are described by columns: a list of (key, header, expression)
+    where key names the NDJSON field, header the CSV column and expression
+    is any SQLAlchemy column expression.
+    """
+
+    @staticmethod
+    def select(columns: list):
+        """A select() of the export columns; add joins/filters/order to it"""
+        return select(*[expression.label(key) for key, _, expression in columns])
+
+    @staticmethod
+    def _csv_value(value):
+        if value is None:
+            return ""
+        if isinstance(value, enum.Enum):
+            return value.value
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return value
+
+    @staticmethod
+    def _json_value(value):
+        if isinstance(value, enum.Enum):
+            return value.value
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _batches(statement, batch_size: int):
+        # Own session: the request's session may be closed before the body is sent
+        db = SessionLocal()
+        try:
+            result = db.execute(statement.execution_options(yield_per=batch_size))
+            for rows in result.partitions():
+                yield rows
+        finally:
+            db.close()
+
+    @staticmethod
+    def stream(statement, columns: list, fmt: str = "csv", compress: bool = False, batch_size: int = EXPORT_BATCH_SIZE):
+        """Yield the encoded export, one chunk per fetched batch"""
+        # wbits=31: gzip container, so the download opens as a .gz file
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        keys = [key for key, _, _ in columns]
+
+        def drain() -> bytes:
+            data = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            return compressor.compress(data) if compressor else data
+
+        if fmt == "csv":
+            writer.writerow([header for _, header, _ in columns])
+            yield drain()
+
+        for rows in ExportService._batches(statement, batch_size):
+            if fmt == "csv":
+                writer.writerows([ExportService._csv_value(value) for value in row] for row in rows)
+            else:
+                for row in rows:
+                    record = {key: ExportService._json_value(value) for key, value in zip(keys, row)}
+                    buffer.write(json.dumps(record) + "\n")
+
+            chunk = drain()
+            if chunk:
+                yield chunk
+
+        if compressor:
+            yield compressor.flush()
+
+    @staticmethod
+    def response(statement, columns: list, filename: str, fmt: str = "csv", compress: bool = False) -> StreamingResponse:
+        """StreamingResponse downloading the export as filename.csv / .ndjson (+ .gz)"""
+        extension = f"{fmt}.gz" if compress else fmt
+        return StreamingResponse(
+            ExportService.stream(statement, columns, fmt, compress),
+            media_type="application/gzip" if compress else MEDIA_TYPES[fmt],
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}.{extension}"
+            }
+        )
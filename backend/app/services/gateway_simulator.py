@@ -0,0 +1,228 @@
+"""
+Offline stand-in for the parts of the `stripe` module that PaymentService uses
+(PaymentIntent.create/retrieve/cancel, Webhook, error). Select it with
+PAYMENT_GATEWAY=simulator.
+
+Intents are stateless: the creation time, amount and outcome are derived from
+the intent id itself, so any uvicorn worker can retrieve an intent created by
+another one and a soak test never grows memory.
+
+Environment:
+  SIM_LATENCY_DIST       fixed | uniform | lognormal   (default lognormal)
+  SIM_LATENCY_MS         median latency per API call    (default 80)
+  SIM_LATENCY_SIGMA      lognormal shape                (default 0.5)
+  SIM_ERROR_RATE         share of API calls that raise  (default 0)
+  SIM_DECLINE_RATE       share of intents that fail     (default 0)
+  SIM_CONFIRM_DELAY_MS   time until the customer pays   (default 0)
+  SIM_WEBHOOK_URL        where to POST events           (unset = no webhooks)
+  SIM_WEBHOOK_DELAY_MS   median delivery delay          (default 500)
+  SIM_WEBHOOK_DUPLICATE_RATE  share of events sent twice (default 0)
+"""
+
+import stripe
+import os
+import time
+import json
+import hmac
+import heapq
+import random
+import hashlib
+import secrets
+import threading
+import httpx
+
+class SimulatedIntent:
+    def __init__(self, id, amount, currency, status, payment_method_types, metadata=None):
+        self.id = id
+        self.object = 'payment_intent'
+        self.amount = amount
+        self.currency = currency
+        self.status = status
+        self.payment_method_types = payment_method_types
+        self.metadata = metadata or {}
+        self.client_secret = f"{id}_secret_sim"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'object': self.object,
+            'amount': self.amount,
+            'amount_received': self.amount if self.status == 'succeeded' else 0,
+            'currency': self.currency,
+            'status': self.status,
+            'payment_method_types': self.payment_method_types,
+            'metadata': self.metadata,
+        }
+
+class _LatencyModel:
+    def __init__(self, dist: str, median_ms: float, sigma: float):
+        self.dist = dist
+        self.median_ms = median_ms
+        self.sigma = sigma
+
+    def sample_ms(self) -> float:
+        if self.dist == 'fixed':
+            return self.median_ms
+        if self.dist == 'uniform':
+            return random.uniform(0, 2 * self.median_ms)
+        # lognormal: median = exp(mu)
+        return random.lognormvariate(0, self.sigma) * self.median_ms
+
+    def sleep(self):
+        delay = self.sample_ms()
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+class _WebhookDispatcher:
+    """Single background thread delivering signed events at their due time."""
+
+    def __init__(self, url: str, secret: str):
+        self.url = url
+        self.secret = secret
+        self._queue = []
+        self._cond = threading.Condition()
+        self._client = httpx.Client(timeout=10)
+        threading.Thread(target=self._run, daemon=True, name="sim-webhooks").start()
+
+    def schedule(self, due_at: float, event: dict):
+        with self._cond:
+            heapq.heappush(self._queue, (due_at, event['id'], event))
+            self._cond.notify()
+
+    def _sign(self, payload: str) -> str:
+        timestamp = int(time.time())
+        signed = f"{timestamp}.{payload}".encode("utf-8")
+        signature = hmac.new(self.secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+        return f"t={timestamp},v1={signature}"
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue or self._queue[0][0] > time.time():
+                    timeout = self._queue[0][0] - time.time() if self._queue else None
+                    self._cond.wait(timeout)
+                _, _, event = heapq.heappop(self._queue)
+
+            payload = json.dumps(event)
+            try:
+                self._client.post(
+                    self.url,
+                    content=payload,
+                    headers={"Content-Type": "application/json", "Stripe-Signature": self._sign(payload)},
+                )
+            except httpx.HTTPError as e:
+                print(f"⚠️ Simulated webhook delivery failed: {e}")
+
+class _PaymentIntentAPI:
+    def __init__(self, gateway):
+        self._gw = gateway
+
+    def create(self, amount: int, currency: str, payment_method_types=None, metadata=None, **kwargs):
+        self._gw._call()
+
+        created_ms = int(time.time() * 1000)
+        intent_id = f"pi_sim_{created_ms}_{amount}_{secrets.token_hex(6)}"
+        intent = SimulatedIntent(
+            intent_id, amount, currency, 'requires_payment_method',
+            payment_method_types or ['card'], metadata
+        )
+        self._gw._schedule_webhook(intent_id, created_ms, amount, currency, intent.payment_method_types)
+        return intent
+
+    def retrieve(self, intent_id: str, **kwargs):
+        self._gw._call()
+
+        try:
+            _, _, created_ms, amount, _ = intent_id.split("_")
+            created_ms, amount = int(created_ms), int(amount)
+        except ValueError:
+            raise stripe.error.InvalidRequestError(f"No such payment_intent: '{intent_id}'", param='intent')
+
+        return SimulatedIntent(
+            intent_id, amount, 'php', self._gw._status_at(intent_id, created_ms), ['card']
+        )
+
+    def cancel(self, intent_id: str, **kwargs):
+        # Stateless, so a later retrieve() still reports the derived status
+        intent = self.retrieve(intent_id)
+        if intent.status == 'succeeded':
+            raise stripe.error.InvalidRequestError(
+                "You cannot cancel this PaymentIntent because it has a status of succeeded.", param='intent'
+            )
+        intent.status = 'canceled'
+        return intent
+
+class SimulatedGateway:
+    # Drop-in for the attributes PaymentService reads off the stripe module
+    error = stripe.error
+    Webhook = stripe.Webhook
+
+    def __init__(self, latency: _LatencyModel, error_rate: float = 0.0, decline_rate: float = 0.0,
+                 confirm_delay_ms: int = 0, webhook_url: str = None, webhook_secret: str = "whsec_simulator",
+                 webhook_delay: _LatencyModel = None, webhook_duplicate_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.decline_rate = decline_rate
+        self.confirm_delay_ms = confirm_delay_ms
+        self.webhook_secret = webhook_secret
+        self.webhook_delay = webhook_delay or _LatencyModel('lognormal', 500, 0.5)
+        self.webhook_duplicate_rate = webhook_duplicate_rate
+        self._dispatcher = _WebhookDispatcher(webhook_url, webhook_secret) if webhook_url else None
+        self.PaymentIntent = _PaymentIntentAPI(self)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency=_LatencyModel(
+                os.getenv("SIM_LATENCY_DIST", "lognormal"),
+                float(os.getenv("SIM_LATENCY_MS", "80")),
+                float(os.getenv("SIM_LATENCY_SIGMA", "0.5")),
+            ),
+            error_rate=float(os.getenv("SIM_ERROR_RATE", "0")),
+            decline_rate=float(os.getenv("SIM_DECLINE_RATE", "0")),
+            confirm_delay_ms=int(os.getenv("SIM_CONFIRM_DELAY_MS", "0")),
+            webhook_url=os.getenv("SIM_WEBHOOK_URL"),
+            webhook_secret=os.getenv("STRIPE_WEBHOOK_SECRET", "whsec_simulator"),
+            webhook_delay=_LatencyModel(
+                os.getenv("SIM_LATENCY_DIST", "lognormal"),
+                float(os.getenv("SIM_WEBHOOK_DELAY_MS", "500")),
+                float(os.getenv("SIM_LATENCY_SIGMA", "0.5")),
+            ),
+            webhook_duplicate_rate=float(os.getenv("SIM_WEBHOOK_DUPLICATE_RATE", "0")),
+        )
+
+    def _call(self):
+        """Every API call pays latency and may fail like a flaky network."""
+        self.latency.sleep()
+        if random.random() < self.error_rate:
+            raise stripe.error.APIConnectionError("Simulated gateway error")
+
+    def _is_declined(self, intent_id: str) -> bool:
+        # Deterministic per intent so every worker agrees on the outcome
+        bucket = int(hashlib.sha256(intent_id.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return bucket < self.decline_rate
+
+    def _status_at(self, intent_id: str, created_ms: int) -> str:
+        if time.time() * 1000 < created_ms + self.confirm_delay_ms:
+            return 'requires_payment_method'
+        return 'requires_payment_method' if self._is_declined(intent_id) else 'succeeded'
+
+    def _schedule_webhook(self, intent_id, created_ms, amount, currency, method_types):
+        if not self._dispatcher:
+            return
+
+        declined = self._is_declined(intent_id)
+        status = 'requires_payment_method' if declined else 'succeeded'
+        intent = SimulatedIntent(intent_id, amount, currency, status, method_types)
+        event = {
+            'id': f"evt_sim_{secrets.token_hex(12)}",
+            'object': 'event',
+            'type': 'payment_intent.payment_failed' if declined else 'payment_intent.succeeded',
+            'created': int(time.time()),
+            'data': {'object': intent.to_dict()},
+        }
+
+        due_at = (created_ms + self.confirm_delay_ms + self.webhook_delay.sample_ms()) / 1000
+        self._dispatcher.schedule(due_at, event)
+        if random.random() < self.webhook_duplicate_rate:
+            self._dispatcher.schedule(due_at + self.webhook_delay.sample_ms() / 1000, event)
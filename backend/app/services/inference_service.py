@@ -0,0 +1,254 @@
+"""
+Retention scoring in a dedicated worker process.
+
+inference_worker.py runs an InferenceServer: it owns the one
+MLPredictionService (and so the one copy of the model) and listens on a
+Unix domain socket. API processes talk to it through an InferenceClient,
+so prediction handlers await a socket reply instead of running pandas and
+sklearn on their own event loop / threadpool.
+
+Wire format, both directions: a 4-byte big-endian length, then a UTF-8
+JSON object.
+
+    request   {"id": 7, "op": "predict", "rows": [{feature: value, ...}, ...]}
+    response  {"id": 7, "results": [{will_retain, churn_probability, ...}, ...]}
+              {"id": 7, "error": "Model not loaded"}
+
+    request   {"id": 8, "op": "metrics"}
+    response  {"id": 8, "results": {MicroBatcher.metrics()}}
+
+    request   {"id": 9, "op": "drift", "run": false}
+    response  {"id": 9, "results": {DriftMonitor report}}
+
+    request   {"id": 10, "op": "model_info"}
+    response  {"id": 10, "results": {MLPredictionService.get_model_info()}}
+
+Rows from all connections go through one MicroBatcher, so concurrent
+single-row requests are scored together.
+
+A connection carries many requests at once; replies may come back in any
+order and are matched by id. ML_INFERENCE_SOCKET set in the API's
+environment switches the offload on.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.micro_batcher import BATCH_MAX_ROWS, BATCH_WINDOW_MS, MicroBatcher
+
+DEFAULT_INFERENCE_SOCKET = "/tmp/sleepingbear-inference.sock"
+INFERENCE_SOCKET = os.getenv("ML_INFERENCE_SOCKET", "")
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv("ML_INFERENCE_TIMEOUT_SECONDS", "10"))
+
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+class InferenceUnavailable(Exception):
+    """The inference worker could not be reached or did not answer in time"""
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _write_message(writer: asyncio.StreamWriter, message: dict):
+    payload = json.dumps(message, default=_json_default).encode()
+    writer.write(_HEADER.pack(len(payload)) + payload)
+
+async def _read_message(reader: asyncio.StreamReader) -> dict:
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds MAX_MESSAGE_BYTES")
+    return json.loads(await reader.readexactly(size))
+
+def score_rows(ml_service, rows: list) -> list:
+    """Prediction dicts (as predict_one returns them) for a list of feature dicts"""
+    if len(rows) == 1:
+        return [ml_service.predict_one(rows[0])]
+
+    scored = ml_service.predict_batch(pd.DataFrame(rows))
+    return [
+        {
+            'will_retain': bool(row.will_retain),
+            'churn_probability': float(row.churn_probability),
+            'retention_probability': float(row.retention_probability),
+            'risk_score': int(row.risk_score),
+            'risk_level': row.risk_level,
+            'recommendation': row.recommendation,
+        }
+        for row in scored.itertuples(index=False)
+    ]
+
+def drift_report(ml_service, run: bool = False) -> dict:
+    """The service's last drift report, or a fresh check when asked or when there is none yet"""
+    monitor = ml_service.monitor
+    if monitor is None:
+        return {"status": "disabled", "flagged": []}
+    if run or monitor.report is None:
+        return monitor.check()
+    return monitor.report
+
+class InferenceServer:
+    """
+    Serves predict requests on a Unix socket. Scoring runs on one
+    background thread so the loop keeps reading requests meanwhile; the
+    model itself is only ever used from that thread. Drift checks (which
+    may read the training CSV) get a thread of their own so they never
+    hold up the loop or a scoring batch.
+    """
+
+    def __init__(self, ml_service, socket_path: str = DEFAULT_INFERENCE_SOCKET,
+                 max_batch_rows: int = BATCH_MAX_ROWS, max_wait_ms: float = BATCH_WINDOW_MS):
+        self.ml_service = ml_service
+        self.socket_path = socket_path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self.drift_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference-drift")
+        self.batcher = MicroBatcher(
+            partial(score_rows, ml_service), max_batch_rows=max_batch_rows,
+            max_wait_ms=max_wait_ms, executor=self.executor
+        )
+
+    async def serve(self):
+        # A socket file left behind by a crashed worker would make bind() fail
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                message = await _read_message(reader)
+                task = asyncio.create_task(self._answer(message, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _answer(self, message: dict, writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        try:
+            if message.get("op") == "predict":
+                results = list(await asyncio.gather(*(self.batcher.submit(row) for row in message["rows"])))
+            elif message.get("op") == "metrics":
+                results = self.batcher.metrics()
+            elif message.get("op") == "drift":
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.drift_executor, partial(drift_report, self.ml_service, run=message.get("run", False))
+                )
+            elif message.get("op") == "model_info":
+                # On the scoring thread: it may (re)load the model
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.ml_service.get_model_info
+                )
+            else:
+                raise ValueError(f"Unknown op: {message.get('op')!r}")
+            reply = {"id": message["id"], "results": results}
+        except Exception as e:
+            reply = {"id": message.get("id"), "error": str(e)}
+
+        async with write_lock:
+            _write_message(writer, reply)
+            await writer.drain()
+
+class InferenceClient:
+    """
+    Async client for an InferenceServer. One connection per client,
+    opened on first use and reopened after a failure; concurrent callers
+    share it.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = INFERENCE_TIMEOUT_SECONDS):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _connection(self) -> asyncio.StreamWriter:
+        if self._writer is None or self._writer.is_closing():
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+            except OSError as e:
+                self._writer = None
+                raise InferenceUnavailable(f"Inference worker not reachable at {self.socket_path}: {e}")
+            self._reader_task = asyncio.create_task(self._read_replies(reader, self._writer))
+        return self._writer
+
+    async def _read_replies(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                reply = await _read_message(reader)
+                future = self._pending.pop(reply.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in reply:
+                    future.set_exception(RuntimeError(reply["error"]))
+                else:
+                    future.set_result(reply["results"])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            if self._writer is writer:
+                self._writer = None
+            writer.close()
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(InferenceUnavailable("Inference worker closed the connection"))
+
+    async def predict(self, rows: list) -> list:
+        """Prediction dicts for a list of feature dicts, in the same order"""
+        return await self._request({"op": "predict", "rows": rows})
+
+    async def metrics(self) -> dict:
+        """The worker's micro-batching metrics"""
+        return await self._request({"op": "metrics"})
+
+    async def drift(self, run: bool = False) -> dict:
+        """The worker's live feature drift report (run: check now)"""
+        return await self._request({"op": "drift", "run": run})
+
+    async def model_info(self) -> dict:
+        """The worker's loaded model: version, source, metadata, ..."""
+        return await self._request({"op": "model_info"})
+
+    async def _request(self, message: dict):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+
+        async with self._lock:
+            writer = await self._connection()
+            self._pending[request_id] = future
+            try:
+                _write_message(writer, {"id": request_id, **message})
+                await writer.drain()
+            except (ConnectionError, OSError) as e:
+                self._pending.pop(request_id, None)
+                raise InferenceUnavailable(f"Inference worker connection lost: {e}")
+
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self._pending.pop(request_id, None)
+            raise InferenceUnavailable(f"Inference worker did not answer within {self.timeout}s")
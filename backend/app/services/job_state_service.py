@@ -0,0 +1,32 @@
+from sqlalchemy.orm import Session
+from app.models import all_models as models
+from datetime import datetime
+from typing import Optional
+
+class JobStateService:
+    """
+    Watermarks for resumable background jobs. Callers commit, so the
+    watermark moves in the same transaction as the work it covers.
+    """
+
+    @staticmethod
+    def get(db: Session, name: str) -> Optional[models.JobState]:
+        return db.query(models.JobState).filter(models.JobState.name == name).first()
+
+    @staticmethod
+    def get_watermark(db: Session, name: str, default: Optional[str] = None) -> Optional[str]:
+        state = JobStateService.get(db, name)
+        return state.watermark if state and state.watermark is not None else default
+
+    @staticmethod
+    def set_watermark(db: Session, name: str, watermark: Optional[str], details: dict = None) -> models.JobState:
+        state = JobStateService.get(db, name)
+        if not state:
+            state = models.JobState(name=name)
+            db.add(state)
+        
+        state.watermark = watermark
+        if details is not None:
+            state.details = details
+        state.updated_at = datetime.utcnow()
+        return state
@@ -0,0 +1,160 @@
+"""
+Micro-batching of concurrent single-row predictions.
+
+Callers await MicroBatcher.submit(row). The first row of a batch opens a
+window of max_wait_ms; rows arriving meanwhile join it until it holds
+max_batch_rows. The batch is scored with one score_batch(rows) call on the
+batcher's executor and each caller gets its own result back. While a
+batch is being scored, new rows queue up for the next one, so batches
+grow with load on their own.
+
+Metrics are fixed-bucket histograms (constant memory) of batch size,
+queueing delay (submit to start of scoring) and scoring time.
+"""
+
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+BATCH_MAX_ROWS = int(os.getenv("ML_BATCH_MAX_ROWS", "64"))
+BATCH_WINDOW_MS = float(os.getenv("ML_BATCH_WINDOW_MS", "5"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+class Histogram:
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> dict:
+        """Per-bucket counts keyed by upper bound (value <= bound), plus +Inf"""
+        labels = [str(bound) for bound in self.bounds] + ["+Inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+class MicroBatcher:
+    def __init__(self, score_batch: Callable[[list], list], max_batch_rows: int = BATCH_MAX_ROWS,
+                 max_wait_ms: float = BATCH_WINDOW_MS, executor: Optional[ThreadPoolExecutor] = None):
+        self.score_batch = score_batch
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batch")
+
+        # Bound to the event loop of the first submit()
+        self._queue: Optional[asyncio.Queue] = None
+        self._runner: Optional[asyncio.Task] = None
+
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_delay_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.score_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.failed_batches = 0
+
+    async def submit(self, row):
+        """Score one row as part of the next batch"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._runner is None or self._runner.done():
+            # First submit, or the runner was cancelled or died: rows already
+            # queued are picked up by the new one
+            self._runner = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_wait_ms / 1000
+
+                while len(batch) < self.max_batch_rows:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._score(batch)
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                # Fail this batch's callers, keep serving the next one
+                self.failed_batches += 1
+                print(f"❌ Micro-batch failed: {str(e)}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _score(self, batch: list):
+        started = time.perf_counter()
+        self.batch_size.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.queue_delay_ms.observe((started - enqueued_at) * 1000)
+
+        # Callers that gave up (timeouts, disconnects) are not scored
+        live = [(row, future) for row, future, _ in batch if not future.done()]
+        if not live:
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.score_batch, [row for row, _ in live])
+            if len(results) != len(live):
+                raise ValueError(f"score_batch returned {len(results)} results for {len(live)} rows")
+        except Exception:
+            self.failed_batches += 1
+            # One bad row must not fail everyone else's prediction: retry row by row
+            results = []
+            for row, _ in live:
+                try:
+                    results.append((await loop.run_in_executor(self.executor, self.score_batch, [row]))[0])
+                except Exception as e:
+                    results.append(e)
+
+        self.score_ms.observe((time.perf_counter() - started) * 1000)
+
+        for (_, future), result in zip(live, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def metrics(self) -> dict:
+        return {
+            "max_batch_rows": self.max_batch_rows,
+            "max_wait_ms": self.max_wait_ms,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "failed_batches": self.failed_batches,
+            "batch_size": self.batch_size.snapshot(),
+            "queue_delay_ms": self.queue_delay_ms.snapshot(),
+            "score_ms": self.score_ms.snapshot(),
+        }
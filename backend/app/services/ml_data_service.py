@@ -1,8 +1,47 @@
+from sqlalchemy import Integer, and_, case, cast, extract, func, select
 from sqlalchemy.orm import Session
 from app.models import all_models as models
-from datetime import datetime
+from app.services.synthetic_data_service import SyntheticDataService
+from datetime import datetime, timedelta
+from typing import Optional
 import pandas as pd
 import numpy as np
+import os
+
+# A tenant counts as retained if they book again within this many days of a stay's end
+RETENTION_WINDOW_DAYS = int(os.getenv("RETENTION_WINDOW_DAYS", "180"))
+
+# Hotel Booking Dataset fields a condo system doesn't track, with logical defaults
+CONSTANT_FEATURES = {
+    'adults': 1, # Default to 1 if not tracked
+    'children': 0,
+    'babies': 0,
+    'booking_changes': 0, # Update if you track modifications
+    'total_of_special_requests': 0, # Update if you have a requests field
+    'required_car_parking_spaces': 0,
+    'days_in_waiting_list': 0,
+    'hotel': 'City Hotel', # Default mapping
+    'meal': 'SC', # Self Catering (common for condos)
+    'country': 'PHL', # Default to Philippines
+    'market_segment': 'Direct', # Since they use your app
+    'distribution_channel': 'Direct',
+    'reserved_room_type': 'A', # Dummy default
+    'assigned_room_type': 'A', # Dummy default
+    'deposit_type': 'No Deposit',
+    'customer_type': 'Transient',
+    'agent': 0,
+    'company': 0,
+}
+
+# Column order of prepare_features_for_user / collect_retention_features output
+FEATURE_COLUMNS = [
+    'lead_time', 'total_stay_nights', 'stays_in_weekend_nights', 'stays_in_week_nights',
+    'adults', 'children', 'babies', 'is_repeated_guest', 'previous_cancellations',
+    'previous_bookings_not_canceled', 'booking_changes', 'adr', 'total_of_special_requests',
+    'required_car_parking_spaces', 'days_in_waiting_list',
+    'hotel', 'arrival_date_month', 'meal', 'country', 'market_segment', 'distribution_channel',
+    'reserved_room_type', 'assigned_room_type', 'deposit_type', 'customer_type', 'agent', 'company',
+]
 
 class MLDataService:
 
@@ -14,86 +53,266 @@ class MLDataService:
         # 1. Get the user's most recent booking to predict if they will retain NEXT time
         last_booking = db.query(models.Booking).filter(
             models.Booking.user_id == user.id
-        ).order_by(models.Booking.created_at.desc()).first()
-        
+        ).order_by(models.Booking.created_at.desc(), models.Booking.id.desc()).first()
+
         # If no booking history, we can't predict based on this specific model
         if not last_booking:
-            return None 
+            return None
+
+        # 2. Get historical counts (one aggregate for both)
+        total_bookings_count, cancelled_count = db.query(
+            func.count(models.Booking.id),
+            func.count(models.Booking.id).filter(models.Booking.status == models.BookingStatus.CANCELLED),
+        ).filter(models.Booking.user_id == user.id).one()
+
+        # Cancellations before the booking we predict from
+        previous_cancellations = cancelled_count - (1 if last_booking.status == models.BookingStatus.CANCELLED else 0)
 
-        # 2. Get historical counts
-        total_bookings_count = db.query(models.Booking).filter(models.Booking.user_id == user.id).count()
-        
         # 3. Calculate Derived Features
-        
+
         # Lead Time: Days between booking creation and check-in
         lead_time = (last_booking.start_date - last_booking.created_at).days
         lead_time = max(0, lead_time) # Ensure non-negative
-        
+
         # Length of Stay
         total_stay_nights = (last_booking.end_date - last_booking.start_date).days
         total_stay_nights = max(1, total_stay_nights)
-        
+
         # ADR (Average Daily Rate): Total Price / Nights
         # Assuming last_booking.total_price exists. If not, estimate or use 0.
         adr = 0.0
         if hasattr(last_booking, 'total_price') and last_booking.total_price:
             adr = float(last_booking.total_price) / total_stay_nights
-            
+
         # Arrival Month (e.g., "August")
         arrival_month = last_booking.start_date.strftime("%B")
-        
+
         # 4. Construct the dictionary matching the TRAINED MODEL'S features exactly
         # We fill missing "hotel-specific" fields with logical defaults for a condo system
         feature_data = {
+            **CONSTANT_FEATURES,
+
             # --- Quantitative Features ---
             'lead_time': lead_time,
             'total_stay_nights': total_stay_nights,
             'stays_in_weekend_nights': total_stay_nights // 3, # Approximation
             'stays_in_week_nights': total_stay_nights - (total_stay_nights // 3),
-            'adults': 1, # Default to 1 if not tracked
-            'children': 0,
-            'babies': 0,
             'is_repeated_guest': 1 if total_bookings_count > 1 else 0,
-            'previous_cancellations': 0, # Update if you track cancellations in DB
-            'previous_bookings_not_canceled': max(0, total_bookings_count - 1),
-            'booking_changes': 0, # Update if you track modifications
+            'previous_cancellations': previous_cancellations,
+            'previous_bookings_not_canceled': max(0, total_bookings_count - 1 - previous_cancellations),
             'adr': adr,
-            'total_of_special_requests': 0, # Update if you have a requests field
-            'required_car_parking_spaces': 0,
-            'days_in_waiting_list': 0,
-            
+
             # --- Categorical Features (Strings) ---
-            'hotel': 'City Hotel', # Default mapping
             'arrival_date_month': arrival_month,
-            'meal': 'SC', # Self Catering (common for condos)
-            'country': 'PHL', # Default to Philippines
-            'market_segment': 'Direct', # Since they use your app
-            'distribution_channel': 'Direct',
-            'reserved_room_type': 'A', # Dummy default
-            'assigned_room_type': 'A', # Dummy default
-            'deposit_type': 'No Deposit',
-            'customer_type': 'Transient',
-            'agent': 0,
-            'company': 0,
         }
-        
-        return feature_data
+
+        return {column: feature_data[column] for column in FEATURE_COLUMNS}
+
+    @staticmethod
+    def _booking_feature_columns(bookings) -> list:
+        """
+        SQL for the per-booking features, over a subquery with status,
+        created_at, start_date, end_date, total_bookings and cancelled
+        (counts over the tenant's bookings up to and including this one)
+        """
+        # timedelta.days floors, so floor(seconds / 86400) matches the per-user path
+        def whole_days(later, earlier):
+            return cast(func.floor(extract("epoch", later - earlier) / 86400), Integer)
+
+        previous_cancellations = bookings.c.cancelled - case(
+            (bookings.c.status == models.BookingStatus.CANCELLED, 1), else_=0
+        )
+        return [
+            func.greatest(0, whole_days(bookings.c.start_date, bookings.c.created_at)).label("lead_time"),
+            func.greatest(1, whole_days(bookings.c.end_date, bookings.c.start_date)).label("total_stay_nights"),
+            bookings.c.total_bookings,
+            previous_cancellations.label("previous_cancellations"),
+            # FM drops the blank padding; without TM the names are English like strftime("%B")
+            func.to_char(bookings.c.start_date, "FMMonth").label("arrival_date_month"),
+        ]
+
+    @staticmethod
+    def _feature_frame(rows, key_columns: list, extra_columns: tuple = ()) -> pd.DataFrame:
+        """
+        Rows of key_columns, the _booking_feature_columns values and
+        extra_columns -> frame of key_columns + FEATURE_COLUMNS + extra_columns
+        """
+        frame = pd.DataFrame(rows, columns=key_columns + [
+            'lead_time', 'total_stay_nights', 'total_bookings',
+            'previous_cancellations', 'arrival_date_month',
+        ] + list(extra_columns))
+        for column in ('lead_time', 'total_stay_nights', 'total_bookings', 'previous_cancellations'):
+            frame[column] = frame[column].astype(np.int64)
+
+        nights = frame['total_stay_nights']
+        total = frame.pop('total_bookings')
+        frame['stays_in_weekend_nights'] = nights // 3 # Approximation
+        frame['stays_in_week_nights'] = nights - nights // 3
+        frame['is_repeated_guest'] = (total > 1).astype(np.int64)
+        frame['previous_bookings_not_canceled'] = np.maximum(0, total - 1 - frame['previous_cancellations'])
+        # Bookings have no total_price, so ADR is 0.0 as in prepare_features_for_user
+        frame['adr'] = 0.0
+        for column, value in CONSTANT_FEATURES.items():
+            frame[column] = value
+
+        return frame[key_columns + FEATURE_COLUMNS + list(extra_columns)]
+
+    @staticmethod
+    def collect_features_bulk(db: Session, user_ids=None) -> pd.DataFrame:
+        """
+        prepare_features_for_user for every tenant with bookings (or just
+        user_ids) in one query: window functions pick each tenant's latest
+        booking and count their bookings and cancellations alongside it.
+
+        Returns one row per tenant with user_id plus FEATURE_COLUMNS, ready
+        for MLPredictionService.predict_batch. Tenants without bookings are
+        left out, as prepare_features_for_user returns None for them.
+        """
+        Booking = models.Booking
+        per_user = {"partition_by": Booking.user_id}
+
+        ranked = select(
+            Booking.user_id,
+            Booking.status,
+            Booking.created_at,
+            Booking.start_date,
+            Booking.end_date,
+            func.row_number().over(
+                order_by=(Booking.created_at.desc(), Booking.id.desc()), **per_user
+            ).label("recency"),
+            func.count(Booking.id).over(**per_user).label("total_bookings"),
+            func.count(Booking.id).filter(
+                Booking.status == models.BookingStatus.CANCELLED
+            ).over(**per_user).label("cancelled"),
+        ).join(models.User, models.User.id == Booking.user_id).where(
+            models.User.role == models.UserRole.TENANT
+        )
+        if user_ids is not None:
+            ranked = ranked.where(Booking.user_id.in_(list(user_ids)))
+        ranked = ranked.subquery()
+
+        latest = select(
+            ranked.c.user_id, *MLDataService._booking_feature_columns(ranked)
+        ).where(ranked.c.recency == 1).order_by(ranked.c.user_id)
+
+        frame = MLDataService._feature_frame(db.execute(latest).all(), ['user_id'])
+        frame['user_id'] = frame['user_id'].astype(np.int64)
+        return frame
+
+    @staticmethod
+    def collect_labelled_outcomes(
+        db: Session, since: Optional[datetime] = None, until: Optional[datetime] = None,
+        window_days: int = RETENTION_WINDOW_DAYS
+    ) -> pd.DataFrame:
+        """
+        Training examples from real tenant history, one per booking: the
+        features prepare_features_for_user would have produced with that
+        booking as the tenant's latest, labelled retained = 1 if the tenant
+        booked again within window_days of its end date, else 0.
+
+        A label is known at the next booking's creation, or once the window
+        has passed without one (labelled_at). Returns the examples whose
+        labels became known in (since, until], oldest first, with
+        booking_id, user_id, FEATURE_COLUMNS, retained and labelled_at.
+        """
+        Booking = models.Booking
+        history_order = {"partition_by": Booking.user_id, "order_by": (Booking.created_at, Booking.id)}
+        up_to_here = {**history_order, "rows": (None, 0)}
+
+        history = select(
+            Booking.id.label("booking_id"),
+            Booking.user_id,
+            Booking.status,
+            Booking.created_at,
+            Booking.start_date,
+            Booking.end_date,
+            func.count(Booking.id).over(**up_to_here).label("total_bookings"),
+            func.count(Booking.id).filter(
+                Booking.status == models.BookingStatus.CANCELLED
+            ).over(**up_to_here).label("cancelled"),
+            func.lead(Booking.created_at).over(**history_order).label("next_created_at"),
+        ).join(models.User, models.User.id == Booking.user_id).where(
+            models.User.role == models.UserRole.TENANT
+        ).subquery()
+
+        deadline = history.c.end_date + timedelta(days=window_days)
+        retained = and_(history.c.next_created_at.isnot(None), history.c.next_created_at <= deadline)
+        labelled_at = case((retained, history.c.next_created_at), else_=deadline)
+
+        examples = select(
+            history.c.booking_id,
+            history.c.user_id,
+            *MLDataService._booking_feature_columns(history),
+            cast(retained, Integer).label("retained"),
+            labelled_at.label("labelled_at"),
+        ).where(labelled_at <= (until or datetime.utcnow()))
+        if since is not None:
+            examples = examples.where(labelled_at > since)
+        examples = examples.order_by(labelled_at, history.c.booking_id)
+
+        frame = MLDataService._feature_frame(
+            db.execute(examples).all(), ['booking_id', 'user_id'], ('retained', 'labelled_at')
+        )
+        frame['retained'] = frame['retained'].astype(np.int64)
+        return frame
+
+    @staticmethod
+    def labelled_outcomes_from_bookings(
+        bookings: pd.DataFrame, until: Optional[datetime] = None, window_days: int = RETENTION_WINDOW_DAYS
+    ) -> pd.DataFrame:
+        """
+        collect_labelled_outcomes over an in-memory bookings frame (id,
+        user_id, status names, created_at, start_date, end_date, all
+        tenants'), e.g. SyntheticDataService output. Same columns and labels.
+        """
+        history = bookings.sort_values(['user_id', 'created_at', 'id'])
+        by_user = history.groupby('user_id', sort=False)
+        is_cancelled = (history['status'] == models.BookingStatus.CANCELLED.name).astype(np.int64)
+
+        next_created_at = by_user['created_at'].shift(-1)
+        deadline = history['end_date'] + pd.Timedelta(days=window_days)
+        retained = next_created_at.notna() & (next_created_at <= deadline)
+        labelled_at = next_created_at.where(retained, deadline)
+
+        # Whole days, floored, as whole_days() in _booking_feature_columns
+        def whole_days(later, earlier):
+            return ((later - earlier).dt.total_seconds() // 86400).astype(np.int64)
+
+        rows = pd.DataFrame({
+            'booking_id': history['id'],
+            'user_id': history['user_id'],
+            'lead_time': whole_days(history['start_date'], history['created_at']).clip(lower=0),
+            'total_stay_nights': whole_days(history['end_date'], history['start_date']).clip(lower=1),
+            'total_bookings': by_user.cumcount() + 1,
+            'previous_cancellations': is_cancelled.groupby(history['user_id']).cumsum() - is_cancelled,
+            'arrival_date_month': history['start_date'].dt.month_name(),
+            'retained': retained.astype(np.int64),
+            'labelled_at': labelled_at,
+        })
+        rows = rows[rows['labelled_at'] <= pd.Timestamp(until or datetime.utcnow())]
+        rows = rows.sort_values(['labelled_at', 'booking_id'])
+
+        frame = MLDataService._feature_frame(rows, ['booking_id', 'user_id'], ('retained', 'labelled_at'))
+        return frame.reset_index(drop=True)
+
+    @staticmethod
+    def generate_synthetic_data(count: int, risk_mix: Optional[dict] = None, seed: Optional[int] = None) -> pd.DataFrame:
+        """
+        Labelled examples (as collect_labelled_outcomes) from the generated
+        history of `count` synthetic users (every 50th an owner). Nothing
+        is written to the database.
+        """
+        # About 3 bookings per tenant at the default risk mix
+        tables = SyntheticDataService.generate(
+            users=count, properties=max(1, count // 20), bookings=3 * count,
+            risk_mix=risk_mix, seed=seed if seed is not None else int(datetime.utcnow().timestamp()),
+        )
+        return MLDataService.labelled_outcomes_from_bookings(tables['bookings'])
 
     @staticmethod
     def collect_retention_features(db: Session) -> pd.DataFrame:
         """
         Batch collection for the 'predict-all' endpoint
         """
-        users = db.query(models.User).filter(
-            models.User.role == models.UserRole.TENANT
-        ).all()
-        
-        data = []
-        for user in users:
-            features = MLDataService.prepare_features_for_user(db, user)
-            if features:
-                # Add user_id to track who this row belongs to (removed before prediction)
-                features['user_id'] = user.id 
-                data.append(features)
-        
-        return pd.DataFrame(data)
\ No newline at end of file
+        # user_id tracks who each row belongs to (removed before prediction)
+        return MLDataService.collect_features_bulk(db)
@@ -1,146 +1,225 @@
 import joblib
+import json
 import pandas as pd
 import numpy as np
 import os
+import threading
+import time
 from datetime import datetime
+from typing import Optional
+from app.services.model_registry import ModelRegistry
+from app.services.compiled_model import COMPILED_FILE, CompiledModel
+from app.services.drift_service import DRIFT_MONITOR_ENABLED, DriftMonitor
 
-print(f"🔍 Current working directory: {os.getcwd()}")
-print(f"🔍 Files in current dir: {os.listdir('.')}")
-print(f"🔍 Checking if 'ml' exists: {os.path.exists('ml')}")
-print(f"🔍 Checking if 'app' exists: {os.path.exists('app')}")
+# Drift reference for the legacy flat-file model (register_model.py --legacy-profile)
+REFERENCE_PROFILE_FILE = "reference_profile.json"
+
+# How often each process checks the registry's ACTIVE pointer
+RELOAD_CHECK_SECONDS = float(os.getenv("ML_RELOAD_CHECK_SECONDS", "5"))
+
+# Model inputs, in training order
+SELECTED_FEATURES = [
+    'lead_time', 'total_stay_nights', 'is_repeated_guest',
+    'previous_bookings_total', 'booking_changes',
+    'adr', 'adr_per_person', 'deposit_given',
+    'total_of_special_requests', 'has_special_requests',
+    'adults', 'children', 'babies',
+    # Categorical
+    'hotel', 'arrival_date_month', 'meal', 'market_segment',
+    'distribution_channel', 'customer_type', 'guest_type'
+]
+
+CATEGORICAL_FEATURES = ['hotel', 'arrival_date_month', 'meal', 'market_segment',
+                        'distribution_channel', 'customer_type', 'guest_type']
 
 class MLPredictionService:
-    def __init__(self):
-        # ✅ FIX: Use relative path from where FastAPI runs
-        # When running "uvicorn main:app" from backend/, the cwd is already backend/
-        self.model_dir = "ml/models"  # NOT "backend/ml/models"
+    """
+    Retention scoring with the registry's ACTIVE model version.
+
+    Nothing is loaded until the first prediction. After that the ACTIVE
+    pointer is stat()ed at most every RELOAD_CHECK_SECONDS, and a newly
+    promoted version is loaded and swapped in as one reference, so every
+    worker process picks it up without a restart and requests in flight
+    finish on the version they started with.
+
+    Without a promoted version it falls back to the flat files in
+    model_dir (random_forest_model.pkl / label_encoders.pkl).
+    """
+
+    def __init__(self, model_dir: str = "ml/models", registry: Optional[ModelRegistry] = None):
+        # Relative to backend/, where uvicorn and the scripts run from
+        self.model_dir = model_dir
+        self.registry = registry or ModelRegistry(os.path.join(model_dir, "registry"))
         
         self.model_path = os.path.join(self.model_dir, "random_forest_model.pkl")
         self.encoders_path = os.path.join(self.model_dir, "label_encoders.pkl")
+        self.reference_profile_path = os.path.join(self.model_dir, REFERENCE_PROFILE_FILE)
+        
+        self._state = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
         
-        self.model = None
-        self.label_encoders = None
-        self._load_artifacts()
+        # Live input drift of the rows this process scores (ML_DRIFT_MONITOR=0 turns it off)
+        self.monitor = DriftMonitor(self, SELECTED_FEATURES) if DRIFT_MONITOR_ENABLED else None
 
-    def _load_artifacts(self):
-        """Load the trained model and label encoders"""
+    def _load_legacy(self) -> dict:
+        """The pre-registry flat files, when nothing has been promoted"""
+        state = {
+            "source": "legacy", "version": None, "model": None, "label_encoders": None,
+            "manifest": None, "compiled": None, "reference_profile": None,
+        }
         try:
-            print(f"🔍 Looking for model at: {os.path.abspath(self.model_path)}")
-            
             if os.path.exists(self.model_path):
-                self.model = joblib.load(self.model_path)
+                state["model"] = joblib.load(self.model_path)
+                modified = datetime.utcfromtimestamp(os.path.getmtime(self.model_path))
+                state["version"] = f"{os.path.basename(self.model_path)}@{modified:%Y%m%dT%H%M%S}"
                 print(f"✅ ML Model loaded from {self.model_path}")
             else:
                 print(f"❌ Model file not found at: {os.path.abspath(self.model_path)}")
             
             if os.path.exists(self.encoders_path):
-                self.label_encoders = joblib.load(self.encoders_path)
+                state["label_encoders"] = joblib.load(self.encoders_path)
                 print(f"✅ Label Encoders loaded from {self.encoders_path}")
             else:
                 print(f"❌ Encoders file not found at: {os.path.abspath(self.encoders_path)}")
+            
+            if os.path.exists(self.reference_profile_path):
+                with open(self.reference_profile_path) as f:
+                    state["reference_profile"] = json.load(f)
                 
         except Exception as e:
             print(f"❌ Error loading ML artifacts: {str(e)}")
             import traceback
             traceback.print_exc()
+        return state
+
+    def _load(self, stamp) -> dict:
+        active = self.registry.get_active()
+        if not active:
+            state = self._load_legacy()
+        else:
+            try:
+                model, label_encoders, manifest = self.registry.load(active["version"])
+                compiled = None
+                if COMPILED_FILE in manifest["files"]:
+                    compiled = CompiledModel.load(os.path.join(self.registry.version_dir(active["version"]), COMPILED_FILE))
+                state = {
+                    "source": "registry", "version": active["version"], "model": model,
+                    "label_encoders": label_encoders, "manifest": manifest, "compiled": compiled,
+                }
+                print(f"✅ ML model version {active['version']} loaded")
+            except Exception as e:
+                # Keep serving the version we have; retried when ACTIVE changes again
+                print(f"❌ Error loading model version {active['version']}: {str(e)}")
+                state = dict(self._state) if self._state else self._load_legacy()
+        
+        state.update(stamp=stamp, loaded_at=datetime.utcnow())
+        return state
+
+    def _current(self) -> dict:
+        """The loaded model state, (re)loading if ACTIVE moved since the last check"""
+        state = self._state
+        now = time.monotonic()
+        if state is not None and now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return state
+        
+        self._checked_at = now
+        stamp = self.registry.pointer_stamp()
+        if state is not None and stamp == state["stamp"]:
+            return state
+        
+        with self._lock:
+            if self._state is None or self._state["stamp"] != stamp:
+                # One assignment: concurrent readers see the old or the new state, never a mix
+                self._state = self._load(stamp)
+            return self._state
+
+    def reload(self):
+        """Check ACTIVE now instead of waiting for the next poll"""
+        self._checked_at = 0.0
+        return self._current()
+
+    def explained_state(self) -> dict:
+        """
+        The loaded model state with its explainer (ExplanationService) under
+        "explainer", built once per loaded version and dropped with it
+        """
+        state = self._current()
+        if "explainer" in state:
+            return state
+
+        # Imported here: explanation_service imports this module
+        from app.services.explanation_service import ContributionExplainer
+        state = {**state, "explainer": ContributionExplainer.for_model(state["model"]) if state["model"] else None}
+        with self._lock:
+            # Not cached if the model was swapped while we were building it
+            current = self._state
+            if current is not None and current["model"] is state["model"] and "explainer" not in current:
+                self._state = {**current, "explainer": state["explainer"]}
+        return state
+
+    @property
+    def model(self):
+        return self._current()["model"]
+
+    @model.setter
+    def model(self, value):
+        # The explainer (ExplanationService) and the compiled evaluator belong
+        # to the old model; predict_one falls back to predict_batch until a
+        # matching evaluator is set
+        state = {key: item for key, item in self._current().items() if key != "explainer"}
+        self._state = {**state, "model": value, "compiled": None}
+
+    @property
+    def label_encoders(self):
+        return self._current()["label_encoders"]
+
+    @label_encoders.setter
+    def label_encoders(self, value):
+        state = {key: item for key, item in self._current().items() if key != "codes"}
+        self._state = {**state, "label_encoders": value}
+
+    @property
+    def compiled(self) -> Optional[CompiledModel]:
+        return self._current()["compiled"]
+
+    @compiled.setter
+    def compiled(self, value):
+        self._state = {**self._current(), "compiled": value}
+
+    @property
+    def model_version(self) -> Optional[str]:
+        """Identifies which model produced a persisted score"""
+        return self._current()["version"]
 
-    def predict_retention(self, raw_data: dict) -> dict:
+    def get_model_info(self) -> dict:
+        state = self._current()
+        manifest = state["manifest"] or {}
+        active = self.registry.get_active()
+        return {
+            "status": "active" if state["model"] is not None and state["label_encoders"] else "not_loaded",
+            "source": state["source"],
+            "version": state["version"],
+            "model_type": type(state["model"]).__name__ if state["model"] is not None else None,
+            "compiled": state["compiled"] is not None,
+            "loaded_at": state["loaded_at"].isoformat(),
+            "promoted_at": active["promoted_at"] if active else None,
+            "previous_version": active["previous"] if active else None,
+            "created_at": manifest.get("created_at"),
+            "metadata": manifest.get("metadata", {}),
+            "features": SELECTED_FEATURES,
+        }
+
+    def predict_retention(self, raw_data: dict, observe: bool = True) -> dict:
         """
         Preprocesses raw DB data and generates a prediction.
+        observe=False keeps offline sweeps out of the drift monitor.
         """
         if not self.model or not self.label_encoders:
             return {"error": "Model not loaded", "risk_score": 0, "will_retain": True}
 
         try:
-            # 1. Convert dict to DataFrame
-            df = pd.DataFrame([raw_data])
-            
-            # 2. FEATURE ENGINEERING (Must match your training script)
-            
-            # Total Stay Duration
-            if 'total_stay_nights' not in df.columns:
-                df['total_stay_nights'] = df.get('stays_in_weekend_nights', 0) + df.get('stays_in_week_nights', 1)
-
-            # Booking Lead Time Categories
-            lead_val = df['lead_time'].iloc[0]
-            if lead_val <= 7: cat = 'Last_Minute'
-            elif lead_val <= 30: cat = 'Short_Term'
-            elif lead_val <= 90: cat = 'Medium_Term'
-            else: cat = 'Long_Term'
-            df['lead_time_category'] = cat
-
-            # ADR Per Person
-            adults = df.get('adults', 1).iloc[0]
-            children = df.get('children', 0).iloc[0]
-            df['adr_per_person'] = df['adr'] / (adults + children + 0.1)
-
-            # Boolean Flags
-            df['has_special_requests'] = (df['total_of_special_requests'] > 0).astype(int)
-            df['has_booking_changes'] = (df['booking_changes'] > 0).astype(int)
-            df['is_repeated_guest'] = df['is_repeated_guest'].astype(int)
-            
-            # Previous Bookings
-            df['previous_bookings_total'] = df.get('previous_cancellations', 0) + df.get('previous_bookings_not_canceled', 0)
-
-            # Guest Type
-            def get_guest_type(row):
-                if row.get('children', 0) > 0 or row.get('babies', 0) > 0: return 'Family'
-                if row.get('adults', 1) >= 2: return 'Couple'
-                return 'Single'
-            df['guest_type'] = df.apply(get_guest_type, axis=1)
-
-            # Deposit Given
-            df['deposit_given'] = (df['deposit_type'] != 'No Deposit').astype(int)
-            
-            # 3. FEATURE SELECTION (Must match training)
-            selected_features = [
-                'lead_time', 'total_stay_nights', 'is_repeated_guest',
-                'previous_bookings_total', 'booking_changes',
-                'adr', 'adr_per_person', 'deposit_given',
-                'total_of_special_requests', 'has_special_requests',
-                'adults', 'children', 'babies',
-                # Categorical
-                'hotel', 'arrival_date_month', 'meal', 'market_segment',
-                'distribution_channel', 'customer_type', 'guest_type'
-            ]
-            
-            # Ensure all columns exist
-            for col in selected_features:
-                if col not in df.columns:
-                    df[col] = 0 if col not in ['hotel', 'meal', 'market_segment', 'distribution_channel', 'customer_type', 'guest_type'] else 'Undefined'
-
-            X = df[selected_features].copy()
-
-            # 4. ENCODING
-            categorical_cols = ['hotel', 'arrival_date_month', 'meal', 'market_segment',
-                               'distribution_channel', 'customer_type', 'guest_type']
-                               
-            for col in categorical_cols:
-                le = self.label_encoders.get(col)
-                if le:
-                    val = str(X[col].iloc[0])
-                    if val in le.classes_:
-                        X[col] = le.transform([val])[0]
-                    else:
-                        X[col] = 0  # Unknown category
-
-            # 5. PREDICTION
-            prediction_class = self.model.predict(X)[0]
-            probabilities = self.model.predict_proba(X)[0]
-            
-            churn_prob = probabilities[1]
-            retain_prob = probabilities[0]
-            
-            risk_score = int(churn_prob * 100)
-            
-            return {
-                'will_retain': bool(prediction_class == 0),
-                'churn_probability': float(churn_prob),
-                'retention_probability': float(retain_prob),
-                'risk_score': risk_score,
-                'risk_level': 'High' if risk_score > 70 else 'Medium' if risk_score > 40 else 'Low',
-                'recommendation': self._get_recommendation(risk_score)
-            }
+            return self.predict_one(raw_data, observe=observe)
             
         except Exception as e:
             print(f"❌ ERROR in predict_retention: {str(e)}")
@@ -148,6 +227,171 @@ class MLPredictionService:
             traceback.print_exc()
             return {"error": str(e), "risk_score": 0, "will_retain": True}
 
+    def predict_one(self, raw_data: dict, observe: bool = True) -> dict:
+        """
+        Score one feature dict. Uses the version's compiled evaluator when
+        it has one (plain Python features, no pandas or sklearn call), else
+        a one-row predict_batch. Same results either way.
+        """
+        state = self._current()
+        if state["compiled"] is None:
+            prediction = self.predict_batch(pd.DataFrame([raw_data]), observe=observe).iloc[0]
+            return {
+                'will_retain': bool(prediction['will_retain']),
+                'churn_probability': float(prediction['churn_probability']),
+                'retention_probability': float(prediction['retention_probability']),
+                'risk_score': int(prediction['risk_score']),
+                'risk_level': prediction['risk_level'],
+                'recommendation': prediction['recommendation']
+            }
+
+        compiled = state["compiled"]
+        row = self._engineer_row(raw_data, self._category_codes(state))
+        if observe and self.monitor is not None:
+            self.monitor.observe_row(state, row)
+        probabilities = compiled.predict_proba(row)
+        churn_prob = float(probabilities[1])
+        risk_score = int(churn_prob * 100)
+        return {
+            'will_retain': bool(compiled.classes[probabilities.argmax()] == 0),
+            'churn_probability': churn_prob,
+            'retention_probability': float(probabilities[0]),
+            'risk_score': risk_score,
+            'risk_level': 'High' if risk_score > 70 else 'Medium' if risk_score > 40 else 'Low',
+            'recommendation': self._get_recommendation(risk_score)
+        }
+
+    @staticmethod
+    def _category_codes(state: dict) -> dict:
+        # value -> code per categorical column, built once per loaded version
+        if "codes" not in state:
+            encoders = state["label_encoders"]
+            state["codes"] = {
+                col: {value: code for code, value in enumerate(encoders[col].classes_)}
+                for col in CATEGORICAL_FEATURES if encoders.get(col)
+            }
+        return state["codes"]
+
+    @staticmethod
+    def _engineer_row(raw: dict, codes: dict) -> list:
+        """_engineer_features for a single dict, in plain Python: the model input vector"""
+        adults = raw.get('adults', 1)
+        children = raw.get('children', 0)
+        babies = raw.get('babies', 0)
+
+        values = dict(raw)
+        if 'total_stay_nights' not in values:
+            values['total_stay_nights'] = raw.get('stays_in_weekend_nights', 0) + raw.get('stays_in_week_nights', 1)
+        values['adr_per_person'] = raw['adr'] / (adults + children + 0.1)
+        values['has_special_requests'] = int(raw['total_of_special_requests'] > 0)
+        values['is_repeated_guest'] = int(raw['is_repeated_guest'])
+        values['previous_bookings_total'] = raw.get('previous_cancellations', 0) + raw.get('previous_bookings_not_canceled', 0)
+        if children > 0 or babies > 0:
+            values['guest_type'] = 'Family'
+        else:
+            values['guest_type'] = 'Couple' if adults >= 2 else 'Single'
+        values['deposit_given'] = int(raw['deposit_type'] != 'No Deposit')
+
+        row = []
+        for col in SELECTED_FEATURES:
+            value = values.get(col, 'Undefined' if col in CATEGORICAL_FEATURES and col != 'arrival_date_month' else 0)
+            if col in codes:
+                # Unknown categories become 0, as in _engineer_features
+                value = codes[col].get(str(value), 0)
+            row.append(float(value))
+        return row
+
+    def _engineer_features(self, df: pd.DataFrame, label_encoders: Optional[dict] = None) -> pd.DataFrame:
+        """
+        Same feature engineering and encoding as predict_retention, done
+        column-wise for a whole frame. Returns the encoded model input.
+        """
+        label_encoders = label_encoders if label_encoders is not None else self.label_encoders
+        df = df.copy()
+
+        def column(name, default):
+            return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+        adults = column('adults', 1)
+        children = column('children', 0)
+        babies = column('babies', 0)
+
+        if 'total_stay_nights' not in df.columns:
+            df['total_stay_nights'] = column('stays_in_weekend_nights', 0) + column('stays_in_week_nights', 1)
+
+        lead_time = df['lead_time']
+        df['lead_time_category'] = np.select(
+            [lead_time <= 7, lead_time <= 30, lead_time <= 90],
+            ['Last_Minute', 'Short_Term', 'Medium_Term'],
+            default='Long_Term'
+        )
+
+        df['adr_per_person'] = df['adr'] / (adults + children + 0.1)
+        df['has_special_requests'] = (df['total_of_special_requests'] > 0).astype(int)
+        df['has_booking_changes'] = (df['booking_changes'] > 0).astype(int)
+        df['is_repeated_guest'] = df['is_repeated_guest'].astype(int)
+        df['previous_bookings_total'] = column('previous_cancellations', 0) + column('previous_bookings_not_canceled', 0)
+        df['guest_type'] = np.where(
+            (children > 0) | (babies > 0), 'Family',
+            np.where(adults >= 2, 'Couple', 'Single')
+        )
+        df['deposit_given'] = (df['deposit_type'] != 'No Deposit').astype(int)
+
+        for col in SELECTED_FEATURES:
+            if col not in df.columns:
+                df[col] = 'Undefined' if col in CATEGORICAL_FEATURES and col != 'arrival_date_month' else 0
+
+        X = df[SELECTED_FEATURES].copy()
+
+        # Label-encode through a lookup table; unknown categories become 0
+        for col in CATEGORICAL_FEATURES:
+            le = label_encoders.get(col)
+            if le:
+                codes = {value: code for code, value in enumerate(le.classes_)}
+                X[col] = X[col].astype(str).map(codes).fillna(0).astype(int)
+
+        return X
+
+    def predict_batch(self, features: pd.DataFrame, observe: bool = True) -> pd.DataFrame:
+        """
+        Score N feature rows (prepare_features_for_user dicts as a frame)
+        with one predict_proba call. Returns a frame on the same index with
+        will_retain, churn/retention probabilities, risk score/level and
+        recommendation. Offline scoring of the whole population passes
+        observe=False: the drift monitor should only see request traffic.
+        """
+        # One state for the whole batch, even if a reload swaps it meanwhile
+        state = self._current()
+        model, label_encoders = state["model"], state["label_encoders"]
+        if not model or not label_encoders:
+            raise RuntimeError("Model not loaded")
+
+        if features.empty:
+            return pd.DataFrame(columns=[
+                'will_retain', 'churn_probability', 'retention_probability',
+                'risk_score', 'risk_level', 'recommendation'
+            ])
+
+        X = self._engineer_features(features, label_encoders)
+        if observe and self.monitor is not None:
+            self.monitor.observe(state, X.to_numpy(dtype=np.float64))
+        probabilities = model.predict_proba(X)
+
+        # The predicted class is the most probable one, as in model.predict
+        predicted = model.classes_[probabilities.argmax(axis=1)]
+        churn_prob = probabilities[:, 1]
+        risk_score = (churn_prob * 100).astype(int)
+        risk_level = np.select([risk_score > 70, risk_score > 40], ['High', 'Medium'], default='Low')
+
+        return pd.DataFrame({
+            'will_retain': predicted == 0,
+            'churn_probability': churn_prob,
+            'retention_probability': probabilities[:, 0],
+            'risk_score': risk_score,
+            'risk_level': risk_level,
+            'recommendation': [self._get_recommendation(score) for score in risk_score],
+        }, index=features.index)
+
     def _get_recommendation(self, risk_score):
         if risk_score > 70:
             return "Urgent: Contact tenant. Offer discount or loyalty perk."
@@ -0,0 +1,151 @@
+"""
+Versioned retention model artifacts.
+
+Layout under the registry root (default backend/ml/models/registry):
+
+    versions/<version>/manifest.json
+    versions/<version>/model.pkl
+    versions/<version>/label_encoders.pkl
+    ACTIVE
+
+A version directory is written under a temporary name and renamed into
+place, so readers never see a half-written version. ACTIVE names the
+promoted version and is replaced with os.replace, so every process sees
+either the old or the new pointer; MLPredictionService polls its mtime
+to hot-reload.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Optional
+
+import joblib
+
+MODEL_FILE = "model.pkl"
+ENCODERS_FILE = "label_encoders.pkl"
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _write_json(path: str, data: dict):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(path + ".tmp", path)
+
+class ModelRegistry:
+    """Registers, lists, loads and promotes model versions under one root"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.pointer_path = os.path.join(root, "ACTIVE")
+
+    def version_dir(self, version: str) -> str:
+        # Version ids are directory names: refuse anything that could escape the root
+        if not version or os.path.basename(version) != version or version.startswith("."):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.versions_dir, version)
+
+    def get_manifest(self, version: str) -> Optional[dict]:
+        path = os.path.join(self.version_dir(version), "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def list_versions(self) -> list:
+        """Manifests of every registered version, newest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        manifests = [
+            self.get_manifest(name) for name in os.listdir(self.versions_dir) if not name.startswith(".")
+        ]
+        return sorted(filter(None, manifests), key=lambda m: m["created_at"], reverse=True)
+
+    def register(self, model_path: str, encoders_path: str, metadata: dict = None, extra_files: dict = None) -> dict:
+        """
+        Copy a trained model and its label encoders (plus any extra_files,
+        {name: path}) into a new version. Does not promote it. Returns the
+        manifest.
+        """
+        created_at = datetime.utcnow()
+        version = created_at.strftime("v%Y%m%dT%H%M%S")
+        suffix = 1
+        while os.path.exists(os.path.join(self.versions_dir, version)):
+            suffix += 1
+            version = created_at.strftime("v%Y%m%dT%H%M%S") + f"-{suffix}"
+
+        staging = os.path.join(self.versions_dir, f".tmp-{version}")
+        os.makedirs(staging)
+        try:
+            sources = {MODEL_FILE: model_path, ENCODERS_FILE: encoders_path, **(extra_files or {})}
+            for name, source in sources.items():
+                shutil.copyfile(source, os.path.join(staging, name))
+
+            manifest = {
+                "version": version,
+                "created_at": created_at.isoformat(),
+                "model_type": type(joblib.load(os.path.join(staging, MODEL_FILE))).__name__,
+                "files": {name: _sha256(os.path.join(staging, name)) for name in sources},
+                "metadata": metadata or {},
+            }
+            _write_json(os.path.join(staging, "manifest.json"), manifest)
+            os.rename(staging, os.path.join(self.versions_dir, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        return manifest
+
+    def load(self, version: str) -> tuple:
+        """(model, label_encoders, manifest) of a version; checks file hashes"""
+        manifest = self.get_manifest(version)
+        if manifest is None:
+            raise LookupError(f"Model version {version} not found")
+
+        directory = self.version_dir(version)
+        for name, expected in manifest["files"].items():
+            if _sha256(os.path.join(directory, name)) != expected:
+                raise ValueError(f"Model version {version}: {name} does not match its manifest")
+
+        model = joblib.load(os.path.join(directory, MODEL_FILE))
+        label_encoders = joblib.load(os.path.join(directory, ENCODERS_FILE))
+        return model, label_encoders, manifest
+
+    def get_active(self) -> Optional[dict]:
+        """The ACTIVE pointer ({version, promoted_at, previous}) or None"""
+        if not os.path.exists(self.pointer_path):
+            return None
+        with open(self.pointer_path) as f:
+            return json.load(f)
+
+    def pointer_stamp(self) -> Optional[tuple]:
+        """Changes whenever ACTIVE is replaced; cheap enough to poll"""
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        # os.replace gives the pointer a new inode even within one mtime tick
+        return stat.st_mtime_ns, stat.st_ino
+
+    def promote(self, version: str) -> dict:
+        """
+        Make a version active. It is loaded first, so a broken version is
+        refused (LookupError / ValueError) before any process switches.
+        """
+        self.load(version)
+        active = self.get_active()
+        pointer = {
+            "version": version,
+            "promoted_at": datetime.utcnow().isoformat(),
+            "previous": active["version"] if active else None,
+        }
+        _write_json(self.pointer_path, pointer)
+        return pointer
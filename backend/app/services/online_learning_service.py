@@ -0,0 +1,255 @@
+"""
+Retention model updates from live booking outcomes.
+
+Incremental: OnlineLearningService.update reads the tenant outcomes
+labelled since the job's watermark (MLDataService.collect_labelled_outcomes),
+continues the newest online version - a StandardScaler + SGDClassifier
+(log loss) pipeline - with partial_fit, and registers the result as a new
+registry version. The first update starts a fresh pipeline with the
+active model's label encoders, so encodings stay compatible.
+
+Full: OnlineLearningService.full_retrain runs the RetentionPredictor
+pipeline from ml/train_model.py on every labelled outcome and registers
+the best model. retrain_if_drifted only does so when the live tenant
+features have drifted from the active version's reference profile.
+
+Labels follow the serving convention: class 1 is churn (the tenant did not
+book again within the retention window).
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+from typing import Optional
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import f1_score, log_loss
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sqlalchemy.orm import Session
+
+from app.services.compiled_model import COMPILED_FILE, CompiledModel
+from app.services.drift_service import PSI_DRIFT_THRESHOLD, DriftService
+from app.services.job_state_service import JobStateService
+from app.services.ml_data_service import FEATURE_COLUMNS, MLDataService
+from app.services.model_registry import MODEL_FILE, ENCODERS_FILE
+
+ONLINE_JOB = "online_retention_learner"
+ONLINE_LEARNER = "sgd_online"
+FULL_LEARNER = "full_retrain"
+PARTIAL_FIT_CHUNK_ROWS = int(os.getenv("ONLINE_PARTIAL_FIT_CHUNK_ROWS", "5000"))
+# labelled_at can be a booking's created_at, stamped in Python before its
+# transaction commits; the watermark trails now by this much so a booking
+# committed late is still inside the next update's window
+ONLINE_SAFETY_LAG_SECONDS = int(os.getenv("ONLINE_SAFETY_LAG_SECONDS", "300"))
+
+def _new_pipeline() -> Pipeline:
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("model", SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)),
+    ])
+
+def _register(ml_service, model, label_encoders: dict, metadata: dict, compiled: Optional[CompiledModel]) -> dict:
+    with tempfile.TemporaryDirectory() as work_dir:
+        model_path = os.path.join(work_dir, MODEL_FILE)
+        encoders_path = os.path.join(work_dir, ENCODERS_FILE)
+        joblib.dump(model, model_path)
+        joblib.dump(label_encoders, encoders_path)
+
+        extra_files = {}
+        if compiled is not None:
+            extra_files[COMPILED_FILE] = os.path.join(work_dir, COMPILED_FILE)
+            compiled.save(extra_files[COMPILED_FILE])
+
+        return ml_service.registry.register(model_path, encoders_path, metadata=metadata, extra_files=extra_files)
+
+def _pipeline_compiled(pipeline: Pipeline) -> Optional[CompiledModel]:
+    try:
+        return CompiledModel.export(pipeline.named_steps["model"], pipeline.named_steps["scaler"])
+    except ValueError:
+        return None
+
+class OnlineLearningService:
+    @staticmethod
+    def latest_online_version(registry) -> Optional[dict]:
+        """Manifest of the newest version produced by update(), or None"""
+        for manifest in registry.list_versions():
+            if manifest["metadata"].get("learner") == ONLINE_LEARNER:
+                return manifest
+        return None
+
+    @staticmethod
+    def update(db: Session, ml_service, promote: bool = False, until: Optional[datetime] = None) -> dict:
+        """
+        partial_fit the online model on outcomes labelled since the
+        watermark, register it and move the watermark to until
+        (default: now - ONLINE_SAFETY_LAG_SECONDS).
+        Each chunk is scored before it is learnt from, so the returned
+        prequential metrics are out-of-sample. Commits.
+        """
+        until = until or datetime.utcnow() - timedelta(seconds=ONLINE_SAFETY_LAG_SECONDS)
+        watermark = JobStateService.get_watermark(db, ONLINE_JOB)
+        since = datetime.fromisoformat(watermark) if watermark else None
+        if since is not None and until < since:
+            until = since
+
+        base = OnlineLearningService.latest_online_version(ml_service.registry)
+        if base:
+            pipeline, label_encoders, _ = ml_service.registry.load(base["version"])
+            samples_seen = base["metadata"].get("samples_seen", 0)
+        else:
+            label_encoders = ml_service.label_encoders
+            if not label_encoders:
+                raise RuntimeError("No label encoders: train or register a model first")
+            pipeline, samples_seen = _new_pipeline(), 0
+
+        outcomes = MLDataService.collect_labelled_outcomes(db, since=since, until=until)
+        if outcomes.empty:
+            return {"status": "no_new_outcomes", "since": watermark, "until": until.isoformat()}
+
+        X = ml_service._engineer_features(outcomes[FEATURE_COLUMNS], label_encoders)
+        y = (1 - outcomes["retained"]).to_numpy()
+        scaler, model = pipeline.named_steps["scaler"], pipeline.named_steps["model"]
+
+        scored, predicted, churn_proba = [], [], []
+        for start in range(0, len(X), PARTIAL_FIT_CHUNK_ROWS):
+            X_chunk = X.iloc[start:start + PARTIAL_FIT_CHUNK_ROWS]
+            y_chunk = y[start:start + PARTIAL_FIT_CHUNK_ROWS]
+
+            if hasattr(model, "coef_"):
+                proba = pipeline.predict_proba(X_chunk)
+                scored.append(y_chunk)
+                predicted.append(model.classes_[proba.argmax(axis=1)])
+                churn_proba.append(proba[:, 1])
+
+            scaler.partial_fit(X_chunk)
+            model.partial_fit(scaler.transform(X_chunk), y_chunk, classes=np.array([0, 1]))
+
+        prequential = None
+        if scored:
+            y_scored = np.concatenate(scored)
+            prequential = {
+                "rows": int(len(y_scored)),
+                "f1": float(f1_score(y_scored, np.concatenate(predicted), zero_division=0)),
+                "log_loss": float(log_loss(y_scored, np.concatenate(churn_proba), labels=[0, 1])),
+            }
+
+        manifest = _register(ml_service, pipeline, label_encoders, metadata={
+            "learner": ONLINE_LEARNER,
+            "parent": base["version"] if base else None,
+            "samples_seen": samples_seen + len(X),
+            "batch_rows": len(X),
+            "since": watermark,
+            "until": until.isoformat(),
+            "prequential": prequential,
+            # Drift reference: the data the lineage started from
+            "reference_profile": base["metadata"].get("reference_profile") if base else DriftService.profile(X),
+        }, compiled=_pipeline_compiled(pipeline))
+
+        if promote:
+            ml_service.registry.promote(manifest["version"])
+
+        summary = {
+            "status": "updated",
+            "version": manifest["version"],
+            "promoted": promote,
+            "rows": len(X),
+            "samples_seen": manifest["metadata"]["samples_seen"],
+            "prequential": prequential,
+        }
+        JobStateService.set_watermark(db, ONLINE_JOB, until.isoformat(), details=summary)
+        db.commit()
+        return summary
+
+    @staticmethod
+    def check_drift(db: Session, ml_service) -> dict:
+        """PSI of the live tenant features against the active model's reference profile"""
+        state = ml_service._current()
+        profile = ((state.get("manifest") or {}).get("metadata") or {}).get("reference_profile")
+        if not profile:
+            return {"status": "no_reference", "drifted": False}
+
+        live = MLDataService.collect_features_bulk(db)
+        if live.empty:
+            return {"status": "no_data", "drifted": False}
+
+        X = ml_service._engineer_features(live[FEATURE_COLUMNS], state["label_encoders"])
+        scores = DriftService.compare(profile, X)
+        worst = max(scores, key=scores.get)
+        return {
+            "status": "ok",
+            "drifted": scores[worst] > PSI_DRIFT_THRESHOLD,
+            "threshold": PSI_DRIFT_THRESHOLD,
+            "max_feature": worst,
+            "max_psi": scores[worst],
+            "psi": scores,
+        }
+
+    @staticmethod
+    def full_retrain(db: Session, ml_service, promote: bool = False, budget_seconds: float = 120,
+                     n_iter: int = 60, trigger: Optional[dict] = None) -> dict:
+        """
+        Retrain from scratch on every labelled outcome with the
+        RetentionPredictor pipeline (budgeted search) and register the best
+        model, behind its scaler, as a new version.
+        """
+        # Training-only dependencies (matplotlib, seaborn, scipy)
+        from ml.train_model import RetentionPredictor
+
+        label_encoders = ml_service.label_encoders
+        if not label_encoders:
+            raise RuntimeError("No label encoders: train or register a model first")
+
+        outcomes = MLDataService.collect_labelled_outcomes(db)
+        if outcomes.empty or outcomes["retained"].nunique() < 2:
+            return {"status": "not_enough_data", "rows": len(outcomes)}
+
+        X = ml_service._engineer_features(outcomes[FEATURE_COLUMNS], label_encoders)
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            data_path = os.path.join(work_dir, "outcomes.csv")
+            X.assign(churned=(1 - outcomes["retained"]).to_numpy()).to_csv(data_path, index=False)
+
+            predictor = RetentionPredictor(
+                data_path=data_path, target_column="churned",
+                models_dir=os.path.join(work_dir, "models"), plots_dir=os.path.join(work_dir, "plots"),
+            )
+            best_name, best = predictor.train_all(mode="budgeted", budget_seconds=budget_seconds, n_iter=n_iter)
+
+        pipeline = Pipeline([("scaler", predictor.scaler), ("model", best)])
+        try:
+            compiled = CompiledModel.export(best, predictor.scaler)
+        except ValueError:
+            compiled = None
+
+        manifest = _register(ml_service, pipeline, label_encoders, metadata={
+            "learner": FULL_LEARNER,
+            "model_name": best_name,
+            "rows": len(X),
+            "performance": {k: float(v) for k, v in predictor.results[best_name].items()
+                            if isinstance(v, (int, float, np.number))},
+            "trigger": trigger,
+            "reference_profile": DriftService.profile(X),
+        }, compiled=compiled)
+
+        if promote:
+            ml_service.registry.promote(manifest["version"])
+
+        return {
+            "status": "retrained",
+            "version": manifest["version"],
+            "promoted": promote,
+            "model_name": best_name,
+            "rows": len(X),
+        }
+
+    @staticmethod
+    def retrain_if_drifted(db: Session, ml_service, promote: bool = False, **train_options) -> dict:
+        drift = OnlineLearningService.check_drift(db, ml_service)
+        if not drift["drifted"]:
+            return {"status": "no_drift", "drift": drift}
+
+        trigger = {key: drift[key] for key in ("max_feature", "max_psi", "threshold")}
+        return OnlineLearningService.full_retrain(db, ml_service, promote=promote, trigger=trigger, **train_options)
@@ -9,6 +9,15 @@ load_dotenv()
 
 # ✅ Get key from .env (No hardcoded fallback)
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
+
+# ✅ PAYMENT_GATEWAY=simulator swaps Stripe for the offline simulator (load/soak tests)
+if os.getenv("PAYMENT_GATEWAY", "stripe") == "simulator":
+    from app.services.gateway_simulator import SimulatedGateway
+    gateway = SimulatedGateway.from_env()
+    webhook_secret = gateway.webhook_secret
+else:
+    gateway = stripe
 
 class PaymentService:
     
@@ -31,7 +40,7 @@ class PaymentService:
                 stripe_method_types = ['card']
 
             # 2. Create the Intent
-            intent = stripe.PaymentIntent.create(
+            intent = gateway.PaymentIntent.create(
                 amount=int(amount * 100),  # Convert to centavos (e.g. 100.00 -> 10000)
                 currency=currency.lower(),
                 payment_method_types=stripe_method_types,
@@ -63,7 +72,7 @@ class PaymentService:
         Confirm a payment by checking its status
         """
         try:
-            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            intent = gateway.PaymentIntent.retrieve(payment_intent_id)
             
             # Check if paid
             is_paid = intent.status == 'succeeded'
@@ -86,6 +95,49 @@ class PaymentService:
                 'error': str(e),
             }
             
+    @staticmethod
+    def cancel_payment_intent(payment_intent_id: str):
+        """
+        Cancel an open Payment Intent so it can no longer be paid.
+        If the gateway refuses (e.g. it succeeded meanwhile), 'status' is
+        the intent's current status when it could be read.
+        """
+        try:
+            intent = gateway.PaymentIntent.cancel(payment_intent_id)
+            return {
+                'success': True,
+                'status': intent.status,
+            }
+        except stripe.error.StripeError as e:
+            current = PaymentService.confirm_payment(payment_intent_id)
+            return {
+                'success': False,
+                'status': current.get('status'),
+                'error': str(e),
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'status': None,
+                'error': str(e),
+            }
+
+    @staticmethod
+    def construct_webhook_event(payload: bytes, sig_header: str):
+        """
+        Verify the Stripe-Signature header and parse the webhook event.
+        Raises ValueError if the payload or signature is invalid.
+        """
+        if not webhook_secret:
+            raise ValueError("STRIPE_WEBHOOK_SECRET is not configured")
+        if not sig_header:
+            raise ValueError("Missing Stripe-Signature header")
+        
+        try:
+            return gateway.Webhook.construct_event(payload, sig_header, webhook_secret)
+        except stripe.error.SignatureVerificationError as e:
+            raise ValueError(f"Invalid signature: {e}")
+            
     @staticmethod
     def get_payment_methods():
         return [
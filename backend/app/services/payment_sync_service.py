@@ -0,0 +1,312 @@
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from app.models import all_models as models
+from app.services.payment_service import PaymentService
+from app.services.job_state_service import JobStateService
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+import json
+import os
+
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+# A failed event waits base * 2^(attempts - 1) seconds before its next try
+WEBHOOK_RETRY_BASE_SECONDS = int(os.getenv("WEBHOOK_RETRY_BASE_SECONDS", "30"))
+RECONCILE_JOB = "payment_reconciliation"
+
+# Stripe PaymentIntent status -> our PaymentStatus
+INTENT_STATUS_MAP = {
+    'succeeded': models.PaymentStatus.COMPLETED,
+    'canceled': models.PaymentStatus.FAILED,
+}
+
+# Webhook event type -> PaymentStatus it implies. payment_intent.payment_failed
+# is deliberately absent: a declined attempt leaves the intent open in
+# requires_payment_method and the tenant may still retry and pay, so only
+# cancellation is final.
+EVENT_STATUS_MAP = {
+    'payment_intent.succeeded': models.PaymentStatus.COMPLETED,
+    'payment_intent.canceled': models.PaymentStatus.FAILED,
+    'charge.refunded': models.PaymentStatus.REFUNDED,
+}
+
+class PaymentSyncService:
+    """
+    Keeps Payment/Booking rows in step with what the payment gateway reports.
+    """
+
+    @staticmethod
+    def apply_payment_outcome(db: Session, payment: models.Payment, outcome: models.PaymentStatus) -> bool:
+        """
+        Move a payment (and its booking) to the gateway-reported outcome.
+        Returns True if anything changed. Does not commit.
+        """
+        current = payment.status
+
+        if current == outcome:
+            return False
+
+        # Only forward transitions: a late failure never undoes a completed payment
+        allowed = {
+            models.PaymentStatus.COMPLETED: [models.PaymentStatus.PENDING, models.PaymentStatus.FAILED],
+            models.PaymentStatus.FAILED: [models.PaymentStatus.PENDING],
+            models.PaymentStatus.REFUNDED: [models.PaymentStatus.COMPLETED],
+        }
+        if current not in allowed.get(outcome, []):
+            return False
+
+        payment.status = outcome
+        booking = payment.booking
+
+        if outcome == models.PaymentStatus.COMPLETED:
+            payment.paid_at = payment.paid_at or datetime.utcnow()
+            if booking and booking.status == models.BookingStatus.PENDING:
+                booking.status = models.BookingStatus.CONFIRMED
+            elif booking and booking.status == models.BookingStatus.CANCELLED:
+                PaymentSyncService._paid_after_cancel(db, payment, booking)
+
+        elif outcome == models.PaymentStatus.FAILED:
+            # Same as a rejected receipt: free the dates
+            if booking and booking.status == models.BookingStatus.PENDING:
+                booking.status = models.BookingStatus.CANCELLED
+
+        return True
+
+    @staticmethod
+    def _paid_after_cancel(db: Session, payment: models.Payment, booking: models.Booking):
+        """
+        Money arrived for a booking we had already released. Take the
+        booking back if its dates are still free, otherwise mark the
+        payment for a refund. Either way it is logged. Does not commit.
+        """
+        conflict = db.query(models.Booking.id).filter(
+            models.Booking.property_id == booking.property_id,
+            models.Booking.id != booking.id,
+            models.Booking.status.in_([models.BookingStatus.PENDING, models.BookingStatus.CONFIRMED]),
+            models.Booking.start_date < booking.end_date,
+            models.Booking.end_date > booking.start_date,
+        ).first()
+
+        if conflict is None:
+            booking.status = models.BookingStatus.CONFIRMED
+            description = f"Payment {payment.id} completed after booking {booking.id} was cancelled - booking restored"
+            print(f"⚠️  {description}")
+        else:
+            try:
+                metadata = json.loads(payment.payment_metadata) if payment.payment_metadata else {}
+            except ValueError:
+                metadata = {'previous': payment.payment_metadata}
+            metadata.update({
+                'refund_required': True,
+                'refund_reason': f"Booking cancelled and dates taken by booking {conflict.id}",
+            })
+            payment.payment_metadata = json.dumps(metadata)
+            description = (f"Payment {payment.id} completed after booking {booking.id} was cancelled "
+                           f"and its dates were rebooked - refund required")
+            print(f"❌ {description}")
+
+        # Not AuditService.log: that commits, and we run inside the caller's transaction
+        db.add(models.AuditLog(
+            user_id=booking.user_id,
+            action=models.AuditAction.PAYMENT,
+            entity_type="payment",
+            entity_id=payment.id,
+            description=description,
+            log_metadata={'booking_id': booking.id, 'refund_required': conflict is not None},
+        ))
+
+    @staticmethod
+    def ingest_event(db: Session, event_id: str, event_type: str, payload: str) -> bool:
+        """
+        Write a verified webhook event to the inbox.
+        Returns False if the event id was already stored (Stripe redelivery).
+        """
+        stmt = insert(models.StripeWebhookEvent).values(
+            id=event_id,
+            type=event_type,
+            payload=payload,
+            status=models.WebhookEventStatus.PENDING,
+            attempts=0,
+            received_at=datetime.utcnow(),
+        ).on_conflict_do_nothing(index_elements=['id'])
+
+        result = db.execute(stmt)
+        db.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def _handle_event(db: Session, event: dict) -> Optional[bool]:
+        """
+        Apply one event. Returns None if the event is not one we act on.
+        """
+        outcome = EVENT_STATUS_MAP.get(event.get('type'))
+        if outcome is None:
+            return None
+
+        obj = event.get('data', {}).get('object', {})
+        # Charge events point at their intent; intent events are the intent
+        intent_id = obj.get('payment_intent') if obj.get('object') == 'charge' else obj.get('id')
+        if not intent_id:
+            return None
+
+        payment = db.query(models.Payment).filter(
+            models.Payment.payment_intent_id == intent_id
+        ).with_for_update().first()
+
+        if not payment:
+            return None
+
+        return PaymentSyncService.apply_payment_outcome(db, payment, outcome)
+
+    @staticmethod
+    def process_pending_events(db: Session, batch_size: int = 100) -> dict:
+        """
+        Process one batch of inbox events. Safe to run from several workers:
+        rows are claimed with SKIP LOCKED. Events that failed wait out
+        their backoff (next_attempt_at) before they are claimed again.
+        """
+        now = datetime.utcnow()
+        events = db.query(models.StripeWebhookEvent).filter(
+            models.StripeWebhookEvent.status == models.WebhookEventStatus.PENDING,
+            or_(
+                models.StripeWebhookEvent.next_attempt_at.is_(None),
+                models.StripeWebhookEvent.next_attempt_at <= now,
+            ),
+        ).order_by(
+            models.StripeWebhookEvent.received_at
+        ).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        summary = {'claimed': len(events), 'processed': 0, 'ignored': 0, 'failed': 0, 'retrying': 0}
+
+        for event in events:
+            try:
+                # Savepoint per event so one bad payload doesn't roll back the batch
+                with db.begin_nested():
+                    handled = PaymentSyncService._handle_event(db, json.loads(event.payload))
+
+                if handled is None:
+                    event.status = models.WebhookEventStatus.IGNORED
+                    summary['ignored'] += 1
+                else:
+                    event.status = models.WebhookEventStatus.PROCESSED
+                    summary['processed'] += 1
+                event.processed_at = datetime.utcnow()
+
+            except Exception as e:
+                event.attempts = (event.attempts or 0) + 1
+                event.last_error = str(e)[:500]
+                if event.attempts >= WEBHOOK_MAX_ATTEMPTS:
+                    event.status = models.WebhookEventStatus.FAILED
+                    summary['failed'] += 1
+                else:
+                    event.next_attempt_at = datetime.utcnow() + timedelta(
+                        seconds=WEBHOOK_RETRY_BASE_SECONDS * 2 ** (event.attempts - 1)
+                    )
+                    summary['retrying'] += 1
+
+        db.commit()
+        return summary
+
+    @staticmethod
+    def _fetch_outcome(payment_intent_id: str, created_at: datetime, expire_before: datetime) -> dict:
+        """
+        Gateway status of one intent. An abandoned checkout (still
+        requires_* past the expiry window) is cancelled at the gateway
+        first, so the tenant can't pay for a booking we release; if the
+        cancel loses the race to a payment, the result says 'succeeded'.
+        """
+        result = PaymentService.confirm_payment(payment_intent_id)
+        if not result['success']:
+            return result
+        if not (result['status'].startswith('requires_') and created_at < expire_before):
+            return result
+
+        cancel = PaymentService.cancel_payment_intent(payment_intent_id)
+        if cancel['success'] or cancel['status'] in ('canceled', 'succeeded'):
+            return {**result, 'status': cancel['status']}
+        return {'success': False, 'error': cancel['error']}
+
+    @staticmethod
+    def reconcile_pending(
+        db: Session,
+        stale_minutes: int = 30,
+        expire_hours: int = 24,
+        batch_size: int = 200,
+        concurrency: int = 8,
+        max_batches: Optional[int] = None,
+    ) -> dict:
+        """
+        Check stale PENDING gateway intents against the gateway.
+        Walks payments in id order from the stored watermark, fetches each
+        batch concurrently, then applies the whole batch in one transaction
+        together with the new watermark - so an interrupted run resumes
+        where it stopped.
+        """
+        now = datetime.utcnow()
+        stale_before = now - timedelta(minutes=stale_minutes)
+        expire_before = now - timedelta(hours=expire_hours)
+        watermark = int(JobStateService.get_watermark(db, RECONCILE_JOB, "0"))
+
+        summary = {
+            'started_at': now.isoformat(),
+            'resumed_from': watermark,
+            'batches': 0, 'checked': 0, 'completed': 0, 'failed': 0,
+            'unchanged': 0, 'gateway_errors': 0,
+        }
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while max_batches is None or summary['batches'] < max_batches:
+                # 1. Next key range - plain read, no locks held during gateway calls
+                rows = db.query(models.Payment.id, models.Payment.payment_intent_id, models.Payment.created_at).filter(
+                    models.Payment.id > watermark,
+                    models.Payment.status == models.PaymentStatus.PENDING,
+                    models.Payment.payment_intent_id.like('pi\\_%'),
+                    models.Payment.created_at < stale_before,
+                ).order_by(models.Payment.id).limit(batch_size).all()
+                db.rollback()
+
+                if not rows:
+                    # Full pass done - next run starts from the beginning again
+                    watermark = 0
+                    break
+
+                # 2. Bounded-parallel status fetch (and cancel of expired checkouts)
+                results = dict(zip(
+                    [r.id for r in rows],
+                    pool.map(
+                        lambda r: PaymentSyncService._fetch_outcome(r.payment_intent_id, r.created_at, expire_before),
+                        rows,
+                    ),
+                ))
+
+                # 3. One transaction for the batch + watermark
+                payments = db.query(models.Payment).filter(
+                    models.Payment.id.in_(results.keys())
+                ).with_for_update().all()
+
+                for payment in payments:
+                    result = results[payment.id]
+                    summary['checked'] += 1
+
+                    if not result['success']:
+                        summary['gateway_errors'] += 1
+                        continue
+
+                    outcome = INTENT_STATUS_MAP.get(result['status'])
+                    if outcome and PaymentSyncService.apply_payment_outcome(db, payment, outcome):
+                        key = 'completed' if outcome == models.PaymentStatus.COMPLETED else 'failed'
+                        summary[key] += 1
+                    else:
+                        summary['unchanged'] += 1
+
+                watermark = rows[-1].id
+                JobStateService.set_watermark(db, RECONCILE_JOB, str(watermark))
+                db.commit()
+                summary['batches'] += 1
+
+        summary['watermark'] = watermark
+        summary['finished_at'] = datetime.utcnow().isoformat()
+        JobStateService.set_watermark(db, RECONCILE_JOB, str(watermark), details=summary)
+        db.commit()
+        return summary
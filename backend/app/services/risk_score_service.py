@@ -0,0 +1,208 @@
+from sqlalchemy import event, select, text, tuple_
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from app.models import all_models as models
+from app.services.job_state_service import JobStateService
+from app.services.ml_data_service import MLDataService
+from app.services.explanation_service import ExplanationService
+from datetime import datetime
+from typing import Optional
+import os
+
+Scores = models.TenantRiskScore
+
+RISK_SCORE_JOB = "tenant_risk_scores"
+# Full refreshes asked for through the API; the worker runs them
+RISK_REFRESH_REQUEST_JOB = "tenant_risk_scores_request"
+STALE_BATCH_SIZE = int(os.getenv("RISK_STALE_BATCH_SIZE", "500"))
+UPSERT_CHUNK_ROWS = 1000
+
+# Booking fields the retention features are computed from
+BOOKING_FIELDS = ("user_id", "status", "created_at", "start_date", "end_date")
+
+SCORE_COLUMNS = (
+    "risk_score", "risk_level", "will_retain", "churn_probability",
+    "retention_probability", "recommendation", "key_factors", "model_version", "computed_at",
+)
+
+class RiskScoreService:
+    """
+    Persisted retention scores (tenant_risk_scores) for the ML read endpoints.
+
+    A full refresh scores every tenant in one batch. In between, the flush
+    listener at the bottom of this module marks a tenant stale whenever
+    their bookings change, and refresh_stale rescores just those tenants.
+    Each mark bumps stale_version; a refresh only clears marks it has seen,
+    so a change landing mid-refresh stays queued for the next one.
+    Refreshes hold a transaction-level advisory lock, so a full refresh
+    and a stale one never interleave.
+    """
+
+    @staticmethod
+    def mark_stale(db: Session, user_ids) -> int:
+        """Queue tenants for rescoring, in the caller's transaction"""
+        values = [
+            {"user_id": user_id, "is_stale": True, "stale_version": 1}
+            for user_id in sorted(set(user_ids)) if user_id is not None
+        ]
+        if not values:
+            return 0
+
+        statement = insert(Scores).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Scores.user_id],
+            set_={"is_stale": True, "stale_version": Scores.stale_version + 1},
+        )
+        db.execute(statement)
+        return len(values)
+
+    @staticmethod
+    def refresh(db: Session, ml_service, user_ids: Optional[list] = None) -> dict:
+        """
+        Rescore every tenant (or just user_ids) and upsert their rows. Rows
+        of tenants in scope that can no longer be scored (no bookings, not a
+        tenant) are deleted. Commits. Raises RuntimeError if the model is
+        not loaded. Waits for any other refresh to finish first.
+        """
+        # Held until commit / rollback: otherwise a full refresh would delete
+        # rows a concurrent stale refresh wrote after we read the features
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": RISK_SCORE_JOB})
+        started_at = datetime.utcnow()
+
+        # Read the marks before the features so later marks are never cleared
+        marks = select(Scores.user_id, Scores.stale_version).where(Scores.is_stale)
+        if user_ids is not None:
+            marks = marks.where(Scores.user_id.in_(user_ids))
+        seen_versions = dict(db.execute(marks).all())
+
+        features = MLDataService.collect_features_bulk(db, user_ids)
+        predictions = ml_service.predict_batch(features.drop(columns=['user_id']), observe=False)
+        key_factors = ExplanationService.key_factors(ml_service, features.drop(columns=['user_id']))
+
+        rows = [
+            {
+                "user_id": int(user_id),
+                "risk_score": int(prediction.risk_score),
+                "risk_level": prediction.risk_level,
+                "will_retain": bool(prediction.will_retain),
+                "churn_probability": float(prediction.churn_probability),
+                "retention_probability": float(prediction.retention_probability),
+                "recommendation": prediction.recommendation,
+                "key_factors": factors,
+                "model_version": ml_service.model_version,
+                "computed_at": started_at,
+                "is_stale": False,
+                "stale_version": seen_versions.get(int(user_id), 0),
+            }
+            for user_id, prediction, factors in zip(
+                features['user_id'], predictions.itertuples(index=False), key_factors
+            )
+        ]
+
+        try:
+            for i in range(0, len(rows), UPSERT_CHUNK_ROWS):
+                statement = insert(Scores).values(rows[i:i + UPSERT_CHUNK_ROWS])
+                statement = statement.on_conflict_do_update(
+                    index_elements=[Scores.user_id],
+                    set_={
+                        **{column: getattr(statement.excluded, column) for column in SCORE_COLUMNS},
+                        # Still stale if marked again after we read the marks
+                        "is_stale": Scores.is_stale & (Scores.stale_version != statement.excluded.stale_version),
+                    },
+                )
+                db.execute(statement)
+
+            # Marked tenants that didn't get a score, unless marked again since
+            scored = {row["user_id"] for row in rows}
+            unscored_marks = [(user_id, version) for user_id, version in seen_versions.items() if user_id not in scored]
+            removed = 0
+            if unscored_marks:
+                removed += db.query(Scores).filter(
+                    tuple_(Scores.user_id, Scores.stale_version).in_(unscored_marks)
+                ).delete(synchronize_session=False)
+
+            # Unmarked rows this run didn't rewrite
+            leftovers = db.query(Scores).filter(
+                ~Scores.is_stale,
+                Scores.computed_at.is_distinct_from(started_at),
+            )
+            if user_ids is not None:
+                leftovers = leftovers.filter(Scores.user_id.in_(user_ids))
+            removed += leftovers.delete(synchronize_session=False)
+
+            summary = {
+                "scored": len(rows),
+                "removed": removed,
+                "model_version": ml_service.model_version,
+                "started_at": started_at.isoformat(),
+                "finished_at": datetime.utcnow().isoformat(),
+            }
+            if user_ids is None:
+                JobStateService.set_watermark(db, RISK_SCORE_JOB, started_at.isoformat(), summary)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return summary
+
+    @staticmethod
+    def refresh_stale(db: Session, ml_service, batch_size: int = STALE_BATCH_SIZE) -> dict:
+        """Rescore up to batch_size tenants whose bookings changed"""
+        user_ids = list(db.execute(
+            select(Scores.user_id).where(Scores.is_stale).order_by(Scores.user_id).limit(batch_size)
+        ).scalars())
+        if not user_ids:
+            return {"scored": 0, "removed": 0, "claimed": 0}
+        return {**RiskScoreService.refresh(db, ml_service, user_ids), "claimed": len(user_ids)}
+
+    @staticmethod
+    def request_full_refresh(db: Session, requested_by: Optional[int] = None) -> str:
+        """Ask the risk score worker for a full refresh. Commits."""
+        requested_at = datetime.utcnow().isoformat()
+        JobStateService.set_watermark(db, RISK_REFRESH_REQUEST_JOB, requested_at, {"requested_by": requested_by})
+        db.commit()
+        return requested_at
+
+    @staticmethod
+    def needs_full_refresh(db: Session, ml_service, max_age_seconds: float) -> bool:
+        """
+        No full refresh yet, one was requested since the last, the last
+        one is too old, or it used another model
+        """
+        state = JobStateService.get(db, RISK_SCORE_JOB)
+        if not state or not state.watermark:
+            return True
+        requested_at = JobStateService.get_watermark(db, RISK_REFRESH_REQUEST_JOB)
+        if requested_at and requested_at > state.watermark:
+            return True
+        if (state.details or {}).get("model_version") != ml_service.model_version:
+            return True
+        age = datetime.utcnow() - datetime.fromisoformat(state.watermark)
+        return age.total_seconds() >= max_age_seconds
+
+# --- Stale marking ---
+
+# Keep the old user_id on reassignment: both tenants need rescoring
+models.track_previous(models.Booking.user_id)
+
+@event.listens_for(Session, "before_flush")
+def _capture_changed_tenants(session, flush_context, instances):
+    # Deleted rows must be read before the DELETE runs
+    user_ids = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, models.Booking):
+            continue
+        state = sa_inspect(obj)
+        if obj in session.deleted or any(state.attrs[field].history.has_changes() for field in BOOKING_FIELDS):
+            user_ids.add(obj.user_id)
+            user_ids.update(state.attrs["user_id"].history.deleted)
+    session.info["risk_stale_users"] = user_ids
+
+@event.listens_for(Session, "after_flush")
+def _mark_changed_tenants(session, flush_context):
+    user_ids = session.info.pop("risk_stale_users", set())
+    # New bookings get their user_id during the flush
+    user_ids.update(obj.user_id for obj in session.new if isinstance(obj, models.Booking))
+    RiskScoreService.mark_stale(session, user_ids)
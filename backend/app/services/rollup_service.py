@@ -0,0 +1,254 @@
+from sqlalchemy import event, select, text
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from app.models import all_models as models
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Optional
+
+Stats = models.DailyPropertyStats
+
+BOOKING_FIELDS = ("property_id", "status", "created_at", "start_date", "end_date")
+PAYMENT_FIELDS = ("booking_id", "status", "paid_at", "amount")
+
+STATUS_COLUMNS = {
+    models.BookingStatus.PENDING: "bookings_pending",
+    models.BookingStatus.CONFIRMED: "bookings_confirmed",
+    models.BookingStatus.CANCELLED: "bookings_cancelled",
+    models.BookingStatus.COMPLETED: "bookings_completed",
+    models.BookingStatus.REJECTED: "bookings_rejected",
+    models.BookingStatus.DECLINED: "bookings_declined",
+}
+
+OCCUPYING_STATUSES = (models.BookingStatus.CONFIRMED, models.BookingStatus.COMPLETED)
+
+COUNTER_COLUMNS = (
+    "revenue", "payments_completed", "bookings_created",
+    *STATUS_COLUMNS.values(), "occupied_nights",
+)
+
+# Same figures as the incremental path, recomputed from the raw tables.
+# Parameters: :first_day / :last_day bound the rebuilt range (inclusive).
+REBUILD_SQL = """
+INSERT INTO daily_property_stats (property_id, day, {columns})
+SELECT property_id, day, {sums}
+FROM (
+    SELECT b.property_id, p.paid_at::date AS day,
+           p.amount AS revenue, 1 AS payments_completed,
+           0 AS bookings_created, 0 AS bookings_pending, 0 AS bookings_confirmed,
+           0 AS bookings_cancelled, 0 AS bookings_completed, 0 AS bookings_rejected,
+           0 AS bookings_declined, 0 AS occupied_nights
+    FROM payments p JOIN bookings b ON b.id = p.booking_id
+    WHERE p.status = 'COMPLETED' AND p.paid_at IS NOT NULL AND b.property_id IS NOT NULL
+      AND p.paid_at >= :first_day AND p.paid_at < :last_day + 1
+    UNION ALL
+    SELECT property_id, created_at::date,
+           0, 0,
+           1, (status = 'PENDING')::int, (status = 'CONFIRMED')::int,
+           (status = 'CANCELLED')::int, (status = 'COMPLETED')::int, (status = 'REJECTED')::int,
+           (status = 'DECLINED')::int, 0
+    FROM bookings
+    WHERE property_id IS NOT NULL
+      AND created_at >= :first_day AND created_at < :last_day + 1
+    UNION ALL
+    SELECT b.property_id, night::date,
+           0, 0, 0, 0, 0, 0, 0, 0, 0, 1
+    FROM bookings b
+    CROSS JOIN LATERAL generate_series(
+        greatest(b.start_date::date, :first_day),
+        least(b.end_date::date - 1, :last_day),
+        interval '1 day'
+    ) AS night
+    WHERE b.status IN ('CONFIRMED', 'COMPLETED') AND b.property_id IS NOT NULL
+      AND b.start_date < :last_day + 1 AND b.end_date >= :first_day
+) AS facts
+GROUP BY property_id, day
+""".format(
+    columns=", ".join(COUNTER_COLUMNS),
+    sums=", ".join(f"sum({column})" for column in COUNTER_COLUMNS),
+)
+
+class RollupService:
+    """
+    Daily per-property report figures (daily_property_stats).
+
+    Kept current by the flush listeners at the bottom of this module
+    (registered by app.models.all_models, so every ORM session has them): every
+    flush that inserts, updates or deletes a Booking or Payment upserts the
+    difference it makes, in the same transaction. Writes that bypass the
+    ORM (bulk SQL, seeding scripts) need a rebuild afterwards.
+    """
+
+    @staticmethod
+    def booking_contributions(values: dict) -> list:
+        """(property_id, day, column, delta) rows one booking adds to the rollups"""
+        property_id = values.get("property_id")
+        if property_id is None:
+            return []
+
+        status = models.BookingStatus(values["status"]) if values.get("status") else None
+        rows = []
+
+        created_at = values.get("created_at")
+        if created_at is not None:
+            rows.append((property_id, created_at.date(), "bookings_created", 1))
+            if status in STATUS_COLUMNS:
+                rows.append((property_id, created_at.date(), STATUS_COLUMNS[status], 1))
+
+        start_date, end_date = values.get("start_date"), values.get("end_date")
+        if status in OCCUPYING_STATUSES and start_date and end_date:
+            # One row per night: the night of day d is [d, d + 1)
+            night = start_date.date()
+            while night < end_date.date():
+                rows.append((property_id, night, "occupied_nights", 1))
+                night += timedelta(days=1)
+
+        return rows
+
+    @staticmethod
+    def payment_contributions(values: dict, property_id: Optional[int]) -> list:
+        """(property_id, day, column, delta) rows one payment adds to the rollups"""
+        status = models.PaymentStatus(values["status"]) if values.get("status") else None
+        if property_id is None or status != models.PaymentStatus.COMPLETED or values.get("paid_at") is None:
+            return []
+
+        day = values["paid_at"].date()
+        return [
+            (property_id, day, "revenue", values.get("amount") or 0.0),
+            (property_id, day, "payments_completed", 1),
+        ]
+
+    @staticmethod
+    def apply_deltas(db: Session, rows: list) -> int:
+        """
+        Add (property_id, day, column, delta) rows to the rollups with one
+        upsert. Returns the number of (property, day) rows touched.
+        """
+        merged = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+        for property_id, day, column, delta in rows:
+            merged[(property_id, day)][column] += delta
+
+        # Drop keys whose changes cancelled out (e.g. an untouched status)
+        values = [
+            {"property_id": property_id, "day": day, **counters}
+            for (property_id, day), counters in sorted(merged.items())
+            if any(counters.values())
+        ]
+        if not values:
+            return 0
+
+        statement = insert(Stats).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Stats.property_id, Stats.day],
+            set_={column: getattr(Stats, column) + getattr(statement.excluded, column) for column in COUNTER_COLUMNS},
+        )
+        db.execute(statement)
+        return len(values)
+
+    @staticmethod
+    def rebuild(db: Session, first_day: Optional[date] = None, last_day: Optional[date] = None) -> int:
+        """
+        Recompute the rollups for [first_day, last_day] (default: all history)
+        from bookings and payments. Commits. Returns the rows written.
+
+        The table lock makes concurrent writers queue their deltas until the
+        rebuild commits, so nothing is counted twice or lost.
+        """
+        full_rebuild = first_day is None and last_day is None
+        if first_day is None or last_day is None:
+            bounds = db.execute(text("""
+                SELECT least((SELECT min(created_at) FROM bookings),
+                             (SELECT min(start_date) FROM bookings),
+                             (SELECT min(paid_at) FROM payments))::date,
+                       greatest((SELECT max(created_at) FROM bookings),
+                                (SELECT max(end_date) FROM bookings),
+                                (SELECT max(paid_at) FROM payments))::date
+            """)).one()
+            first_day = first_day or bounds[0] or date.today()
+            last_day = last_day or bounds[1] or date.today()
+
+        try:
+            db.execute(text("LOCK TABLE daily_property_stats IN SHARE ROW EXCLUSIVE MODE"))
+            stale = db.query(Stats)
+            if not full_rebuild:
+                stale = stale.filter(Stats.day >= first_day, Stats.day <= last_day)
+            stale.delete(synchronize_session=False)
+            written = db.execute(text(REBUILD_SQL), {"first_day": first_day, "last_day": last_day}).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return written
+
+# --- Incremental maintenance ---
+
+# The flush listeners always need to know what to subtract
+for _model, _fields in ((models.Booking, BOOKING_FIELDS), (models.Payment, PAYMENT_FIELDS)):
+    for _field in _fields:
+        models.track_previous(getattr(_model, _field))
+
+def _values(obj, fields: tuple, previous: bool = False) -> dict:
+    values = {}
+    for field in fields:
+        attribute = sa_inspect(obj).attrs[field]
+        history = attribute.history
+        values[field] = history.deleted[0] if previous and history.deleted else attribute.value
+    return values
+
+def _changed(obj, fields: tuple) -> bool:
+    state = sa_inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+@event.listens_for(Session, "before_flush")
+def _capture_previous(session, flush_context, instances):
+    # Old values must be read before the UPDATE/DELETE statements run
+    previous, changed = [], []
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.Booking):
+            fields = BOOKING_FIELDS
+        elif isinstance(obj, models.Payment):
+            fields = PAYMENT_FIELDS
+        else:
+            continue
+        if obj in session.deleted or _changed(obj, fields):
+            previous.append((obj, _values(obj, fields, previous=True)))
+            if obj not in session.deleted:
+                changed.append(obj)
+    session.info["rollup_previous"] = previous
+    session.info["rollup_changed"] = changed
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollup_deltas(session, flush_context):
+    previous = session.info.pop("rollup_previous", [])
+    changed = session.info.pop("rollup_changed", [])
+    current = [
+        obj for obj in session.new if isinstance(obj, (models.Booking, models.Payment))
+    ] + changed
+    if not previous and not current:
+        return
+
+    # (sign, model, values) for the state before and after this flush
+    facts = [(-1, type(obj), values) for obj, values in previous]
+    facts += [
+        (1, type(obj), _values(obj, BOOKING_FIELDS if isinstance(obj, models.Booking) else PAYMENT_FIELDS))
+        for obj in current
+    ]
+
+    booking_ids = {values["booking_id"] for _, model, values in facts if model is models.Payment and values["booking_id"]}
+    property_of = {}
+    if booking_ids:
+        property_of = dict(session.execute(
+            select(models.Booking.id, models.Booking.property_id).where(models.Booking.id.in_(booking_ids))
+        ).all())
+
+    rows = []
+    for sign, model, values in facts:
+        if model is models.Booking:
+            contributions = RollupService.booking_contributions(values)
+        else:
+            contributions = RollupService.payment_contributions(values, property_of.get(values["booking_id"]))
+        rows.extend((property_id, day, column, sign * delta) for property_id, day, column, delta in contributions)
+
+    RollupService.apply_deltas(session, rows)
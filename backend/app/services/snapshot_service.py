@@ -0,0 +1,245 @@
+"""
+Analytics snapshots: bookings, payments, properties and anonymized users
+as Parquet files for BI tools and offline analysis.
+
+Layout under SNAPSHOT_DIR (default backend/data/snapshots):
+
+    <table>/run=<run_id>/part-00000.parquet
+    manifest.json
+
+Each run writes one partition per table, read in SNAPSHOT_CHUNK_ROWS
+chunks from a server-side cursor (one Parquet row group per chunk). A
+full run exports every row; an incremental run only rows whose
+updated_at moved past the previous run's watermark, so readers take the
+latest full run plus the incremental runs after it and keep the newest
+row per id. Deletes are not captured.
+
+updated_at is stamped in Python at flush time, not at commit, so a row
+can become visible with an updated_at already behind the current time.
+The watermark therefore trails the run by SNAPSHOT_SAFETY_LAG_SECONDS:
+anything changed in that window is left to the next run (a full run
+exports it twice, which the newest-row-per-id rule absorbs). Transactions
+that stay open longer than the lag can still be missed.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Boolean, Date, DateTime, Enum, Float, Integer, select, text
+from sqlalchemy.orm import Session
+
+from app.models import all_models as models
+from app.services.job_state_service import JobStateService
+
+SNAPSHOT_JOB = "analytics_snapshot"
+SNAPSHOT_DIR = os.getenv(
+    "SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "snapshots"),
+)
+SNAPSHOT_CHUNK_ROWS = int(os.getenv("SNAPSHOT_CHUNK_ROWS", "50000"))
+# How far the watermark trails the run (longest expected write transaction)
+SNAPSHOT_SAFETY_LAG_SECONDS = int(os.getenv("SNAPSHOT_SAFETY_LAG_SECONDS", "300"))
+
+# Exported columns per table. Users keep only non-identifying fields (the
+# id stays so bookings can be joined); payment account numbers, metadata
+# and receipts are left out.
+SNAPSHOT_COLUMNS = {
+    "bookings": [
+        models.Booking.id, models.Booking.user_id, models.Booking.property_id,
+        models.Booking.start_date, models.Booking.end_date, models.Booking.total_amount,
+        models.Booking.status, models.Booking.created_at, models.Booking.updated_at,
+    ],
+    "payments": [
+        models.Payment.id, models.Payment.booking_id, models.Payment.amount,
+        models.Payment.payment_method, models.Payment.status, models.Payment.paid_at,
+        models.Payment.created_at, models.Payment.updated_at,
+    ],
+    "properties": [
+        models.Property.id, models.Property.owner_id, models.Property.name, models.Property.address,
+        models.Property.price_per_month, models.Property.bedrooms, models.Property.bathrooms,
+        models.Property.size_sqm, models.Property.is_available, models.Property.status,
+        models.Property.accepts_bpi, models.Property.accepts_gcash, models.Property.accepts_cash,
+        models.Property.created_at, models.Property.updated_at,
+    ],
+    "users": [
+        models.User.id, models.User.role, models.User.is_active,
+        models.User.created_at, models.User.updated_at,
+    ],
+}
+
+def _arrow_type(column) -> pa.DataType:
+    # Fixed schema from the model, so an all-NULL first chunk can't pin a column to null
+    column_type = column.type
+    if isinstance(column_type, Enum):
+        return pa.string()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+class SnapshotService:
+    """Writes Parquet snapshots and keeps their manifest and job status"""
+
+    @staticmethod
+    def manifest_path() -> str:
+        return os.path.join(SNAPSHOT_DIR, "manifest.json")
+
+    @staticmethod
+    def get_manifest() -> dict:
+        path = SnapshotService.manifest_path()
+        if not os.path.exists(path):
+            return {"root": SNAPSHOT_DIR, "tables": list(SNAPSHOT_COLUMNS), "runs": []}
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def is_running(db: Session) -> bool:
+        """True while some process holds the snapshot lock"""
+        with db.get_bind().connect() as conn:
+            free = conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": SNAPSHOT_JOB}).scalar()
+            if free:
+                conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": SNAPSHOT_JOB})
+            return not free
+
+    @staticmethod
+    def get_status(db: Session) -> dict:
+        state = JobStateService.get(db, SNAPSHOT_JOB)
+        if not state:
+            return {"status": "never_run", "watermark": None}
+
+        details = dict(state.details or {})
+        # A process that died mid-run leaves "running" behind without the lock
+        if details.get("status") == "running" and not SnapshotService.is_running(db):
+            details["status"] = "interrupted"
+        return {**details, "watermark": state.watermark, "updated_at": state.updated_at}
+
+    @staticmethod
+    def _write_table(db: Session, table: str, columns: list, run_id: str, since, until, chunk_rows: int) -> dict:
+        schema = pa.schema([(column.key, _arrow_type(column)) for column in columns])
+        enum_positions = [i for i, column in enumerate(columns) if isinstance(column.type, Enum)]
+        updated_at = columns[0].class_.updated_at
+
+        statement = select(*columns).order_by(columns[0])
+        if since is not None:
+            statement = statement.where(updated_at > since, updated_at <= until)
+
+        partition = os.path.join(SNAPSHOT_DIR, table, f"run={run_id}")
+        path = os.path.join(partition, "part-00000.parquet")
+        rows_written, writer = 0, None
+
+        result = db.execute(statement.execution_options(yield_per=chunk_rows))
+        try:
+            for rows in result.partitions():
+                data = [list(values) for values in zip(*rows)]
+                for i in enum_positions:
+                    data[i] = [value.value if value is not None else None for value in data[i]]
+
+                if writer is None:
+                    os.makedirs(partition, exist_ok=True)
+                    writer = pq.ParquetWriter(path + ".tmp", schema, compression="snappy")
+                writer.write_table(pa.Table.from_arrays(data, schema=schema))
+                rows_written += len(rows)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if writer is None:
+            return {"table": table, "path": None, "rows": 0, "bytes": 0}
+
+        os.replace(path + ".tmp", path)
+        return {
+            "table": table,
+            "path": os.path.relpath(path, SNAPSHOT_DIR),
+            "rows": rows_written,
+            "bytes": os.path.getsize(path),
+        }
+
+    @staticmethod
+    def _append_to_manifest(run: dict):
+        manifest = SnapshotService.get_manifest()
+        manifest["runs"].append(run)
+        path = SnapshotService.manifest_path()
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def run(db: Session, mode: str = "incremental", chunk_rows: int = SNAPSHOT_CHUNK_ROWS) -> dict:
+        """
+        Snapshot every table. Incremental runs without a previous watermark
+        become full runs. Returns the manifest entry for the run; raises
+        RuntimeError if another run holds the lock.
+        """
+        # Session-level advisory lock on its own connection: one run at a time across processes
+        with db.get_bind().connect() as lock_conn:
+            locked = lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": SNAPSHOT_JOB}
+            ).scalar()
+            if not locked:
+                raise RuntimeError("An analytics snapshot is already running")
+            try:
+                return SnapshotService._run_locked(db, mode, chunk_rows)
+            finally:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": SNAPSHOT_JOB})
+
+    @staticmethod
+    def _run_locked(db: Session, mode: str, chunk_rows: int) -> dict:
+        previous = JobStateService.get_watermark(db, SNAPSHOT_JOB)
+        if mode == "incremental" and previous is None:
+            mode = "full"
+        since = datetime.fromisoformat(previous) if mode == "incremental" else None
+
+        started_at = datetime.utcnow()
+        until = started_at - timedelta(seconds=SNAPSHOT_SAFETY_LAG_SECONDS)
+        if since is not None and until < since:
+            until = since
+        run_id = started_at.strftime("%Y%m%dT%H%M%S")
+        details = {"status": "running", "mode": mode, "run_id": run_id, "started_at": started_at.isoformat()}
+        JobStateService.set_watermark(db, SNAPSHOT_JOB, previous, details)
+        db.commit()
+
+        files = []
+        try:
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            for table, columns in SNAPSHOT_COLUMNS.items():
+                files.append(SnapshotService._write_table(db, table, columns, run_id, since, until, chunk_rows))
+        except Exception as e:
+            db.rollback()
+            for table in SNAPSHOT_COLUMNS:
+                shutil.rmtree(os.path.join(SNAPSHOT_DIR, table, f"run={run_id}"), ignore_errors=True)
+            # New dicts each time: the JSON column only notices reassignment
+            JobStateService.set_watermark(db, SNAPSHOT_JOB, previous, {
+                **details, "status": "failed", "error": str(e), "finished_at": datetime.utcnow().isoformat(),
+            })
+            db.commit()
+            raise
+
+        run = {
+            "run_id": run_id,
+            "mode": mode,
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat(),
+            "finished_at": datetime.utcnow().isoformat(),
+            "files": files,
+        }
+        SnapshotService._append_to_manifest(run)
+
+        JobStateService.set_watermark(db, SNAPSHOT_JOB, until.isoformat(), {
+            **details,
+            "status": "succeeded",
+            "finished_at": run["finished_at"],
+            "rows": {file["table"]: file["rows"] for file in files},
+        })
+        db.commit()
+        return run
@@ -0,0 +1,267 @@
+"""
+Synthetic users, properties, bookings and payments at scale.
+
+Every tenant gets a risk profile (RISK_PROFILES). The profile sets how
+often the tenant books, how far ahead, for how long, how often they
+cancel or pay late, and how long they go between bookings. Retention
+labels derived from the generated history (MLDataService) therefore
+follow the profile mix. Everything is generated column-wise with NumPy:
+there is no per-row Python loop, so millions of rows take seconds.
+
+SyntheticDataService.seed() streams the frames into PostgreSQL with COPY
+under ids it reserves itself. Raw COPY skips the ORM flush listeners, so
+callers rebuild report rollups afterwards. The risk score worker picks up
+the new tenants on its next full refresh.
+"""
+
+import io
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Per-profile means: bookings per tenant (relative), days booked ahead,
+# nights per stay, days between a stay and the next booking, days since
+# the last booking; and probabilities of cancelling / paying late
+RISK_PROFILES = {
+    "low": {"bookings": 6.0, "lead_days": 20, "nights": 45, "gap_days": 30,
+            "recency_days": 30, "cancel_rate": 0.05, "late_rate": 0.05},
+    "medium": {"bookings": 3.0, "lead_days": 45, "nights": 30, "gap_days": 120,
+               "recency_days": 120, "cancel_rate": 0.15, "late_rate": 0.20},
+    "high": {"bookings": 1.5, "lead_days": 90, "nights": 14, "gap_days": 300,
+             "recency_days": 300, "cancel_rate": 0.35, "late_rate": 0.45},
+}
+DEFAULT_RISK_MIX = {"low": 0.6, "medium": 0.25, "high": 0.15}
+
+OWNER_EVERY = 50  # every 50th user is an owner, the rest are tenants
+REJECT_RATE = 0.02
+PAYMENT_METHODS = np.array(["gcash", "bpi", "cash"])
+COPY_CHUNK_ROWS = 200_000
+
+# Load order (foreign keys)
+TABLES = ("users", "properties", "bookings", "payments")
+
+def _days(values) -> np.ndarray:
+    return (np.asarray(values, dtype=np.float64) * 86400).astype("timedelta64[s]")
+
+def _labels(prefix: str, ids: np.ndarray, suffix: str = "") -> pd.Series:
+    return prefix + pd.Series(ids).astype(str) + suffix
+
+class SyntheticDataService:
+    @staticmethod
+    def parse_risk_mix(text: str) -> dict:
+        """'low=0.6,medium=0.25,high=0.15' -> {'low': 0.6, ...}"""
+        mix = {}
+        for part in filter(None, (part.strip() for part in text.split(","))):
+            name, _, share = part.partition("=")
+            if name not in RISK_PROFILES:
+                raise ValueError(f"Unknown risk profile {name!r}: use {', '.join(RISK_PROFILES)}")
+            mix[name] = float(share)
+        if not mix or sum(mix.values()) <= 0:
+            raise ValueError(f"Empty risk mix: {text!r}")
+        return mix
+
+    @staticmethod
+    def generate(users: int, properties: int, bookings: int, risk_mix: Optional[dict] = None,
+                 seed: int = 42, now: Optional[datetime] = None, first_ids: Optional[dict] = None,
+                 tag: str = "syn", hashed_password: str = "x") -> dict:
+        """
+        {table: frame} for TABLES, with ids from first_ids (default 1),
+        plus "tenant_profiles" (user_id, risk_profile), which is not loaded.
+        Exactly `bookings` bookings, spread over tenants by profile.
+        """
+        rng = np.random.default_rng(seed)
+        now = np.datetime64(now or datetime.utcnow(), "s")
+        first_ids = first_ids or {table: 1 for table in TABLES}
+
+        mix = risk_mix or DEFAULT_RISK_MIX
+        names = [name for name in mix if mix[name] > 0]
+        shares = np.array([mix[name] for name in names], dtype=np.float64)
+
+        def per_profile(key):
+            return np.array([RISK_PROFILES[name][key] for name in names], dtype=np.float64)
+
+        # --- Users ---
+        user_ids = first_ids["users"] + np.arange(users)
+        is_owner = np.arange(users) % OWNER_EVERY == OWNER_EVERY - 1
+        if properties and not is_owner.any():
+            is_owner[-1] = True
+        owner_ids, tenant_ids = user_ids[is_owner], user_ids[~is_owner]
+        n_tenants = len(tenant_ids)
+        if bookings and not n_tenants:
+            raise ValueError("Bookings need at least one tenant")
+
+        profile = rng.choice(len(names), size=n_tenants, p=shares / shares.sum())
+
+        # --- Properties ---
+        property_ids = first_ids["properties"] + np.arange(properties)
+        prices = 8000.0 + 1000.0 * rng.integers(0, 30, properties)
+        property_frame = pd.DataFrame({
+            "id": property_ids,
+            "owner_id": owner_ids[rng.integers(0, len(owner_ids), properties)] if properties else [],
+            "name": _labels(f"Synthetic Unit {tag}-", property_ids),
+            "address": _labels("Synthetic Street ", property_ids),
+            "price_per_month": prices,
+            "bedrooms": 1 + rng.integers(0, 3, properties),
+            "bathrooms": 1 + rng.integers(0, 2, properties),
+            "size_sqm": rng.integers(20, 80, properties).astype(np.float64),
+            "is_available": rng.random(properties) >= 0.1,
+            "status": np.where(rng.random(properties) < 0.05, "PENDING", "APPROVED"),
+            "images": "[]",
+            "accepts_gcash": True,
+            "accepts_bpi": rng.random(properties) < 0.5,
+            "accepts_cash": rng.random(properties) < 0.5,
+            "created_at": now - _days(rng.uniform(400, 1500, properties)),
+        })
+        property_frame["updated_at"] = property_frame["created_at"]
+
+        # --- Bookings, grouped by tenant in creation order ---
+        rates = per_profile("bookings")[profile]
+        counts = rng.multinomial(bookings, rates / rates.sum()) if n_tenants else np.zeros(0, dtype=np.int64)
+        tenant_of = np.repeat(np.arange(n_tenants), counts)
+        b_profile = profile[tenant_of]
+        starts = np.cumsum(counts) - counts
+        booked = counts > 0
+
+        lead = rng.exponential(per_profile("lead_days")[b_profile]).astype(np.int64)
+        nights = 1 + rng.exponential(per_profile("nights")[b_profile] - 1).astype(np.int64)
+        gap = rng.exponential(per_profile("gap_days")[b_profile])
+
+        # Days from one booking's creation to the next: its lead time, its stay, then a gap
+        step = np.zeros(bookings)
+        step[1:] = lead[:-1] + nights[:-1] + gap[1:]
+        step[starts[booked]] = 0.0
+        offset = np.cumsum(step)
+        base = np.zeros(n_tenants)
+        base[booked] = offset[starts[booked]]
+        offset -= np.repeat(base, counts)
+
+        # Anchor each history so its last booking was created recency days ago
+        span = np.zeros(n_tenants)
+        span[booked] = offset[(starts + counts - 1)[booked]]
+        recency = rng.exponential(per_profile("recency_days")[profile])
+        created_at = now - _days(np.repeat(recency + span, counts) - offset)
+        start_date = created_at + _days(lead)
+        end_date = start_date + _days(nights)
+
+        cancelled = rng.random(bookings) < per_profile("cancel_rate")[b_profile]
+        rejected = ~cancelled & (rng.random(bookings) < REJECT_RATE)
+        status = np.select(
+            [cancelled, rejected, end_date <= now, start_date <= now, rng.random(bookings) < 0.7],
+            ["CANCELLED", "REJECTED", "COMPLETED", "CONFIRMED", "CONFIRMED"],
+            default="PENDING",
+        )
+
+        booking_ids = first_ids["bookings"] + np.arange(bookings)
+        booking_property = rng.integers(0, properties, bookings) if properties else np.zeros(bookings, dtype=np.int64)
+        amounts = prices[booking_property] * np.ceil(nights / 30.0) if properties else np.zeros(bookings)
+        booking_frame = pd.DataFrame({
+            "id": booking_ids,
+            "user_id": tenant_ids[tenant_of],
+            "property_id": property_ids[booking_property] if properties else None,
+            "start_date": start_date,
+            "end_date": end_date,
+            "total_amount": amounts,
+            "status": status,
+            "created_at": created_at,
+        })
+        booking_frame["updated_at"] = booking_frame["created_at"]
+
+        # --- Payments: one per booking that got past the request ---
+        paying = np.isin(status, ["COMPLETED", "CONFIRMED", "PENDING"])
+        late = rng.random(bookings) < per_profile("late_rate")[b_profile]
+        # On time: before the stay starts; late: after it started
+        paid_at = np.where(
+            late,
+            start_date + _days(1 + rng.exponential(7, bookings)),
+            created_at + _days(np.minimum(lead, rng.exponential(2, bookings))),
+        )
+        paid = paying & (status != "PENDING") & (paid_at <= now)
+        payment_frame = pd.DataFrame({
+            "booking_id": booking_ids[paying],
+            "amount": amounts[paying],
+            "payment_method": PAYMENT_METHODS[rng.integers(0, len(PAYMENT_METHODS), bookings)][paying],
+            "status": np.where(paid, "COMPLETED", "PENDING")[paying],
+            "paid_at": pd.Series(paid_at[paying]).where(paid[paying]),
+            "created_at": created_at[paying],
+        })
+        payment_frame.insert(0, "id", first_ids["payments"] + np.arange(len(payment_frame)))
+        payment_frame["updated_at"] = payment_frame["created_at"]
+        payment_frame["receipt_number"] = _labels(f"{tag.upper()}-", payment_frame["id"].to_numpy())
+
+        # --- Users, now that first bookings are known ---
+        user_created = now - _days(rng.uniform(0, 1000, users))
+        first_booking = np.full(n_tenants, now)
+        first_booking[booked] = created_at[starts[booked]]
+        tenant_created = np.where(booked, first_booking - _days(rng.exponential(30, n_tenants)), user_created[~is_owner])
+        user_created[~is_owner] = tenant_created
+
+        user_frame = pd.DataFrame({
+            "id": user_ids,
+            "email": _labels(f"{tag}_", user_ids, "@example.com"),
+            "username": _labels(f"{tag}_", user_ids),
+            "hashed_password": hashed_password,
+            "full_name": _labels("Synthetic User ", user_ids),
+            "role": np.where(is_owner, "OWNER", "TENANT"),
+            "is_active": True,
+            "created_at": user_created,
+        })
+        user_frame["updated_at"] = user_frame["created_at"]
+
+        return {
+            "users": user_frame,
+            "properties": property_frame,
+            "bookings": booking_frame,
+            "payments": payment_frame,
+            "tenant_profiles": pd.DataFrame({"user_id": tenant_ids, "risk_profile": np.array(names)[profile]}),
+        }
+
+    @staticmethod
+    def _copy(cursor, table: str, frame: pd.DataFrame):
+        statement = f"COPY {table} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)"
+        for start in range(0, len(frame), COPY_CHUNK_ROWS):
+            buffer = io.StringIO()
+            # NaT / None become empty fields, which COPY reads as NULL
+            frame.iloc[start:start + COPY_CHUNK_ROWS].to_csv(
+                buffer, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S"
+            )
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+
+    @staticmethod
+    def seed(engine, users: int, properties: int, bookings: int, risk_mix: Optional[dict] = None,
+             seed: int = 42, tag: str = "syn", hashed_password: str = "x") -> dict:
+        """
+        Generate and COPY a dataset in one transaction, after the rows
+        already there. Returns the row count per table.
+        """
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            # Nobody else may take ids from under us until we commit
+            cursor.execute(f"LOCK TABLE {', '.join(TABLES)} IN SHARE ROW EXCLUSIVE MODE")
+            first_ids = {}
+            for table in TABLES:
+                cursor.execute(f"SELECT coalesce(max(id), 0) + 1 FROM {table}")
+                first_ids[table] = cursor.fetchone()[0]
+
+            tables = SyntheticDataService.generate(
+                users, properties, bookings, risk_mix=risk_mix, seed=seed,
+                first_ids=first_ids, tag=tag, hashed_password=hashed_password,
+            )
+            for table in TABLES:
+                SyntheticDataService._copy(cursor, table, tables[table])
+                # Explicit ids don't advance the serial sequences
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT coalesce(max(id), 1) FROM {table}))"
+                )
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+        return {table: len(tables[table]) for table in TABLES}
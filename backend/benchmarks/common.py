@@ -0,0 +1,40 @@
+"""
+Shared helpers for the scripts in benchmarks/.
+Run any benchmark from backend/ with: python -m benchmarks.<name> --help
+"""
+
+import math
+import time
+from contextlib import contextmanager
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def latency_summary(samples_ms) -> dict:
+    values = sorted(samples_ms)
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values), 2) if values else 0.0,
+        'p50_ms': round(percentile(values, 50), 2),
+        'p95_ms': round(percentile(values, 95), 2),
+        'p99_ms': round(percentile(values, 99), 2),
+        'max_ms': round(values[-1], 2) if values else 0.0,
+    }
+
+def print_summary(title: str, summary: dict):
+    print(f"\n{title}")
+    print("-" * len(title))
+    for key, value in summary.items():
+        print(f"   {key:<16} {value}")
+
+@contextmanager
+def timer():
+    """with timer() as t: ...  then t() -> elapsed milliseconds"""
+    start = time.perf_counter()
+    end = [None]
+    yield lambda: ((end[0] or time.perf_counter()) - start) * 1000
+    end[0] = time.perf_counter()
@@ -0,0 +1,113 @@
+"""
+Dashboard statistics benchmark: query count and latency.
+
+    python -m benchmarks.seed --database-url $BENCH_URL --bookings 1000000
+    python -m benchmarks.dashboard_benchmark --database-url $BENCH_URL
+
+Compares the old one-query-per-figure implementation with the single
+conditional-aggregate query, then shows what the TTL cache does to a
+burst of concurrent dashboard loads.
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import reports
+from app.core.cache import TTLCache
+from app.models import all_models as models
+from benchmarks.common import latency_summary, print_summary
+
+def legacy_dashboard_stats(db) -> dict:
+    """The pre-aggregation implementation, kept here for comparison."""
+    now = datetime.utcnow()
+    month_start = datetime(now.year, now.month, 1)
+    return {
+        "total_properties": db.query(models.Property).count(),
+        "available_properties": db.query(models.Property).filter(models.Property.is_available == True).count(),
+        "total_users": db.query(models.User).count(),
+        "total_bookings": db.query(models.Booking).count(),
+        "confirmed_bookings": db.query(models.Booking).filter(
+            models.Booking.status == models.BookingStatus.CONFIRMED).count(),
+        "pending_bookings": db.query(models.Booking).filter(
+            models.Booking.status == models.BookingStatus.PENDING).count(),
+        "total_revenue": db.query(func.sum(models.Payment.amount)).filter(
+            models.Payment.status == models.PaymentStatus.COMPLETED).scalar() or 0.0,
+        "revenue_this_month": db.query(func.sum(models.Payment.amount)).filter(
+            models.Payment.status == models.PaymentStatus.COMPLETED,
+            models.Payment.paid_at >= month_start).scalar() or 0.0,
+        "bookings_this_month": db.query(models.Booking).filter(
+            models.Booking.created_at >= month_start).count(),
+    }
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def measure(Session, counter, fn, repeat):
+    samples, queries, result = [], 0, None
+    for _ in range(repeat):
+        db = Session()
+        try:
+            before = counter.count
+            started = time.perf_counter()
+            result = fn(db)
+            samples.append((time.perf_counter() - started) * 1000)
+            queries = counter.count - before
+        finally:
+            db.close()
+    return result, queries, latency_summary(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard stats query count / latency benchmark")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=32, help="simultaneous dashboard loads")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url, pool_size=args.concurrency)
+    Session = sessionmaker(bind=engine)
+    counter = QueryCounter(engine)
+
+    with Session() as db:
+        print(f"📊 Dataset: {db.query(models.Booking).count()} bookings")
+
+    legacy, legacy_queries, legacy_latency = measure(Session, counter, legacy_dashboard_stats, args.repeat)
+    new, new_queries, new_latency = measure(Session, counter, reports._query_dashboard_stats, args.repeat)
+
+    print_summary(f"Legacy: {legacy_queries} queries per load", legacy_latency)
+    print_summary(f"Aggregated: {new_queries} query per load", new_latency)
+    mismatched = [k for k in legacy if abs(float(legacy[k]) - float(new[k])) > 1e-6]
+    print(f"\n{'✅ Results identical' if not mismatched else f'❌ Mismatch in {mismatched}'}")
+
+    # Burst of concurrent loads against a cold cache: expect one query in total
+    cache = TTLCache(ttl_seconds=10)
+    before = counter.count
+
+    def load(_):
+        db = Session()
+        try:
+            started = time.perf_counter()
+            cache.get_or_compute("dashboard", lambda: reports._query_dashboard_stats(db))
+            return (time.perf_counter() - started) * 1000
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        burst = list(pool.map(load, range(args.concurrency)))
+
+    print_summary(
+        f"Cached burst: {args.concurrency} concurrent loads -> {counter.count - before} queries",
+        latency_summary(burst),
+    )
+
+if __name__ == "__main__":
+    main()
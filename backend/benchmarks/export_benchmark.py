@@ -0,0 +1,67 @@
+"""
+Export memory benchmark: buffered CSV vs streamed from a server-side cursor.
+
+    python -m benchmarks.seed --database-url $BENCH_URL --bookings 1000000
+    DATABASE_URL=$BENCH_URL python -m benchmarks.export_benchmark
+
+Exports the first N payments both ways for growing N and reports the
+Python peak memory (tracemalloc) and time. The streamed peak should stay
+flat as N grows; the buffered one grows with it.
+"""
+
+import argparse
+import csv
+import io
+import tracemalloc
+
+from app.api.v1 import reports
+from app.db.session import SessionLocal
+from app.models import all_models as models
+from app.services.export_service import ExportService
+from benchmarks.common import timer
+
+def buffered_export(limit: int) -> int:
+    """The pre-streaming implementation: .all() into a StringIO"""
+    db = SessionLocal()
+    try:
+        payments = db.query(models.Payment).order_by(models.Payment.id).limit(limit).all()
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow([header for _, header, _ in reports.PAYMENT_EXPORT_COLUMNS])
+        for payment in payments:
+            writer.writerow([
+                payment.id, payment.booking_id, payment.amount, payment.payment_method,
+                payment.status.value, payment.transaction_id, payment.payment_intent_id,
+                payment.receipt_number, payment.paid_at, payment.created_at,
+            ])
+        return len(output.getvalue().encode("utf-8"))
+    finally:
+        db.close()
+
+def streamed_export(limit: int, compress: bool = False) -> int:
+    statement = ExportService.select(reports.PAYMENT_EXPORT_COLUMNS).order_by(models.Payment.id).limit(limit)
+    return sum(len(chunk) for chunk in ExportService.stream(statement, reports.PAYMENT_EXPORT_COLUMNS, "csv", compress))
+
+def measure(fn, *args) -> tuple:
+    tracemalloc.start()
+    with timer() as elapsed:
+        size = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak / 1024 / 1024, elapsed()
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffered vs streamed export memory benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000])
+    args = parser.parse_args()
+
+    print(f"   {'rows':>8} {'buffered MB':>12} {'ms':>9} {'streamed MB':>12} {'ms':>9} {'gzip MB':>9} {'bytes':>12}")
+    for rows in args.rows:
+        _, buffered_mb, buffered_ms = measure(buffered_export, rows)
+        size, streamed_mb, streamed_ms = measure(streamed_export, rows)
+        _, gzip_mb, _ = measure(streamed_export, rows, True)
+        print(f"   {rows:>8} {buffered_mb:>12.1f} {buffered_ms:>9.0f} {streamed_mb:>12.1f} {streamed_ms:>9.0f} "
+              f"{gzip_mb:>9.1f} {size:>12}")
+
+if __name__ == "__main__":
+    main()
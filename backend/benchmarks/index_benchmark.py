@@ -0,0 +1,157 @@
+"""
+Hot-path index benchmark and EXPLAIN regression check.
+
+    python -m benchmarks.seed --database-url $BENCH_URL --bookings 1000000
+    alembic upgrade head          (with DATABASE_URL=$BENCH_URL)
+    python -m benchmarks.index_benchmark --database-url $BENCH_URL
+
+For every hot query shape used by the routers it
+  1. checks EXPLAIN picks the index meant for it (exit code 1 if not), and
+  2. times it with the indexes and again with them dropped inside a
+     transaction that is rolled back afterwards.
+
+Use --check-only in CI to run just the plan assertions.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.common import latency_summary
+
+# name -> (sql, expected index); parameters are filled from sample rows
+HOT_QUERIES = {
+    "availability_check": (
+        """SELECT id FROM bookings
+           WHERE property_id = :property_id AND status IN ('PENDING', 'CONFIRMED')
+             AND start_date < :end_date AND end_date > :start_date""",
+        "ix_bookings_property_active",
+    ),
+    "occupancy_by_property": (
+        """SELECT start_date, end_date FROM bookings
+           WHERE property_id = :property_id AND status IN ('CONFIRMED', 'COMPLETED')
+             AND start_date <= :end_date AND end_date >= :start_date""",
+        "ix_bookings_property_occupied",
+    ),
+    "my_bookings": (
+        "SELECT * FROM bookings WHERE user_id = :user_id ORDER BY created_at DESC",
+        "ix_bookings_user_created",
+    ),
+    "owner_bookings": (
+        """SELECT b.* FROM bookings b JOIN properties p ON p.id = b.property_id
+           WHERE p.owner_id = :owner_id ORDER BY b.created_at DESC""",
+        "ix_bookings_property_created",
+    ),
+    "booking_payments": (
+        "SELECT * FROM payments WHERE booking_id = :booking_id",
+        "ix_payments_booking_id",
+    ),
+    "revenue_window": (
+        """SELECT sum(amount) FROM payments
+           WHERE status = 'COMPLETED' AND paid_at >= :start_date AND paid_at <= :end_date""",
+        "ix_payments_completed_paid_at",
+    ),
+    "owner_revenue": (
+        """SELECT b.property_id, sum(p.amount) FROM payments p JOIN bookings b ON b.id = p.booking_id
+           WHERE p.status = 'COMPLETED'
+             AND b.property_id IN (SELECT id FROM properties WHERE owner_id = :owner_id)
+           GROUP BY b.property_id""",
+        "ix_payments_booking_completed",
+    ),
+    "bookings_this_month": (
+        "SELECT count(*) FROM bookings WHERE created_at >= :start_date",
+        "ix_bookings_created_at",
+    ),
+}
+
+def sample_params(conn) -> dict:
+    row = conn.execute(text("""
+        SELECT b.id AS booking_id, b.user_id, b.property_id, p.owner_id
+        FROM bookings b JOIN properties p ON p.id = b.property_id
+        ORDER BY b.id DESC LIMIT 1
+    """)).mappings().first()
+    if not row:
+        raise SystemExit("❌ No bookings found - run benchmarks.seed first.")
+    params = dict(row)
+    params['end_date'] = conn.execute(text("SELECT now()::timestamp")).scalar()
+    params['start_date'] = conn.execute(text("SELECT (now() - interval '30 days')::timestamp")).scalar()
+    return params
+
+def used_indexes(plan) -> set:
+    """Every 'Index Name' anywhere in an EXPLAIN (FORMAT JSON) plan tree."""
+    found = set()
+    if isinstance(plan, dict):
+        if 'Index Name' in plan:
+            found.add(plan['Index Name'])
+        for value in plan.values():
+            found |= used_indexes(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            found |= used_indexes(item)
+    return found
+
+def explain(conn, sql: str, params: dict) -> set:
+    raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    return used_indexes(raw if isinstance(raw, list) else json.loads(raw))
+
+def time_query(conn, sql: str, params: dict, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return latency_summary(samples)
+
+def check_plans(conn, params) -> bool:
+    ok = True
+    print("\n🔍 EXPLAIN regression check")
+    for name, (sql, expected) in HOT_QUERIES.items():
+        indexes = explain(conn, sql, params)
+        passed = expected in indexes
+        ok = ok and passed
+        print(f"   {'✅' if passed else '❌'} {name:<24} expected {expected}, plan used {sorted(indexes) or 'seq scan'}")
+    return ok
+
+def run_benchmark(conn, params, repeat: int):
+    with_indexes = {name: time_query(conn, sql, params, repeat) for name, (sql, _) in HOT_QUERIES.items()}
+
+    # Drop the hot-path indexes inside a transaction and roll it back afterwards
+    trans = conn.begin_nested() if conn.in_transaction() else conn.begin()
+    try:
+        for _, expected in HOT_QUERIES.values():
+            conn.execute(text(f"DROP INDEX IF EXISTS {expected}"))
+        without_indexes = {name: time_query(conn, sql, params, repeat) for name, (sql, _) in HOT_QUERIES.items()}
+    finally:
+        trans.rollback()
+
+    print(f"\n⏱️  Latency over {repeat} runs (p50 / p99 ms)")
+    print(f"   {'query':<24} {'with indexes':>18} {'without':>18} {'speedup':>9}")
+    for name in HOT_QUERIES:
+        w, wo = with_indexes[name], without_indexes[name]
+        speedup = wo['p50_ms'] / w['p50_ms'] if w['p50_ms'] else 0
+        print(f"   {name:<24} {w['p50_ms']:>8} / {w['p99_ms']:<8} {wo['p50_ms']:>8} / {wo['p99_ms']:<8} {speedup:>8.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path index EXPLAIN check and benchmark")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--check-only", action="store_true", help="only assert the plans")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    with engine.connect() as conn:
+        counts = conn.execute(text("SELECT (SELECT count(*) FROM bookings), (SELECT count(*) FROM payments)")).one()
+        print(f"📊 Dataset: {counts[0]} bookings, {counts[1]} payments")
+
+        params = sample_params(conn)
+        plans_ok = check_plans(conn, params)
+        if not args.check_only:
+            run_benchmark(conn, params, args.repeat)
+
+    sys.exit(0 if plans_ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Retention scoring benchmark: per-row predict_retention loop vs predict_batch.
+
+    python -m benchmarks.ml_batch_benchmark --tenants 10000
+
+Needs no database: it generates feature rows shaped like
+MLDataService.prepare_features_for_user output, fits label encoders and a
+random forest on them, then scores every row both ways and checks that
+classes and probabilities agree.
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from app.services.ml_prediction_service import CATEGORICAL_FEATURES, SELECTED_FEATURES, MLPredictionService
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+def synthetic_features(n: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    nights = rng.integers(1, 120, n)
+    bookings = rng.integers(1, 8, n)
+    return pd.DataFrame({
+        'lead_time': rng.integers(0, 200, n),
+        'total_stay_nights': nights,
+        'stays_in_weekend_nights': nights // 3,
+        'stays_in_week_nights': nights - nights // 3,
+        'adults': rng.integers(1, 4, n),
+        'children': rng.integers(0, 3, n) * (rng.random(n) < 0.3),
+        'babies': (rng.random(n) < 0.05).astype(int),
+        'is_repeated_guest': (bookings > 1).astype(int),
+        'previous_cancellations': rng.integers(0, 3, n),
+        'previous_bookings_not_canceled': bookings - 1,
+        'booking_changes': rng.integers(0, 3, n),
+        'adr': rng.uniform(300, 3000, n).round(2),
+        'total_of_special_requests': rng.integers(0, 3, n),
+        'hotel': 'City Hotel',
+        'arrival_date_month': rng.choice(MONTHS, n),
+        'meal': rng.choice(['SC', 'BB', 'HB'], n),
+        'market_segment': rng.choice(['Direct', 'Online TA', 'Groups'], n),
+        'distribution_channel': 'Direct',
+        'deposit_type': rng.choice(['No Deposit', 'Non Refund'], n),
+        'customer_type': rng.choice(['Transient', 'Contract'], n),
+    })
+
+def fitted_service(frame: pd.DataFrame) -> MLPredictionService:
+    """An MLPredictionService with encoders and a forest fitted on the frame"""
+    service = MLPredictionService(model_dir=tempfile.mkdtemp())
+
+    service.label_encoders = {
+        col: LabelEncoder().fit(frame[col].astype(str)) for col in CATEGORICAL_FEATURES if col != 'guest_type'
+    }
+    service.label_encoders['guest_type'] = LabelEncoder().fit(['Couple', 'Family', 'Single'])
+
+    X = service._engineer_features(frame)
+    y = ((X['lead_time'] > 60) ^ (X['is_repeated_guest'] == 1)).astype(int)
+    service.model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42, n_jobs=-1).fit(X, y)
+    return service
+
+def legacy_predict_retention(service: MLPredictionService, raw_data: dict) -> dict:
+    """The pre-batch implementation, kept here for comparison"""
+    df = pd.DataFrame([raw_data])
+
+    if 'total_stay_nights' not in df.columns:
+        df['total_stay_nights'] = df.get('stays_in_weekend_nights', 0) + df.get('stays_in_week_nights', 1)
+
+    lead_val = df['lead_time'].iloc[0]
+    if lead_val <= 7: cat = 'Last_Minute'
+    elif lead_val <= 30: cat = 'Short_Term'
+    elif lead_val <= 90: cat = 'Medium_Term'
+    else: cat = 'Long_Term'
+    df['lead_time_category'] = cat
+
+    adults = df.get('adults', 1).iloc[0]
+    children = df.get('children', 0).iloc[0]
+    df['adr_per_person'] = df['adr'] / (adults + children + 0.1)
+
+    df['has_special_requests'] = (df['total_of_special_requests'] > 0).astype(int)
+    df['has_booking_changes'] = (df['booking_changes'] > 0).astype(int)
+    df['is_repeated_guest'] = df['is_repeated_guest'].astype(int)
+    df['previous_bookings_total'] = df.get('previous_cancellations', 0) + df.get('previous_bookings_not_canceled', 0)
+
+    def get_guest_type(row):
+        if row.get('children', 0) > 0 or row.get('babies', 0) > 0: return 'Family'
+        if row.get('adults', 1) >= 2: return 'Couple'
+        return 'Single'
+    df['guest_type'] = df.apply(get_guest_type, axis=1)
+    df['deposit_given'] = (df['deposit_type'] != 'No Deposit').astype(int)
+
+    for col in SELECTED_FEATURES:
+        if col not in df.columns:
+            df[col] = 0 if col not in ['hotel', 'meal', 'market_segment', 'distribution_channel', 'customer_type', 'guest_type'] else 'Undefined'
+
+    X = df[SELECTED_FEATURES].copy()
+    for col in CATEGORICAL_FEATURES:
+        le = service.label_encoders.get(col)
+        if le:
+            val = str(X[col].iloc[0])
+            if val in le.classes_:
+                X[col] = le.transform([val])[0]
+            else:
+                X[col] = 0
+
+    prediction_class = service.model.predict(X)[0]
+    probabilities = service.model.predict_proba(X)[0]
+    return {
+        'will_retain': bool(prediction_class == 0),
+        'churn_probability': float(probabilities[1]),
+        'risk_score': int(probabilities[1] * 100),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row vs batch retention scoring")
+    parser.add_argument("--tenants", type=int, default=10000)
+    parser.add_argument("--legacy-rows", type=int, default=None,
+                        help="score only this many rows with the per-row loop and extrapolate")
+    args = parser.parse_args()
+
+    frame = synthetic_features(args.tenants)
+    service = fitted_service(frame)
+    legacy_rows = min(args.legacy_rows or args.tenants, args.tenants)
+    records = frame.head(legacy_rows).to_dict('records')
+
+    # Per-row loop (the old predict_all_tenants path)
+    started = time.perf_counter()
+    legacy = [legacy_predict_retention(service, record) for record in records]
+    legacy_s = (time.perf_counter() - started) * args.tenants / legacy_rows
+
+    started = time.perf_counter()
+    batch = service.predict_batch(frame)
+    batch_s = time.perf_counter() - started
+
+    head = batch.head(legacy_rows)
+    prob_diff = np.abs(head['churn_probability'].to_numpy() - [p['churn_probability'] for p in legacy]).max()
+    class_mismatch = int((head['will_retain'].to_numpy() != [p['will_retain'] for p in legacy]).sum())
+    score_mismatch = int((head['risk_score'].to_numpy() != [p['risk_score'] for p in legacy]).sum())
+
+    note = f" (extrapolated from {legacy_rows})" if legacy_rows < args.tenants else ""
+    print(f"\n⏱️  {args.tenants} tenants")
+    print(f"   per-row loop : {legacy_s:>9.2f} s{note}")
+    print(f"   predict_batch: {batch_s:>9.3f} s ({legacy_s / batch_s:.0f}x)")
+    ok = prob_diff < 1e-9 and class_mismatch == 0 and score_mismatch == 0
+    print(f"\n{'✅' if ok else '❌'} max |Δ churn probability| {prob_diff:.2e}, "
+          f"class mismatches {class_mismatch}, risk score mismatches {score_mismatch}")
+
+if __name__ == "__main__":
+    main()
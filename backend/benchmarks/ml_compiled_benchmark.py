@@ -0,0 +1,79 @@
+"""
+Compiled evaluator parity and single-row latency.
+
+    python -m benchmarks.ml_compiled_benchmark --rows 2000
+
+Needs no database. Fits a random forest (and a scaled logistic
+regression) on synthetic tenant features, exports them with
+CompiledModel.export, and checks that the compiled probabilities match
+sklearn's to 1e-9 on every row. Then scores rows one at a time through
+MLPredictionService.predict_one with and without the compiled evaluator
+and reports per-row latency percentiles.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from app.services.compiled_model import CompiledModel
+from benchmarks.common import latency_summary, print_summary
+from benchmarks.ml_batch_benchmark import fitted_service, synthetic_features
+
+def per_row_latencies(service, records) -> tuple:
+    predictions, samples = [], []
+    for record in records:
+        started = time.perf_counter()
+        predictions.append(service.predict_one(record))
+        samples.append((time.perf_counter() - started) * 1000)
+    return predictions, samples
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled evaluator parity and per-row latency")
+    parser.add_argument("--tenants", type=int, default=10000, help="rows for fitting and the parity check")
+    parser.add_argument("--rows", type=int, default=2000, help="rows scored one at a time")
+    args = parser.parse_args()
+
+    frame = synthetic_features(args.tenants)
+    service = fitted_service(frame)
+    X = service._engineer_features(frame)
+    X_values = X.to_numpy(dtype=np.float64)
+    y = ((X['lead_time'] > 60) ^ (X['is_repeated_guest'] == 1)).astype(int)
+
+    forest = CompiledModel.export(service.model)
+    forest_diff = np.abs(forest.predict_proba(X_values) - service.model.predict_proba(X)).max()
+
+    scaler = StandardScaler().fit(X)
+    logistic = LogisticRegression(max_iter=1000).fit(scaler.transform(X), y)
+    logistic_diff = np.abs(
+        CompiledModel.export(logistic, scaler).predict_proba(X_values) - logistic.predict_proba(scaler.transform(X))
+    ).max()
+
+    records = frame.head(args.rows).to_dict('records')
+
+    service.compiled = None
+    sklearn_predictions, sklearn_ms = per_row_latencies(service, records)
+    service.compiled = forest
+    compiled_predictions, compiled_ms = per_row_latencies(service, records)
+
+    row_diff = max(
+        abs(a['churn_probability'] - b['churn_probability']) for a, b in zip(sklearn_predictions, compiled_predictions)
+    )
+    mismatches = sum(
+        (a['will_retain'], a['risk_score']) != (b['will_retain'], b['risk_score'])
+        for a, b in zip(sklearn_predictions, compiled_predictions)
+    )
+
+    print_summary(f"sklearn per-row ({args.rows} rows)", latency_summary(sklearn_ms))
+    print_summary(f"compiled per-row ({args.rows} rows)", latency_summary(compiled_ms))
+
+    ok = max(forest_diff, logistic_diff, row_diff) < 1e-9 and mismatches == 0
+    print(f"\n{'✅' if ok else '❌'} max |Δ probability| forest {forest_diff:.2e}, logistic {logistic_diff:.2e}, "
+          f"predict_one {row_diff:.2e}; class/risk score mismatches {mismatches}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Tree-path contribution cost and correctness.
+
+    python -m benchmarks.ml_explain_benchmark --tenants 20000
+
+Needs no database. Fits a forest on synthetic tenant features and times
+predict_batch against ExplanationService.key_factors on the same rows.
+Two checks:
+
+    additivity  bias + sum of contributions == the forest's churn probability
+    reference   contributions match a per-row, per-tree decision_path walk
+                on a sample of rows
+
+Exits non-zero if either check fails by more than 1e-9.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.services.explanation_service import ContributionExplainer, ExplanationService
+from benchmarks.ml_batch_benchmark import fitted_service, synthetic_features
+
+def reference_contributions(model, X: np.ndarray) -> np.ndarray:
+    """Saabas contributions the slow way: one row and one tree at a time"""
+    churn = list(model.classes_).index(1)
+    result = np.zeros(X.shape)
+    for row in range(X.shape[0]):
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            value = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+            path = estimator.decision_path(X[row:row + 1]).indices
+            for parent, child in zip(path[:-1], path[1:]):
+                result[row, tree.feature[parent]] += value[child, churn] - value[parent, churn]
+    return result / len(model.estimators_)
+
+def main():
+    parser = argparse.ArgumentParser(description="Tree-path contributions vs prediction cost")
+    parser.add_argument("--tenants", type=int, default=20000)
+    parser.add_argument("--reference-rows", type=int, default=50, help="rows checked against decision_path")
+    args = parser.parse_args()
+
+    frame = synthetic_features(args.tenants)
+    service = fitted_service(frame)
+    X = service._engineer_features(frame).to_numpy(dtype=np.float64)
+
+    started = time.perf_counter()
+    service.predict_batch(frame)
+    predict_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    factors = ExplanationService.key_factors(service, frame)
+    explain_ms = (time.perf_counter() - started) * 1000
+
+    explainer = ContributionExplainer.for_model(service.model)
+    contributions = explainer.contributions(X)
+    churn = service.model.predict_proba(X)[:, list(service.model.classes_).index(1)]
+    additivity = np.abs(explainer.bias + contributions.sum(axis=1) - churn).max()
+
+    sample = X[:args.reference_rows]
+    reference = np.abs(explainer.contributions(sample) - reference_contributions(service.model, sample)).max()
+
+    print(f"\n📊 {args.tenants} rows: predict_batch {predict_ms:.1f} ms, key_factors {explain_ms:.1f} ms "
+          f"({explain_ms / args.tenants * 1000:.1f} µs/row)")
+    print(f"   e.g. {factors[0]}")
+
+    ok = max(additivity, reference) < 1e-9
+    print(f"\n{'✅' if ok else '❌'} max |Δ| additivity {additivity:.2e}, vs decision_path {reference:.2e}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Parity and query-count check for the bulk retention feature extractor.
+
+    python -m benchmarks.seed --database-url $BENCH_URL --bookings 200000
+    python -m benchmarks.ml_feature_parity --database-url $BENCH_URL
+
+Builds every tenant's features with the per-user
+MLDataService.prepare_features_for_user loop (2 queries per tenant) and
+with collect_features_bulk (one query), then compares them row by row.
+Exits non-zero on any mismatch.
+"""
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models import all_models as models
+from app.services.ml_data_service import FEATURE_COLUMNS, MLDataService
+
+def per_user_features(db, limit):
+    tenants = db.query(models.User).filter(
+        models.User.role == models.UserRole.TENANT
+    ).order_by(models.User.id).limit(limit).all()
+
+    rows = []
+    for tenant in tenants:
+        features = MLDataService.prepare_features_for_user(db, tenant)
+        if features:
+            rows.append({'user_id': tenant.id, **features})
+    return pd.DataFrame(rows, columns=['user_id'] + FEATURE_COLUMNS), [tenant.id for tenant in tenants]
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-user vs bulk retention feature parity")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--tenants", type=int, default=None, help="compare only the first N tenants")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Session = sessionmaker(bind=engine)
+    counter = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: counter.__setitem__(0, counter[0] + 1))
+
+    db = Session()
+    try:
+        started = time.perf_counter()
+        legacy, tenant_ids = per_user_features(db, args.tenants)
+        legacy_queries, legacy_ms = counter[0], (time.perf_counter() - started) * 1000
+
+        counter[0] = 0
+        started = time.perf_counter()
+        bulk = MLDataService.collect_features_bulk(db, tenant_ids if args.tenants else None)
+        bulk_queries, bulk_ms = counter[0], (time.perf_counter() - started) * 1000
+    finally:
+        db.close()
+
+    legacy = legacy.set_index('user_id').sort_index()
+    bulk = bulk.set_index('user_id').sort_index()
+    same_tenants = legacy.index.equals(bulk.index)
+    mismatched = []
+    if same_tenants:
+        differs = (legacy.astype(str) != bulk.astype(str)).any(axis=1)
+        mismatched = list(legacy.index[differs])
+
+    ok = same_tenants and not mismatched
+    print(f"\n{'✅' if ok else '❌'} retention features: {len(legacy)} tenants with bookings")
+    print(f"   per-user: {legacy_queries:>6} queries {legacy_ms:>10.1f} ms")
+    print(f"   bulk    : {bulk_queries:>6} queries {bulk_ms:>10.1f} ms")
+    if not same_tenants:
+        print(f"   tenant sets differ: {len(legacy.index.difference(bulk.index))} only per-user, "
+              f"{len(bulk.index.difference(legacy.index))} only bulk")
+    for user_id in mismatched[:5]:
+        columns = [c for c in FEATURE_COLUMNS if str(legacy.at[user_id, c]) != str(bulk.at[user_id, c])]
+        print(f"   user {user_id}: " + ", ".join(
+            f"{c} per-user={legacy.at[user_id, c]} bulk={bulk.at[user_id, c]}" for c in columns
+        ))
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
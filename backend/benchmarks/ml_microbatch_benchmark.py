@@ -0,0 +1,84 @@
+"""
+Micro-batching throughput and latency for concurrent single-row predictions.
+
+    python -m benchmarks.ml_microbatch_benchmark --concurrency 64 --requests 4000
+
+Needs no database. Fits a forest on synthetic tenant features, then
+--concurrency callers each score rows one at a time (closed loop) until
+--requests rows are done:
+
+    per-row   predict_one on a one-thread executor (one model call per row)
+    batched   MicroBatcher.submit (one predict_batch call per batch)
+
+and reports per-request latency, rows/s and the batcher's batch-size and
+queueing-delay histograms. Exits non-zero if the two disagree on any row.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.services.inference_service import score_rows
+from app.services.micro_batcher import MicroBatcher
+from benchmarks.common import latency_summary, print_summary
+from benchmarks.ml_batch_benchmark import fitted_service, synthetic_features
+
+async def drive(score, records: list, concurrency: int, total: int) -> tuple:
+    results, samples = {}, []
+    next_index = iter(range(total))
+
+    async def caller():
+        for index in next_index:
+            started = time.perf_counter()
+            results[index] = await score(records[index % len(records)])
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return results, samples, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batched vs per-row scoring under concurrency")
+    parser.add_argument("--tenants", type=int, default=5000, help="rows to fit the model on")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--batch-rows", type=int, default=64)
+    parser.add_argument("--window-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    frame = synthetic_features(args.tenants)
+    service = fitted_service(frame)
+    records = frame.head(1000).to_dict('records')
+
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    async def per_row(record):
+        return await asyncio.get_running_loop().run_in_executor(executor, service.predict_one, record)
+
+    batcher = MicroBatcher(partial(score_rows, service), max_batch_rows=args.batch_rows, max_wait_ms=args.window_ms)
+
+    single, single_ms, single_s = asyncio.run(drive(per_row, records, args.concurrency, args.requests))
+    batched, batched_ms, batched_s = asyncio.run(drive(batcher.submit, records, args.concurrency, args.requests))
+
+    print_summary(f"per-row ({args.requests / single_s:.0f} rows/s)", latency_summary(single_ms))
+    print_summary(f"batched ({args.requests / batched_s:.0f} rows/s)", latency_summary(batched_ms))
+
+    metrics = batcher.metrics()
+    print_summary("batch size", metrics['batch_size'])
+    print_summary("queue delay (ms)", metrics['queue_delay_ms'])
+
+    max_diff = max(abs(single[i]['churn_probability'] - batched[i]['churn_probability']) for i in single)
+    mismatches = sum(
+        (single[i]['will_retain'], single[i]['risk_score']) != (batched[i]['will_retain'], batched[i]['risk_score'])
+        for i in single
+    )
+    ok = max_diff < 1e-9 and mismatches == 0
+    print(f"\n{'✅' if ok else '❌'} max |Δ probability| {max_diff:.2e}; class/risk score mismatches {mismatches}; "
+          f"speedup {single_s / batched_s:.1f}x")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+API latency under mixed load, with and without the inference worker.
+
+    python -m benchmarks.ml_offload_benchmark --predict-rps 40 --light-rps 200 --duration 20
+
+Needs no database. Fits a forest on synthetic tenant features, registers
+it in a temporary registry and starts inference_worker.py on it. A small
+FastAPI app then serves a cheap endpoint (standing in for the rest of the
+API) next to a prediction endpoint, driven in-process through httpx's
+ASGI transport at a fixed open-loop rate:
+
+    local    sync handler, predict_one on the API's threadpool (the old way)
+    offload  async handler awaiting the inference worker
+
+and reports p50/p95/p99 of both endpoints in each mode. Exits non-zero
+if the two modes disagree on any prediction.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+import joblib
+from fastapi import FastAPI
+
+from app.services.inference_service import InferenceClient
+from app.services.model_registry import ModelRegistry
+from benchmarks.common import latency_summary, print_summary
+from benchmarks.ml_batch_benchmark import fitted_service, synthetic_features
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def register_model(service, model_dir: str):
+    registry = ModelRegistry(os.path.join(model_dir, "registry"))
+    model_path = os.path.join(model_dir, "model.pkl")
+    encoders_path = os.path.join(model_dir, "label_encoders.pkl")
+    joblib.dump(service.model, model_path)
+    joblib.dump(service.label_encoders, encoders_path)
+    registry.promote(registry.register(model_path, encoders_path, metadata={"note": "offload benchmark"})["version"])
+
+def start_worker(model_dir: str, socket_path: str) -> subprocess.Popen:
+    worker = subprocess.Popen(
+        [sys.executable, "inference_worker.py", "--socket", socket_path, "--model-dir", model_dir],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        if worker.poll() is not None or time.monotonic() > deadline:
+            worker.kill()
+            raise SystemExit("❌ Inference worker did not start")
+        time.sleep(0.1)
+    return worker
+
+def build_app(service, client: InferenceClient, records: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/light")
+    def light():
+        return {"status": "ok"}
+
+    @app.get("/predict/local/{index}")
+    def predict_local(index: int):
+        return service.predict_one(records[index])
+
+    @app.get("/predict/offload/{index}")
+    async def predict_offload(index: int):
+        return (await client.predict([records[index]]))[0]
+
+    return app
+
+async def run_mode(app, mode: str, records: list, args) -> dict:
+    stats = {'predict': [], 'light': [], 'errors': Counter(), 'results': {}}
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call(kind, path, index=None):
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+            except Exception as e:
+                stats['errors'][f"{kind}:{type(e).__name__}"] += 1
+                return
+            stats[kind].append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                stats['errors'][f"{kind}:{response.status_code}"] += 1
+            elif index is not None:
+                stats['results'][index] = response.json()
+
+        # Merged open-loop schedule of both request streams
+        schedule = sorted(
+            [(i / args.predict_rps, 'predict') for i in range(int(args.predict_rps * args.duration))] +
+            [(i / args.light_rps, 'light') for i in range(int(args.light_rps * args.duration))]
+        )
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tasks, sent = [], 0
+        for offset, kind in schedule:
+            delay = start + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if kind == 'predict':
+                index = sent % len(records)
+                tasks.append(asyncio.create_task(call(kind, f"/predict/{mode}/{index}", index)))
+                sent += 1
+            else:
+                tasks.append(asyncio.create_task(call(kind, "/light")))
+        await asyncio.gather(*tasks)
+
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="API p99 with and without the inference worker")
+    parser.add_argument("--tenants", type=int, default=5000, help="rows to fit the model on")
+    parser.add_argument("--predict-rps", type=float, default=40)
+    parser.add_argument("--light-rps", type=float, default=200)
+    parser.add_argument("--duration", type=float, default=20, help="seconds per mode")
+    args = parser.parse_args()
+
+    frame = synthetic_features(args.tenants)
+    service = fitted_service(frame)
+    records = frame.head(500).to_dict('records')
+
+    model_dir = tempfile.mkdtemp()
+    socket_path = os.path.join(model_dir, "inference.sock")
+    register_model(service, model_dir)
+    worker = start_worker(model_dir, socket_path)
+
+    try:
+        app = build_app(service, InferenceClient(socket_path), records)
+        results = {}
+        for mode in ("local", "offload"):
+            stats = asyncio.run(run_mode(app, mode, records, args))
+            results[mode] = stats
+            print_summary(f"{mode}: prediction endpoint", latency_summary(stats['predict']))
+            print_summary(f"{mode}: light endpoint", latency_summary(stats['light']))
+            if stats['errors']:
+                print(f"   errors: {dict(stats['errors'])}")
+    finally:
+        worker.terminate()
+        worker.wait()
+
+    local, offload = results['local']['results'], results['offload']['results']
+    mismatches = sum(
+        (local[i]['risk_score'], local[i]['will_retain']) != (offload[i]['risk_score'], offload[i]['will_retain'])
+        for i in local.keys() & offload.keys()
+    )
+    errors = sum(results[mode]['errors'].total() for mode in results)
+
+    for kind in ('light', 'predict'):
+        before = latency_summary(results['local'][kind])['p99_ms']
+        after = latency_summary(results['offload'][kind])['p99_ms']
+        print(f"\n📊 {kind} p99: {before} ms local -> {after} ms offloaded")
+
+    ok = mismatches == 0 and errors == 0
+    print(f"\n{'✅' if ok else '❌'} prediction mismatches {mismatches}, errors {errors}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
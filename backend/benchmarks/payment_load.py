@@ -0,0 +1,123 @@
+"""
+Payment flow load/soak scenario: create-intent -> confirm at a target RPS.
+
+Start the API against the offline gateway first, e.g.
+
+    PAYMENT_GATEWAY=simulator SIM_LATENCY_MS=80 SIM_ERROR_RATE=0.01 \\
+    SIM_WEBHOOK_URL=http://localhost:8000/payments/webhook \\
+        uvicorn app.main:app --workers 4
+
+then drive it:
+
+    python -m benchmarks.payment_load --rps 50 --duration 60 \\
+        --email tenant1@gmail.com --password tenant123
+
+The schedule is open-loop: a new flow starts every 1/RPS seconds whether or
+not earlier ones finished, so a slow server shows up as tail latency instead
+of quietly lowering the offered load.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.common import latency_summary, print_summary
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def pick_bookings(client: httpx.AsyncClient, booking_ids):
+    if booking_ids:
+        return booking_ids
+    response = await client.get("/bookings/my-bookings")
+    response.raise_for_status()
+    ids = [b["id"] for b in response.json()]
+    if not ids:
+        raise SystemExit("❌ This user has no bookings. Pass --booking-ids or seed data first.")
+    return ids
+
+async def run_flow(client, booking_id, stats):
+    started = time.perf_counter()
+
+    try:
+        t0 = time.perf_counter()
+        response = await client.post(
+            "/payments/create-intent",
+            json={"booking_id": booking_id, "payment_method": "card"},
+        )
+        stats['create_ms'].append((time.perf_counter() - t0) * 1000)
+        if response.status_code != 200:
+            stats['errors'][f"create:{response.status_code}"] += 1
+            return
+
+        t0 = time.perf_counter()
+        response = await client.post(
+            "/payments/confirm",
+            json={"payment_intent_id": response.json()["payment_intent_id"]},
+        )
+        stats['confirm_ms'].append((time.perf_counter() - t0) * 1000)
+        if response.status_code != 200:
+            stats['errors'][f"confirm:{response.status_code}"] += 1
+            return
+
+        stats['flow_ms'].append((time.perf_counter() - started) * 1000)
+
+    except httpx.HTTPError as e:
+        stats['errors'][type(e).__name__] += 1
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        token = await login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+        booking_ids = await pick_bookings(client, args.booking_ids)
+
+        stats = {'create_ms': [], 'confirm_ms': [], 'flow_ms': [], 'errors': Counter()}
+        interval = 1.0 / args.rps
+        total = int(args.rps * args.duration)
+        tasks = []
+
+        print(f"🚀 {total} flows at {args.rps} RPS over {args.duration}s against {args.base_url}")
+        started = time.perf_counter()
+
+        for i in range(total):
+            # Sleep until this flow's slot instead of a fixed interval so drift doesn't accumulate
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run_flow(client, random.choice(booking_ids), stats)))
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    completed = len(stats['flow_ms'])
+    print_summary("Throughput", {
+        'offered_rps': args.rps,
+        'achieved_rps': round(completed / elapsed, 2),
+        'completed': completed,
+        'failed': total - completed,
+        'elapsed_s': round(elapsed, 2),
+    })
+    print_summary("create-intent latency", latency_summary(stats['create_ms']))
+    print_summary("confirm latency", latency_summary(stats['confirm_ms']))
+    print_summary("end-to-end flow latency", latency_summary(stats['flow_ms']))
+    if stats['errors']:
+        print_summary("Errors", dict(stats['errors']))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive create-intent -> confirm at a target RPS")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--booking-ids", type=lambda s: [int(x) for x in s.split(",")], default=None)
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--max-connections", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
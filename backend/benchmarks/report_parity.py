@@ -0,0 +1,187 @@
+"""
+Parity and query-count check for the set-based report rewrites.
+
+    python -m benchmarks.seed --database-url $BENCH_URL --properties 2000 --bookings 200000
+    python -m benchmarks.report_parity --database-url $BENCH_URL
+
+Each report is computed by the original per-property loop (kept here
+verbatim) and by the current endpoint, and the outputs are compared
+row by row. Exits non-zero on any mismatch.
+
+The window is the endpoints' default shape - ending now, not at
+midnight - so the rollup-backed reports' partial first and last days are
+checked too. The rollups must be current (python rebuild_rollups.py).
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import reports
+from app.models import all_models as models
+
+ADMIN = SimpleNamespace(id=0, role=models.UserRole.ADMIN)
+
+def legacy_occupancy(db, start_date, end_date):
+    total_days = (end_date - start_date).days
+    report = []
+    for property in db.query(models.Property).order_by(models.Property.id).all():
+        bookings = db.query(models.Booking).filter(
+            models.Booking.property_id == property.id,
+            models.Booking.status.in_([models.BookingStatus.CONFIRMED, models.BookingStatus.COMPLETED]),
+            models.Booking.start_date <= end_date,
+            models.Booking.end_date >= start_date
+        ).all()
+        booked_days = 0
+        for booking in bookings:
+            overlap_start = max(booking.start_date, start_date)
+            overlap_end = min(booking.end_date, end_date)
+            booked_days += (overlap_end - overlap_start).days
+        revenue = db.query(func.sum(models.Payment.amount)).join(models.Booking).filter(
+            models.Booking.property_id == property.id,
+            models.Payment.status == models.PaymentStatus.COMPLETED,
+            models.Payment.paid_at >= start_date,
+            models.Payment.paid_at <= end_date
+        ).scalar() or 0.0
+        occupancy_rate = (booked_days / total_days * 100) if total_days > 0 else 0.0
+        report.append({
+            "property_id": property.id,
+            "property_name": property.name,
+            "total_days_in_period": total_days,
+            "booked_days": booked_days,
+            "occupancy_rate": round(occupancy_rate, 2),
+            "revenue": revenue,
+        })
+    return report
+
+def current_occupancy(db, start_date, end_date):
+    return reports.get_occupancy_report(
+        start_date=start_date, end_date=end_date, skip=0, limit=None, db=db, current_user=ADMIN
+    )
+
+def legacy_revenue(db, start_date, end_date):
+    total_revenue = db.query(func.sum(models.Payment.amount)).filter(
+        models.Payment.status == models.PaymentStatus.COMPLETED,
+        models.Payment.paid_at >= start_date,
+        models.Payment.paid_at <= end_date
+    ).scalar() or 0.0
+    bookings_query = db.query(models.Booking).filter(
+        models.Booking.created_at >= start_date,
+        models.Booking.created_at <= end_date
+    )
+    total_bookings = bookings_query.count()
+    return [{
+        "total_revenue": total_revenue,
+        "total_bookings": total_bookings,
+        "confirmed_bookings": bookings_query.filter(models.Booking.status == models.BookingStatus.CONFIRMED).count(),
+        "pending_bookings": bookings_query.filter(models.Booking.status == models.BookingStatus.PENDING).count(),
+        "cancelled_bookings": bookings_query.filter(models.Booking.status == models.BookingStatus.CANCELLED).count(),
+        "average_booking_value": total_revenue / total_bookings if total_bookings > 0 else 0.0,
+        "period_start": start_date,
+        "period_end": end_date,
+    }]
+
+def current_revenue(db, start_date, end_date):
+    return [reports.get_revenue_report(start_date=start_date, end_date=end_date, db=db, current_user=ADMIN)]
+
+def legacy_property_performance(db, start_date, end_date):
+    # The original hard-coded a 90-day window ending now
+    performance = []
+    for property in db.query(models.Property).order_by(models.Property.id).all():
+        total_bookings = db.query(models.Booking).filter(models.Booking.property_id == property.id).count()
+        total_revenue = db.query(func.sum(models.Payment.amount)).join(models.Booking).filter(
+            models.Booking.property_id == property.id,
+            models.Payment.status == models.PaymentStatus.COMPLETED
+        ).scalar() or 0.0
+        ninety_days_ago = datetime.utcnow() - timedelta(days=90)
+        booked_days = 0
+        bookings = db.query(models.Booking).filter(
+            models.Booking.property_id == property.id,
+            models.Booking.status.in_([models.BookingStatus.CONFIRMED, models.BookingStatus.COMPLETED]),
+            models.Booking.start_date <= datetime.utcnow(),
+            models.Booking.end_date >= ninety_days_ago
+        ).all()
+        for booking in bookings:
+            overlap_start = max(booking.start_date, ninety_days_ago)
+            overlap_end = min(booking.end_date, datetime.utcnow())
+            booked_days += (overlap_end - overlap_start).days
+        performance.append({
+            "property_id": property.id,
+            "property_name": property.name,
+            "total_bookings": total_bookings,
+            "total_revenue": total_revenue,
+            "occupancy_rate": round(booked_days / 90 * 100, 2),
+        })
+    performance.sort(key=lambda x: x['total_revenue'], reverse=True)
+    return performance
+
+def current_property_performance(db, start_date, end_date):
+    return reports.get_property_performance(
+        days=90, sort_by="total_revenue", order="desc", limit=None, db=db, current_user=ADMIN
+    )
+
+CHECKS = {
+    "occupancy": (legacy_occupancy, current_occupancy),
+    "revenue": (legacy_revenue, current_revenue),
+    "property_performance": (legacy_property_performance, current_property_performance),
+}
+
+def rows_match(a: dict, b: dict) -> bool:
+    if a.keys() != b.keys():
+        return False
+    for key in a:
+        if isinstance(a[key], float) or isinstance(b[key], float):
+            if abs(float(a[key]) - float(b[key])) > 1e-6:
+                return False
+        elif a[key] != b[key]:
+            return False
+    return True
+
+def run(Session, counter, fn, *args):
+    db = Session()
+    try:
+        before = counter[0]
+        started = time.perf_counter()
+        result = fn(db, *args)
+        return result, counter[0] - before, (time.perf_counter() - started) * 1000
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Legacy vs set-based report parity")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--days", type=int, default=90, help="report window ending now")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Session = sessionmaker(bind=engine)
+    counter = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: counter.__setitem__(0, counter[0] + 1))
+
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=args.days)
+    failed = False
+
+    for name, (legacy_fn, current_fn) in CHECKS.items():
+        legacy, legacy_queries, legacy_ms = run(Session, counter, legacy_fn, start_date, end_date)
+        current, current_queries, current_ms = run(Session, counter, current_fn, start_date, end_date)
+
+        mismatches = [i for i, (a, b) in enumerate(zip(legacy, current)) if not rows_match(a, b)]
+        ok = len(legacy) == len(current) and not mismatches
+        failed = failed or not ok
+
+        print(f"\n{'✅' if ok else '❌'} {name}: {len(legacy)} rows")
+        print(f"   legacy : {legacy_queries:>6} queries {legacy_ms:>10.1f} ms")
+        print(f"   current: {current_queries:>6} queries {current_ms:>10.1f} ms")
+        for i in mismatches[:5]:
+            print(f"   row {i}: legacy={legacy[i]} current={current[i]}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from app.models import all_models as models
 db = SessionLocal()
 db.query(models.Payment).delete()
 db.query(models.Booking).delete()
+db.query(models.DailyPropertyStats).delete()
+db.query(models.TenantRiskScore).delete()
 db.commit()
 print("✅ All bookings/payments cleared. Properties are open.")
 db.close()
\ No newline at end of file
@@ -0,0 +1,53 @@
+# ============================================================================
+# ML INFERENCE WORKER
+# Owns the retention model and scores feature rows for the API processes
+# over a Unix socket (see app/services/inference_service.py). Start the API
+# with ML_INFERENCE_SOCKET pointing at the same path to use it.
+# Run with: python inference_worker.py [--socket /tmp/sleepingbear-inference.sock]
+# ============================================================================
+
+import sys
+import os
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ml_prediction_service import MLPredictionService
+from app.services.inference_service import DEFAULT_INFERENCE_SOCKET, InferenceServer
+from app.services.micro_batcher import BATCH_MAX_ROWS, BATCH_WINDOW_MS
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve retention predictions over a Unix socket")
+    parser.add_argument("--socket", default=os.getenv("ML_INFERENCE_SOCKET") or DEFAULT_INFERENCE_SOCKET)
+    parser.add_argument("--model-dir", default=os.path.join("ml", "models"))
+    parser.add_argument("--batch-rows", type=int, default=BATCH_MAX_ROWS, help="most rows scored in one call")
+    parser.add_argument("--batch-window-ms", type=float, default=BATCH_WINDOW_MS,
+                        help="how long the first row of a batch waits for others")
+    args = parser.parse_args()
+
+    ml_service = MLPredictionService(model_dir=args.model_dir)
+    if not ml_service.model or not ml_service.label_encoders:
+        print("❌ Model not loaded - nothing to score with")
+        sys.exit(1)
+    if ml_service.monitor is not None:
+        # Build the drift reference here rather than on the first drift request
+        ml_service.monitor.prepare(ml_service.reload())
+
+    print("🧠 Inference worker started")
+    print(f"   Socket: {args.socket}, model version: {ml_service.model_version}")
+    print(f"   Micro-batches: up to {args.batch_rows} rows / {args.batch_window_ms} ms")
+    print("   Press Ctrl+C to stop\n")
+
+    try:
+        asyncio.run(InferenceServer(
+            ml_service, args.socket, max_batch_rows=args.batch_rows, max_wait_ms=args.batch_window_ms
+        ).serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
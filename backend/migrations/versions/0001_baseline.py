@@ -0,0 +1,25 @@
+"""baseline
+
+Tables are still created by Base.metadata.create_all() on app startup
+(app/main.py). This revision marks that schema as the starting point;
+later revisions only evolve it. For an existing database run once:
+
+    alembic stamp 0001_baseline
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
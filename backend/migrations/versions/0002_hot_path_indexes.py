@@ -0,0 +1,54 @@
+"""hot path indexes for foreign keys and status/time filters
+
+Matches the query shapes in app/api/v1 (see the Index() entries in
+app/models/all_models.py). Built CONCURRENTLY so it can run against a
+live database without blocking writes.
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_hot_path_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial predicate)
+INDEXES = [
+    ("ix_properties_owner_id", "properties", ["owner_id"], None),
+    ("ix_properties_status", "properties", ["status"], None),
+    ("ix_bookings_property_active", "bookings", ["property_id", "start_date", "end_date"],
+     "status IN ('PENDING', 'CONFIRMED')"),
+    ("ix_bookings_property_occupied", "bookings", ["property_id", "start_date", "end_date"],
+     "status IN ('CONFIRMED', 'COMPLETED')"),
+    ("ix_bookings_property_created", "bookings", ["property_id", "created_at"], None),
+    ("ix_bookings_user_created", "bookings", ["user_id", "created_at"], None),
+    ("ix_bookings_status_created", "bookings", ["status", "created_at"], None),
+    ("ix_bookings_created_at", "bookings", ["created_at"], None),
+    ("ix_payments_booking_id", "payments", ["booking_id"], None),
+    ("ix_payments_completed_paid_at", "payments", ["paid_at"], "status = 'COMPLETED'"),
+    ("ix_payments_created_at", "payments", ["created_at"], None),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for table in ("properties", "bookings", "payments"):
+            op.execute(f"ANALYZE {table}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,31 @@
+"""partial index on pending payments
+
+Backs GET /payments/review-queue and the payment reconciliation job,
+both of which walk PENDING payments in id order.
+
+Revision ID: 0003_pending_payments_index
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_pending_payments_index"
+down_revision = "0002_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_payments_pending", "payments", ["id", "booking_id"],
+            postgresql_where=sa.text("status = 'PENDING'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_payments_pending", table_name="payments", postgresql_concurrently=True, if_exists=True)
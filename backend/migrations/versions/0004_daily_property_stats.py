@@ -0,0 +1,45 @@
+"""daily_property_stats report rollups
+
+Creates the table behind the rollup-backed reports. The app's create_all
+may already have created it, hence the existence check. Populate it with
+`python rebuild_rollups.py` after upgrading.
+
+Revision ID: 0004_daily_property_stats
+Revises: 0003_pending_payments_index
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_daily_property_stats"
+down_revision = "0003_pending_payments_index"
+branch_labels = None
+depends_on = None
+
+COUNTERS = [
+    ("revenue", sa.Float()),
+    ("payments_completed", sa.Integer()),
+    ("bookings_created", sa.Integer()),
+    ("bookings_pending", sa.Integer()),
+    ("bookings_confirmed", sa.Integer()),
+    ("bookings_cancelled", sa.Integer()),
+    ("bookings_completed", sa.Integer()),
+    ("bookings_rejected", sa.Integer()),
+    ("bookings_declined", sa.Integer()),
+    ("occupied_nights", sa.Integer()),
+]
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("daily_property_stats"):
+        op.create_table(
+            "daily_property_stats",
+            sa.Column("property_id", sa.Integer(), sa.ForeignKey("properties.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            *[sa.Column(name, type_, nullable=False, server_default="0") for name, type_ in COUNTERS],
+        )
+    op.create_index("ix_daily_property_stats_day", "daily_property_stats", ["day"], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_table("daily_property_stats")
@@ -0,0 +1,44 @@
+"""updated_at on users, properties, bookings and payments
+
+Lets the analytics snapshot job pick up only rows changed since its last
+run. Existing rows are stamped with their created_at (or now).
+
+Revision ID: 0005_updated_at_columns
+Revises: 0004_daily_property_stats
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_updated_at_columns"
+down_revision = "0004_daily_property_stats"
+branch_labels = None
+depends_on = None
+
+TABLES = ["users", "properties", "bookings", "payments"]
+
+# (name, table) - built CONCURRENTLY, the two large tables only
+INDEXES = [
+    ("ix_bookings_updated_at", "bookings"),
+    ("ix_payments_updated_at", "payments"),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        if "updated_at" not in {column["name"] for column in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL")
+
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(name, table, ["updated_at"], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    for table in TABLES:
+        op.drop_column(table, "updated_at")
@@ -0,0 +1,48 @@
+"""composite indexes for owner-scoped reports
+
+ix_properties_owner_portfolio (owner_id, id, is_available) resolves an
+owner's units and availability from the index alone and replaces the
+single-column ix_properties_owner_id. ix_payments_booking_completed
+serves per-property revenue sums without touching the payments heap.
+
+Revision ID: 0006_owner_scope_indexes
+Revises: 0005_updated_at_columns
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_owner_scope_indexes"
+down_revision = "0005_updated_at_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_properties_owner_portfolio", "properties", ["owner_id", "id", "is_available"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_payments_booking_completed", "payments", ["booking_id"],
+            postgresql_include=["amount"],
+            postgresql_where=sa.text("status = 'COMPLETED'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index("ix_properties_owner_id", table_name="properties", postgresql_concurrently=True, if_exists=True)
+        op.execute("ANALYZE properties")
+        op.execute("ANALYZE payments")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_properties_owner_id", "properties", ["owner_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index("ix_payments_booking_completed", table_name="payments", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_properties_owner_portfolio", table_name="properties", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,48 @@
+"""tenant_risk_scores table
+
+Persisted retention scores served by the ML read endpoints. The app's
+create_all may already have created it, hence the existence check.
+Populate it with `python risk_score_worker.py --once` after upgrading.
+
+Revision ID: 0007_tenant_risk_scores
+Revises: 0006_owner_scope_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_tenant_risk_scores"
+down_revision = "0006_owner_scope_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("tenant_risk_scores"):
+        op.create_table(
+            "tenant_risk_scores",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("risk_score", sa.Integer()),
+            sa.Column("risk_level", sa.String()),
+            sa.Column("will_retain", sa.Boolean()),
+            sa.Column("churn_probability", sa.Float()),
+            sa.Column("retention_probability", sa.Float()),
+            sa.Column("recommendation", sa.String()),
+            sa.Column("model_version", sa.String()),
+            sa.Column("computed_at", sa.DateTime()),
+            sa.Column("is_stale", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+            sa.Column("stale_version", sa.Integer(), nullable=False, server_default="0"),
+        )
+    op.create_index("ix_tenant_risk_scores_score", "tenant_risk_scores", ["risk_score"], if_not_exists=True)
+    op.create_index(
+        "ix_tenant_risk_scores_level_score", "tenant_risk_scores", ["risk_level", "risk_score"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_tenant_risk_scores_stale", "tenant_risk_scores", ["user_id"],
+        postgresql_where=sa.text("is_stale"),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table("tenant_risk_scores")
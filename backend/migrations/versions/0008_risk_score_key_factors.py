@@ -0,0 +1,28 @@
+"""tenant_risk_scores.key_factors
+
+Per-feature contributions behind each persisted score, served with the
+at-risk listing. The app's create_all may already have added it (new
+databases), hence the existence check. Existing rows get factors on the
+next full refresh (`python risk_score_worker.py --once`).
+
+Revision ID: 0008_risk_score_key_factors
+Revises: 0007_tenant_risk_scores
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_risk_score_key_factors"
+down_revision = "0007_tenant_risk_scores"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("tenant_risk_scores")}
+    if "key_factors" not in columns:
+        op.add_column("tenant_risk_scores", sa.Column("key_factors", sa.JSON()))
+
+
+def downgrade():
+    op.drop_column("tenant_risk_scores", "key_factors")
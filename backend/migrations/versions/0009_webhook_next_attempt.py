@@ -0,0 +1,28 @@
+"""stripe_webhook_events.next_attempt_at
+
+Exponential backoff for webhook events whose processing failed: the
+worker skips an event until its next_attempt_at has passed. NULL (every
+existing row) means due now. The app's create_all may already have added
+it (new databases), hence the existence check.
+
+Revision ID: 0009_webhook_next_attempt
+Revises: 0008_risk_score_key_factors
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_webhook_next_attempt"
+down_revision = "0008_risk_score_key_factors"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("stripe_webhook_events")}
+    if "next_attempt_at" not in columns:
+        op.add_column("stripe_webhook_events", sa.Column("next_attempt_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("stripe_webhook_events", "next_attempt_at")
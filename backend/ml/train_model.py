@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, GridSearchCV, cross_val_score
+from sklearn.model_selection import (
+    train_test_split, GridSearchCV, cross_val_score, ParameterSampler, StratifiedKFold
+)
+from sklearn.base import clone
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
@@ -11,24 +14,80 @@ from sklearn.metrics import (
 )
 import matplotlib.pyplot as plt
 import seaborn as sns
+from scipy.stats import loguniform, randint
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import joblib
 import json
+import time
 from datetime import datetime
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.compiled_model import CompiledModel
+
+# Budgeted mode: estimators and the distributions candidates are sampled from.
+# They cover the same ranges as the exhaustive grids below.
+SEARCH_SPACES = {
+    'logistic_regression': (
+        LogisticRegression(random_state=42, penalty='l2', solver='lbfgs', max_iter=1000),
+        {'C': loguniform(1e-3, 1e2)}
+    ),
+    'random_forest': (
+        RandomForestClassifier(random_state=42),
+        {
+            'n_estimators': randint(50, 201),
+            'max_depth': [5, 10, 15, None],
+            'min_samples_split': randint(2, 11),
+            'min_samples_leaf': randint(1, 5),
+            'max_features': ['sqrt', 'log2']
+        }
+    ),
+    # No Platt scaling while searching: probability=True runs its own 5-fold
+    # CV per fit. The winner is refit with probabilities.
+    'svm': (
+        SVC(random_state=42, probability=False),
+        {
+            'C': loguniform(0.1, 100),
+            'kernel': ['rbf', 'linear'],
+            'gamma': ['scale', 'auto']
+        }
+    ),
+}
 
 class RetentionPredictor:
-    def __init__(self, data_path='data/retention_training_data.csv'):
+    def __init__(self, data_path='data/retention_training_data.csv', target_column='retained',
+                 models_dir='backend/ml/models', plots_dir='backend/ml/plots'):
         """Initialize the retention predictor"""
         self.data_path = data_path
+        self.target_column = target_column
+        self.models_dir = models_dir
+        self.plots_dir = plots_dir
         self.models = {}
         self.scaler = StandardScaler()
         self.feature_names = []
         self.results = {}
+        self.search_report = {}
+        self.folds = None
+        self.mode_comparison = None
         
     def load_data(self):
         """Load and prepare the training data"""
         print("Loading data...")
+        # An empty export (no users with bookings yet) would otherwise fail
+        # deep inside the split or the searches with an unrelated error
+        if not os.path.exists(self.data_path) or os.path.getsize(self.data_path) == 0:
+            raise SystemExit(
+                f"❌ No training data in {self.data_path}: export it first (ml_data /export) "
+                f"from a database with booking history"
+            )
         df = pd.read_csv(self.data_path)
+        if df.empty or self.target_column not in df.columns or df[self.target_column].nunique() < 2:
+            raise SystemExit(
+                f"❌ {self.data_path} has {len(df)} rows; training needs both classes of '{self.target_column}'"
+            )
         
         print(f"Dataset shape: {df.shape}")
         print(f"Features: {df.columns.tolist()}")
@@ -37,14 +96,14 @@ class RetentionPredictor:
         if 'user_id' in df.columns:
             df = df.drop('user_id', axis=1)
         
-        X = df.drop('retained', axis=1)
-        y = df['retained']
+        X = df.drop(self.target_column, axis=1)
+        y = df[self.target_column]
         
         self.feature_names = X.columns.tolist()
         
-        print(f"\nClass distribution:")
-        print(f"Retained (1): {sum(y == 1)} ({sum(y == 1) / len(y) * 100:.1f}%)")
-        print(f"Churned (0): {sum(y == 0)} ({sum(y == 0) / len(y) * 100:.1f}%)")
+        print(f"\nClass distribution ({self.target_column}):")
+        print(f"Positive (1): {sum(y == 1)} ({sum(y == 1) / len(y) * 100:.1f}%)")
+        print(f"Negative (0): {sum(y == 0)} ({sum(y == 0) / len(y) * 100:.1f}%)")
         
         return X, y
     
@@ -58,6 +117,11 @@ class RetentionPredictor:
         print(f"Training set: {X_train.shape[0]} samples")
         print(f"Test set: {X_test.shape[0]} samples")
         
+        # Unscaled rows: per-fold scaling in budgeted mode, and checking the
+        # compiled export (it scales internally)
+        self.X_train_raw = X_train
+        self.X_test_raw = X_test
+        
         # Scale features
         print("Scaling features...")
         X_train_scaled = self.scaler.fit_transform(X_train)
@@ -83,11 +147,19 @@ class RetentionPredictor:
         grid_search = GridSearchCV(
             lr, param_grid, cv=5, scoring='f1', n_jobs=-1, verbose=1
         )
+        started = time.perf_counter()
         grid_search.fit(X_train, y_train)
         
         print(f"Best parameters: {grid_search.best_params_}")
         print(f"Best cross-validation F1 score: {grid_search.best_score_:.4f}")
         
+        self.search_report['logistic_regression'] = {
+            'mode': 'grid',
+            'seconds': time.perf_counter() - started,
+            'candidates': len(grid_search.cv_results_['params']),
+            'best_cv_f1': grid_search.best_score_,
+            'best_params': grid_search.best_params_
+        }
         self.models['logistic_regression'] = grid_search.best_estimator_
         return grid_search.best_estimator_
     
@@ -110,11 +182,19 @@ class RetentionPredictor:
         grid_search = GridSearchCV(
             rf, param_grid, cv=5, scoring='f1', n_jobs=-1, verbose=1
         )
+        started = time.perf_counter()
         grid_search.fit(X_train, y_train)
         
         print(f"Best parameters: {grid_search.best_params_}")
         print(f"Best cross-validation F1 score: {grid_search.best_score_:.4f}")
         
+        self.search_report['random_forest'] = {
+            'mode': 'grid',
+            'seconds': time.perf_counter() - started,
+            'candidates': len(grid_search.cv_results_['params']),
+            'best_cv_f1': grid_search.best_score_,
+            'best_params': grid_search.best_params_
+        }
         self.models['random_forest'] = grid_search.best_estimator_
         return grid_search.best_estimator_
     
@@ -135,14 +215,161 @@ class RetentionPredictor:
         grid_search = GridSearchCV(
             svm, param_grid, cv=5, scoring='f1', n_jobs=-1, verbose=1
         )
+        started = time.perf_counter()
         grid_search.fit(X_train, y_train)
         
         print(f"Best parameters: {grid_search.best_params_}")
         print(f"Best cross-validation F1 score: {grid_search.best_score_:.4f}")
         
+        self.search_report['svm'] = {
+            'mode': 'grid',
+            'seconds': time.perf_counter() - started,
+            'candidates': len(grid_search.cv_results_['params']),
+            'best_cv_f1': grid_search.best_score_,
+            'best_params': grid_search.best_params_
+        }
         self.models['svm'] = grid_search.best_estimator_
         return grid_search.best_estimator_
     
+    def prepare_folds(self, y_train, n_splits=5):
+        """
+        Stratified folds over the unscaled training rows, each scaled by a
+        StandardScaler fitted on its own training part only, so validation
+        rows never leak into the scaling. Computed once and shared by every
+        candidate of every family.
+        """
+        X = np.asarray(self.X_train_raw, dtype=np.float64)
+        y = np.asarray(y_train)
+        self.folds = []
+        for train_idx, val_idx in StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42).split(X, y):
+            fold_scaler = StandardScaler().fit(X[train_idx])
+            self.folds.append((
+                fold_scaler.transform(X[train_idx]), y[train_idx],
+                fold_scaler.transform(X[val_idx]), y[val_idx]
+            ))
+        return self.folds
+    
+    @staticmethod
+    def _fold_f1(estimator, fold):
+        X_tr, y_tr, X_va, y_va = fold
+        try:
+            return f1_score(y_va, clone(estimator).fit(X_tr, y_tr).predict(X_va))
+        except Exception as e:
+            # Same as cross_validate's error_score=nan: the candidate just loses
+            print(f"⚠️  Candidate failed on a fold: {e}")
+            return np.nan
+    
+    def budgeted_search(self, model_name, X_train, y_train, budget_seconds, n_iter=60, n_jobs=1):
+        """
+        Randomized search over SEARCH_SPACES[model_name], scored on the
+        shared pre-scaled folds, that stops sampling once budget_seconds
+        have passed. Refits the best candidate on the whole (scaled)
+        training set.
+        """
+        estimator, distributions = SEARCH_SPACES[model_name]
+        started = time.perf_counter()
+        history, best_score, best_params = [], None, None
+        
+        for params in ParameterSampler(distributions, n_iter=n_iter, random_state=42):
+            if history and time.perf_counter() - started >= budget_seconds:
+                break
+            
+            candidate = clone(estimator).set_params(**params)
+            scores = joblib.Parallel(n_jobs=n_jobs)(
+                joblib.delayed(self._fold_f1)(candidate, fold) for fold in self.folds
+            )
+            score = float(np.mean(scores))
+            if not np.isnan(score) and (best_score is None or score > best_score):
+                best_score, best_params = score, params
+            
+            history.append({
+                'seconds': time.perf_counter() - started,
+                'cv_f1': score,
+                'best_cv_f1': best_score,
+                'params': params
+            })
+        
+        if best_params is None:
+            raise RuntimeError(f"No {model_name} candidate could be scored")
+        
+        model = clone(estimator).set_params(**best_params)
+        if model_name == 'svm':
+            model.set_params(probability=True)
+        model.fit(X_train, y_train)
+        
+        self.search_report[model_name] = {
+            'mode': 'budgeted',
+            'seconds': time.perf_counter() - started,
+            'candidates': len(history),
+            'best_cv_f1': best_score,
+            'best_params': best_params,
+            'history': history
+        }
+        print(f"{model_name}: {len(history)} candidates in {self.search_report[model_name]['seconds']:.1f}s, "
+              f"best cross-validation F1 {best_score:.4f} with {best_params}")
+        return model
+    
+    def train_budgeted(self, X_train, y_train, budget_seconds=120, n_iter=60):
+        """Search every model family at once, each within the wall-clock budget"""
+        print("\n" + "="*50)
+        print(f"Budgeted search: {len(SEARCH_SPACES)} families in parallel, {budget_seconds}s each")
+        print("="*50)
+        
+        self.prepare_folds(y_train)
+        n_jobs = max(1, (os.cpu_count() or 1) // len(SEARCH_SPACES))
+        
+        with ThreadPoolExecutor(max_workers=len(SEARCH_SPACES)) as pool:
+            futures = {
+                name: pool.submit(self.budgeted_search, name, X_train, y_train, budget_seconds, n_iter, n_jobs)
+                for name in SEARCH_SPACES
+            }
+            for name, future in futures.items():
+                self.models[name] = future.result()
+        
+        return self.models
+    
+    def train_grid(self, X_train, y_train):
+        """The exhaustive grid searches, one family after another"""
+        self.train_logistic_regression(X_train, y_train)
+        self.train_random_forest(X_train, y_train)
+        self.train_svm(X_train, y_train)
+        return self.models
+    
+    def compare_modes(self, X_train, X_test, y_train, y_test, budget_seconds=120, n_iter=60):
+        """
+        Run grid and budgeted training on the same split and record the
+        wall-clock time and held-out F1 of each. Leaves the budgeted models
+        in self.models.
+        """
+        comparison = {}
+        for mode in ('grid', 'budgeted'):
+            self.models, self.search_report = {}, {}
+            started = time.perf_counter()
+            if mode == 'budgeted':
+                self.train_budgeted(X_train, y_train, budget_seconds=budget_seconds, n_iter=n_iter)
+            else:
+                self.train_grid(X_train, y_train)
+            seconds = time.perf_counter() - started
+            
+            test_f1 = {name: float(f1_score(y_test, model.predict(X_test))) for name, model in self.models.items()}
+            comparison[mode] = {
+                'seconds': seconds,
+                'test_f1': test_f1,
+                'best_test_f1': max(test_f1.values())
+            }
+        
+        comparison['speedup'] = comparison['grid']['seconds'] / max(comparison['budgeted']['seconds'], 1e-9)
+        comparison['f1_delta'] = comparison['budgeted']['best_test_f1'] - comparison['grid']['best_test_f1']
+        self.mode_comparison = comparison
+        
+        print("\n" + "="*50)
+        print("GRID VS BUDGETED")
+        print("="*50)
+        for mode in ('grid', 'budgeted'):
+            print(f"{mode:<10}{comparison[mode]['seconds']:>10.1f}s   best test F1 {comparison[mode]['best_test_f1']:.4f}")
+        print(f"Speedup {comparison['speedup']:.1f}x, test F1 change {comparison['f1_delta']:+.4f}")
+        return comparison
+    
     def evaluate_model(self, model, model_name, X_test, y_test):
         """Evaluate a trained model"""
         print(f"\n{'='*50}")
@@ -256,6 +483,63 @@ class RetentionPredictor:
         plt.close()
         print(f"Feature importance saved to {save_path}/{model_name}_feature_importance.png")
     
+    def plot_search_progress(self, save_path='backend/ml/plots'):
+        """Best cross-validation F1 so far against search time (budgeted mode)"""
+        families = {name: r for name, r in self.search_report.items() if r.get('history')}
+        if not families:
+            return
+        
+        os.makedirs(save_path, exist_ok=True)
+        
+        plt.figure(figsize=(10, 6))
+        for model_name, report in families.items():
+            plt.step([h['seconds'] for h in report['history']],
+                     [h['best_cv_f1'] for h in report['history']],
+                     where='post', label=model_name)
+        plt.xlabel('Search time (s)')
+        plt.ylabel('Best cross-validation F1')
+        plt.title('Search Progress')
+        plt.legend()
+        plt.grid(True, alpha=0.3)
+        plt.tight_layout()
+        plt.savefig(f'{save_path}/search_progress.png')
+        plt.close()
+        print(f"Search progress saved to {save_path}/search_progress.png")
+    
+    def save_search_report(self, save_dir='backend/ml/models'):
+        """Training time vs F1 per model family, as a table and training_report.json"""
+        os.makedirs(save_dir, exist_ok=True)
+        
+        print("\n" + "="*50)
+        print("TRAINING TIME VS F1")
+        print("="*50)
+        print(f"{'model':<22}{'mode':<10}{'candidates':>11}{'seconds':>10}{'cv F1':>9}{'test F1':>9}")
+        for model_name, report in self.search_report.items():
+            report['test_f1'] = self.results.get(model_name, {}).get('f1_score')
+            test_f1 = f"{report['test_f1']:.4f}" if report['test_f1'] is not None else "-"
+            print(f"{model_name:<22}{report['mode']:<10}{report['candidates']:>11}"
+                  f"{report['seconds']:>10.1f}{report['best_cv_f1']:>9.4f}{test_f1:>9}")
+        
+        report_path = f'{save_dir}/training_report.json'
+        with open(report_path, 'w') as f:
+            def convert_numpy(obj):
+                if isinstance(obj, np.integer):
+                    return int(obj)
+                elif isinstance(obj, np.floating):
+                    return float(obj)
+                return str(obj)
+            
+            report = {
+                'training_date': datetime.now().isoformat(),
+                'families': self.search_report
+            }
+            if self.mode_comparison:
+                report['mode_comparison'] = self.mode_comparison
+            json.dump(report, f, indent=2, default=convert_numpy)
+        print(f"Training report saved to {report_path}")
+        
+        return report_path
+    
     def compare_models(self):
         """Compare all trained models"""
         print("\n" + "="*50)
@@ -323,8 +607,36 @@ class RetentionPredictor:
         
         return model_path, scaler_path, metadata_path
     
-    def train_all(self):
-        """Complete training pipeline"""
+    def export_compiled(self, model_name, save_dir='backend/ml/models'):
+        """Export the model as plain NumPy arrays for the compiled evaluator"""
+        model = self.models[model_name]
+        
+        try:
+            compiled = CompiledModel.export(model, self.scaler)
+        except ValueError as e:
+            print(f"\nSkipping compiled export: {e}")
+            return None
+        
+        compiled_path = f'{save_dir}/{model_name}_compiled.npz'
+        compiled.save(compiled_path)
+        print(f"\nCompiled model saved to {compiled_path}")
+        
+        # Parity with sklearn on the held-out rows
+        expected = model.predict_proba(self.scaler.transform(self.X_test_raw))
+        actual = compiled.predict_proba(self.X_test_raw.to_numpy(dtype=np.float64))
+        max_diff = float(np.abs(expected - actual).max())
+        print(f"{'✅' if max_diff < 1e-9 else '❌'} Compiled vs sklearn max |Δ probability|: {max_diff:.2e}")
+        
+        return compiled_path
+    
+    def train_all(self, mode='grid', budget_seconds=120, n_iter=60):
+        """
+        Complete training pipeline. mode='grid' runs the exhaustive grid
+        searches one family after another; mode='budgeted' runs the
+        randomized searches concurrently within budget_seconds;
+        mode='compare' runs both, records time and test F1 of each in
+        training_report.json, and keeps the budgeted models.
+        """
         print("\n" + "="*50)
         print("RETENTION PREDICTION MODEL TRAINING")
         print("="*50)
@@ -336,9 +648,12 @@ class RetentionPredictor:
         X_train, X_test, y_train, y_test = self.preprocess_data(X, y)
         
         # Train models
-        lr_model = self.train_logistic_regression(X_train, y_train)
-        rf_model = self.train_random_forest(X_train, y_train)
-        svm_model = self.train_svm(X_train, y_train)
+        if mode == 'compare':
+            self.compare_modes(X_train, X_test, y_train, y_test, budget_seconds=budget_seconds, n_iter=n_iter)
+        elif mode == 'budgeted':
+            self.train_budgeted(X_train, y_train, budget_seconds=budget_seconds, n_iter=n_iter)
+        else:
+            self.train_grid(X_train, y_train)
         
         # Evaluate models
         models_data = {}
@@ -358,19 +673,22 @@ class RetentionPredictor:
             
             # Plot confusion matrix
             cm = confusion_matrix(y_test, y_pred)
-            self.plot_confusion_matrix(model_name, cm)
+            self.plot_confusion_matrix(model_name, cm, self.plots_dir)
             
             # Plot feature importance (for RF)
-            self.plot_feature_importance(model, model_name)
+            self.plot_feature_importance(model, model_name, self.plots_dir)
         
         # Plot ROC curves
-        self.plot_roc_curve(models_data)
+        self.plot_roc_curve(models_data, self.plots_dir)
         
         # Compare models
         best_model = self.compare_models()
+        self.save_search_report(self.models_dir)
+        self.plot_search_progress(self.plots_dir)
         
         # Save best model
-        self.save_model(best_model)
+        self.save_model(best_model, self.models_dir)
+        self.export_compiled(best_model, self.models_dir)
         
         print("\n" + "="*50)
         print("TRAINING COMPLETE!")
@@ -381,11 +699,23 @@ class RetentionPredictor:
 
 def main():
     """Main training function"""
+    parser = argparse.ArgumentParser(description="Train the retention prediction models")
+    parser.add_argument("--mode", choices=["grid", "budgeted", "compare"], default="grid",
+                        help="exhaustive grid search, randomized search per family in parallel, "
+                             "or both with their time and test F1 in training_report.json")
+    parser.add_argument("--budget-seconds", type=float, default=120,
+                        help="budgeted mode: wall-clock search budget per family")
+    parser.add_argument("--n-iter", type=int, default=60,
+                        help="budgeted mode: most candidates sampled per family")
+    args = parser.parse_args()
+    
     # Initialize predictor
     predictor = RetentionPredictor()
     
     # Train all models and get best one
-    best_model_name, best_model = predictor.train_all()
+    best_model_name, best_model = predictor.train_all(
+        mode=args.mode, budget_seconds=args.budget_seconds, n_iter=args.n_iter
+    )
     
     print(f"\n✅ Best model ({best_model_name}) is ready for deployment!")
     print(f"📊 Check the plots in 'backend/ml/plots/' for visualizations")
@@ -0,0 +1,60 @@
+# ============================================================================
+# ONLINE RETENTION RETRAINING
+# Updates the retention model from tenant outcomes labelled since the last
+# run and registers the result as a new model version; optionally runs a
+# full retrain when live features drift (see app/services/online_learning_service.py)
+# Run with: python online_retrain.py [--promote]
+#           python online_retrain.py --check-drift [--promote]
+#           python online_retrain.py --full [--budget-seconds 300] [--promote]
+# ============================================================================
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import SessionLocal
+from app.services.ml_prediction_service import MLPredictionService
+from app.services.online_learning_service import OnlineLearningService
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental and drift-triggered retention model retraining")
+    parser.add_argument("--promote", action="store_true", help="make the new version active")
+    parser.add_argument("--check-drift", action="store_true",
+                        help="full retrain if the live features drifted from the active model's reference")
+    parser.add_argument("--full", action="store_true", help="full retrain now")
+    parser.add_argument("--budget-seconds", type=float, default=120,
+                        help="full retrain: search budget per model family")
+    args = parser.parse_args()
+
+    ml_service = MLPredictionService()
+    db = SessionLocal()
+    try:
+        if args.full:
+            result = OnlineLearningService.full_retrain(
+                db, ml_service, promote=args.promote, budget_seconds=args.budget_seconds
+            )
+        elif args.check_drift:
+            result = OnlineLearningService.retrain_if_drifted(
+                db, ml_service, promote=args.promote, budget_seconds=args.budget_seconds
+            )
+            drift = result.get("drift")
+            if drift and drift["status"] == "ok":
+                print(f"📊 Max PSI {drift['max_psi']:.3f} ({drift['max_feature']}), threshold {drift['threshold']}")
+        else:
+            result = OnlineLearningService.update(db, ml_service, promote=args.promote)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Retraining failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    if result["status"] in ("updated", "retrained"):
+        print(f"✅ Registered {result['version']}{' (promoted)' if result['promoted'] else ''}: {result}")
+    else:
+        print(f"ℹ️  Nothing registered: {result['status']}")
+
+if __name__ == "__main__":
+    main()
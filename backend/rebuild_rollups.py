@@ -0,0 +1,38 @@
+# ============================================================================
+# REPORT ROLLUP REBUILD
+# Recomputes daily_property_stats from bookings and payments. Needed once
+# after the table is created, and after any write that bypasses the ORM.
+# Run with: python rebuild_rollups.py [--from 2025-01-01] [--to 2025-12-31]
+# ============================================================================
+
+import sys
+import os
+import argparse
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import SessionLocal
+from app.services.rollup_service import RollupService
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily report rollups")
+    parser.add_argument("--from", dest="first_day", type=date.fromisoformat, default=None,
+                        help="first day to rebuild (default: all history)")
+    parser.add_argument("--to", dest="last_day", type=date.fromisoformat, default=None,
+                        help="last day to rebuild, inclusive (default: all history)")
+    args = parser.parse_args()
+
+    print("🔄 Rebuilding report rollups...")
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        written = RollupService.rebuild(db, first_day=args.first_day, last_day=args.last_day)
+    finally:
+        db.close()
+
+    print(f"✅ Wrote {written} property-day rows in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# ============================================================================
+# PAYMENT RECONCILIATION
+# Checks stale PENDING gateway intents against Stripe and settles them.
+# Resumable: progress is stored in job_states.payment_reconciliation
+# Run with: python reconcile_payments.py [--stale-minutes 30] [--concurrency 8]
+# ============================================================================
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import SessionLocal
+from app.services.payment_sync_service import PaymentSyncService
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile pending payments against the gateway")
+    parser.add_argument("--stale-minutes", type=int, default=30, help="only intents older than this")
+    parser.add_argument("--expire-hours", type=int, default=24, help="unpaid intents older than this are cancelled at the gateway and failed")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel gateway requests")
+    parser.add_argument("--max-batches", type=int, default=None, help="stop early (resume on next run)")
+    args = parser.parse_args()
+
+    print("🔄 Reconciling pending payments...")
+    db = SessionLocal()
+    try:
+        summary = PaymentSyncService.reconcile_pending(
+            db,
+            stale_minutes=args.stale_minutes,
+            expire_hours=args.expire_hours,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            max_batches=args.max_batches,
+        )
+    finally:
+        db.close()
+
+    print("✅ Reconciliation finished:")
+    print(f"   - Resumed from payment id: {summary['resumed_from']}")
+    print(f"   - Batches: {summary['batches']}")
+    print(f"   - Checked: {summary['checked']}")
+    print(f"   - Completed: {summary['completed']}")
+    print(f"   - Failed/expired: {summary['failed']}")
+    print(f"   - Unchanged: {summary['unchanged']}")
+    print(f"   - Gateway errors: {summary['gateway_errors']}")
+    print(f"   - Watermark: {summary['watermark']}")
+
+if __name__ == "__main__":
+    main()
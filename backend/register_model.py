@@ -0,0 +1,134 @@
+# ============================================================================
+# MODEL REGISTRY CLI
+# Registers trained retention model artifacts as a new version under
+# ml/models/registry and optionally promotes it (see app/services/model_registry.py)
+# Run with: python register_model.py --model ml/models/random_forest_model.pkl [--compile] [--promote]
+#           python register_model.py --legacy-profile
+#           python register_model.py --list
+#           python register_model.py --promote-version v20261019T120000
+# ============================================================================
+
+import sys
+import os
+import argparse
+import tempfile
+
+import json
+
+import joblib
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.model_registry import ModelRegistry
+from app.services.compiled_model import COMPILED_FILE, CompiledModel
+from app.services.drift_service import TRAINING_DATA_PATH, DriftService
+from app.services.ml_data_service import FEATURE_COLUMNS, MLDataService
+from app.services.ml_prediction_service import REFERENCE_PROFILE_FILE, SELECTED_FEATURES, MLPredictionService
+
+def build_reference_profile(encoders_path: str, data_path: str) -> tuple:
+    """
+    Drift reference profile of the model input: from the training CSV when
+    it has rows, else from every labelled tenant outcome in the database
+    (what online_retrain.py --full trains on). Returns (profile, source).
+    """
+    frame = None
+    if os.path.exists(data_path) and os.path.getsize(data_path) > 0:
+        frame = pd.read_csv(data_path)
+        source = data_path
+    if frame is None or frame.empty:
+        # Only this path needs the database
+        from app.db.session import SessionLocal
+        db = SessionLocal()
+        try:
+            frame = MLDataService.collect_labelled_outcomes(db)[FEATURE_COLUMNS]
+        finally:
+            db.close()
+        source = "labelled tenant outcomes"
+    if frame.empty:
+        raise ValueError(f"No rows in {data_path} or the database to profile")
+
+    if set(SELECTED_FEATURES) <= set(frame.columns) and all(
+        pd.api.types.is_numeric_dtype(frame[column]) for column in SELECTED_FEATURES
+    ):
+        X = frame[SELECTED_FEATURES]
+    else:
+        X = MLPredictionService()._engineer_features(frame, joblib.load(encoders_path))
+    print(f"📈 Reference profile from {source} ({len(X)} rows)")
+    return DriftService.profile(X), source
+
+def main():
+    parser = argparse.ArgumentParser(description="Register and promote retention model versions")
+    parser.add_argument("--registry", default=os.path.join("ml", "models", "registry"))
+    parser.add_argument("--model", help="pickled estimator to register")
+    parser.add_argument("--encoders", default=os.path.join("ml", "models", "label_encoders.pkl"))
+    parser.add_argument("--note", default="", help="free-text note stored in the manifest")
+    parser.add_argument("--compile", action="store_true",
+                        help="also store a compiled evaluator (random forest / logistic regression only)")
+    parser.add_argument("--reference-data", default=TRAINING_DATA_PATH,
+                        help="training CSV for the drift reference profile (empty: labelled outcomes in the DB)")
+    parser.add_argument("--no-reference", action="store_true", help="register without a drift reference profile")
+    parser.add_argument("--legacy-profile", action="store_true",
+                        help=f"write the reference profile to ml/models/{REFERENCE_PROFILE_FILE} for the "
+                             "unregistered flat-file model")
+    parser.add_argument("--promote", action="store_true", help="make the new version active")
+    parser.add_argument("--promote-version", help="make an existing version active")
+    parser.add_argument("--list", action="store_true", help="list registered versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+
+    if args.list:
+        active = registry.get_active()
+        for manifest in registry.list_versions():
+            marker = "⭐" if active and active["version"] == manifest["version"] else "  "
+            print(f"{marker} {manifest['version']}  {manifest['model_type']:<28} {manifest['created_at']}")
+        return
+
+    if args.legacy_profile:
+        try:
+            profile, _ = build_reference_profile(args.encoders, args.reference_data)
+        except Exception as e:
+            print(f"❌ {str(e)}")
+            sys.exit(1)
+        profile_path = os.path.join(os.path.dirname(args.encoders), REFERENCE_PROFILE_FILE)
+        with open(profile_path, "w") as f:
+            json.dump(profile, f)
+        print(f"✅ Reference profile saved to {profile_path}")
+
+    if args.model:
+        metadata = {
+            "source": os.path.abspath(args.model),
+            "note": args.note,
+        }
+        if not args.no_reference:
+            try:
+                metadata["reference_profile"], metadata["reference_source"] = build_reference_profile(
+                    args.encoders, args.reference_data
+                )
+            except Exception as e:
+                print(f"⚠️  No drift reference profile ({str(e)}); the drift monitor will fall back to the CSV")
+
+        extra_files = {}
+        if args.compile:
+            compiled_path = os.path.join(tempfile.mkdtemp(), COMPILED_FILE)
+            CompiledModel.export(joblib.load(args.model)).save(compiled_path)
+            extra_files[COMPILED_FILE] = compiled_path
+
+        manifest = registry.register(args.model, args.encoders, metadata=metadata, extra_files=extra_files)
+        print(f"✅ Registered {manifest['version']} ({manifest['model_type']})")
+        if args.promote:
+            args.promote_version = manifest["version"]
+
+    if args.promote_version:
+        try:
+            pointer = registry.promote(args.promote_version)
+        except (LookupError, ValueError) as e:
+            print(f"❌ {str(e)}")
+            sys.exit(1)
+        print(f"✅ {pointer['version']} is now active (was {pointer['previous']})")
+    elif not args.model and not args.legacy_profile:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# ============================================================================
+# TENANT RISK SCORE WORKER
+# Keeps tenant_risk_scores current for the ML read endpoints: rescores
+# tenants whose bookings changed, and everyone on a schedule, when the
+# model changes or when POST /ml-predictions/scores/refresh asks for it
+# (see app/services/risk_score_service.py)
+# Run with: python risk_score_worker.py [--once]
+# ============================================================================
+
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import SessionLocal
+from app.services.ml_prediction_service import MLPredictionService
+from app.services.risk_score_service import RiskScoreService, STALE_BATCH_SIZE
+
+POLL_SECONDS = float(os.getenv("RISK_POLL_SECONDS", "30"))
+FULL_REFRESH_SECONDS = float(os.getenv("RISK_FULL_REFRESH_SECONDS", str(6 * 3600)))
+
+def run_once(ml_service, full: bool):
+    db = SessionLocal()
+    try:
+        if full or RiskScoreService.needs_full_refresh(db, ml_service, FULL_REFRESH_SECONDS):
+            return "full", RiskScoreService.refresh(db, ml_service)
+        return "stale", RiskScoreService.refresh_stale(db, ml_service, batch_size=STALE_BATCH_SIZE)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error refreshing risk scores: {str(e)}")
+        return None, None
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh persisted tenant risk scores")
+    parser.add_argument("--once", action="store_true", help="run one full refresh and exit")
+    args = parser.parse_args()
+
+    ml_service = MLPredictionService()
+    if not ml_service.model or not ml_service.label_encoders:
+        print("❌ Model not loaded - nothing to score with")
+        sys.exit(1)
+
+    if args.once:
+        _, summary = run_once(ml_service, full=True)
+        if summary is None:
+            sys.exit(1)
+        print(f"✅ Scored {summary['scored']} tenants, removed {summary['removed']} rows ({summary['model_version']})")
+        return
+
+    print("🎯 Risk score worker started")
+    print(f"   Stale batch: {STALE_BATCH_SIZE}, poll interval: {POLL_SECONDS}s, "
+          f"full refresh every {FULL_REFRESH_SECONDS:.0f}s")
+    print("   Press Ctrl+C to stop\n")
+
+    while True:
+        kind, summary = run_once(ml_service, full=False)
+
+        if summary and summary['scored'] + summary['removed']:
+            print(f"✅ {kind.capitalize()} refresh: {summary}")
+
+        # A full stale batch means there is probably more waiting - don't sleep
+        if not summary or kind == "full" or summary['claimed'] < STALE_BATCH_SIZE:
+            time.sleep(POLL_SECONDS)
+
+if __name__ == "__main__":
+    main()
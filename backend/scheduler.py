@@ -43,7 +43,7 @@ def send_daily_retention_alerts():
             features_for_prediction = {k: v for k, v in features.items() 
                                       if k not in ['user_id', 'retained']}
             
-            prediction = ml_service.predict_retention(features_for_prediction)
+            prediction = ml_service.predict_retention(features_for_prediction, observe=False)
             
             # Send alert if high risk
             if prediction['risk_score'] >= 70:
@@ -0,0 +1,36 @@
+# ============================================================================
+# ANALYTICS SNAPSHOT EXPORT
+# Writes bookings, payments, properties and anonymized users as Parquet
+# under data/snapshots (or $SNAPSHOT_DIR), see app/services/snapshot_service.py
+# Run with: python snapshot_export.py [--mode full|incremental]
+# ============================================================================
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import SessionLocal
+from app.services.snapshot_service import SnapshotService, SNAPSHOT_CHUNK_ROWS, SNAPSHOT_DIR
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Parquet analytics snapshots")
+    parser.add_argument("--mode", choices=["full", "incremental"], default="incremental",
+                        help="incremental falls back to full on the first run")
+    parser.add_argument("--chunk-rows", type=int, default=SNAPSHOT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    print(f"📦 Snapshotting to {SNAPSHOT_DIR} ({args.mode})...")
+    db = SessionLocal()
+    try:
+        run = SnapshotService.run(db, mode=args.mode, chunk_rows=args.chunk_rows)
+    finally:
+        db.close()
+
+    print(f"✅ Run {run['run_id']} ({run['mode']}) finished:")
+    for file in run["files"]:
+        print(f"   - {file['table']}: {file['rows']} rows, {file['bytes']} bytes")
+
+if __name__ == "__main__":
+    main()
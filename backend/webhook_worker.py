@@ -0,0 +1,46 @@
+# ============================================================================
+# STRIPE WEBHOOK WORKER
+# Drains the stripe_webhook_events inbox written by POST /payments/webhook
+# Run with: python webhook_worker.py
+# ============================================================================
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import SessionLocal
+from app.services.payment_sync_service import PaymentSyncService
+
+BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "100"))
+POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS", "2"))
+
+def process_batch():
+    db = SessionLocal()
+    try:
+        return PaymentSyncService.process_pending_events(db, batch_size=BATCH_SIZE)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error processing webhook batch: {str(e)}")
+        return None
+    finally:
+        db.close()
+
+def run_worker():
+    print("📬 Webhook worker started")
+    print(f"   Batch size: {BATCH_SIZE}, poll interval: {POLL_SECONDS}s")
+    print("   Press Ctrl+C to stop\n")
+
+    while True:
+        summary = process_batch()
+
+        if summary and summary['claimed']:
+            print(f"✅ Batch: {summary}")
+
+        # A full batch means there is probably more waiting - don't sleep
+        if not summary or summary['claimed'] < BATCH_SIZE:
+            time.sleep(POLL_SECONDS)
+
+if __name__ == "__main__":
+    run_worker()